@@ -32,6 +32,11 @@ from lute.db.demo import Service as DemoService
 import lute.utils.formutils
 
 from lute.parse.registry import init_parser_plugins, supported_parsers
+from lute.read.render.language_indexers import init_language_indexers
+from lute.read.render.term_statuses import reset_term_statuses
+from lute.term.search_index import reset_search_indexes
+from lute.read.render.page_cache import init_page_cache
+from lute.read.prerender import init_prerender, shutdown_prerender
 
 from lute.models.book import Book
 from lute.models.language import Language
@@ -103,6 +108,10 @@ def _setup_app_dirs(app_config):
             app_config.temppath,
             "Temp directory for export file writes, to avoid permissions issues.",
         ],
+        [
+            app_config.cachepath,
+            "Cached data that Lute can rebuild, e.g. multiword term indexes.",
+        ],
     ]
     for rec in required_dirs:
         _setup_app_dir(rec[0], rec[1])
@@ -405,6 +414,15 @@ def create_app(
     app_config = AppConfig(app_config_path)
     _setup_app_dirs(app_config)
     setup_db(app_config, output_func)
+    # Cached term data may be from a different db.
+    shutdown_prerender()
+    init_language_indexers(app_config.cachepath)
+    reset_term_statuses()
+    reset_search_indexes()
+    spill_dir = None
+    if app_config.page_cache_disk:
+        spill_dir = os.path.join(app_config.cachepath, "pages")
+    init_page_cache(app_config.page_cache_size, spill_dir)
 
     if extra_config is None:
         extra_config = {}
@@ -414,6 +432,8 @@ def create_app(
     # Plugins are loaded after the app, as they may use settings etc.
     _init_parser_plugins(app_config.plugin_datapath, outfunc)
 
+    init_prerender(app, app_config.prerender_workers, app_config.prerender_save_terms)
+
     return app
 
 
@@ -1,34 +1,3 @@
-@bp.route("/add_parse_exception", methods=["POST"])
-def add_parse_exception():
-    """Append a parse exception rule to parser_exceptions.txt in the data directory."""
-    import json
-    from flask import current_app, request
-    data = request.get_json()
-    rule = data.get('rule', '').strip()
-    if not rule:
-        return "Missing rule", 400
-
-    # Find the correct data directory
-    app_config = getattr(current_app, 'env_config', None)
-    if app_config and hasattr(app_config, 'userdatadir'):
-        data_dir = app_config.userdatadir
-    else:
-        # Fallback: use platformdirs
-        try:
-            from platformdirs import PlatformDirs
-            dirs = PlatformDirs("Lute3", "Lute3")
-            data_dir = dirs.user_data_dir
-        except Exception:
-            return "Could not determine data directory", 500
-
-    exceptions_file = os.path.join(data_dir, "plugins", "lute_mandarin", "parser_exceptions.txt")
-    os.makedirs(os.path.dirname(exceptions_file), exist_ok=True)
-    try:
-        with open(exceptions_file, "a", encoding="utf-8") as f:
-            f.write(rule + "\n")
-    except Exception as e:
-        return f"Failed to write exception: {str(e)}", 500
-    return "OK", 200
 """
 Backup routes.
 
@@ -135,6 +104,7 @@ def handle_skip_this_backup():
     service.skip_this_backup()
     return redirect("/", 302)
 
+
 @bp.route("/restore/<filename>", methods=["POST"])
 def restore_backup(filename):
     """
@@ -154,11 +124,10 @@ def restore_backup(filename):
         print(f"📂 Temp restore file: {backup_tmp_path}")
 
         # Unzip the .gz backup to a temp file
-        with gzip.open(backup_path, 'rb') as f_in, open(backup_tmp_path, 'wb') as f_out:
+        with gzip.open(backup_path, "rb") as f_in, open(backup_tmp_path, "wb") as f_out:
             shutil.copyfileobj(f_in, f_out)
             print("✅ Unzipped backup to temp file.")
 
-
         # Rename current db as a backup
         original_backup = db_path + ".pre_restore"
         if os.path.exists(db_path):
@@ -173,6 +142,7 @@ def restore_backup(filename):
         db.engine.dispose()
         from sqlalchemy import create_engine
         from sqlalchemy.orm import sessionmaker, scoped_session
+
         # Recreate engine using the current DB path
         new_engine = create_engine(f"sqlite:///{db_path}")
         Session = scoped_session(sessionmaker(bind=new_engine))
@@ -198,10 +168,47 @@ def restore_backup(filename):
 
     return redirect("/backup/index")
 
+
 @bp.route("/debug_db")
 def debug_db():
     from lute.models.book import Book
+
     count = db.session.query(Book).count()
     return f"📚 Book count in current DB: {count}"
 
-    
\ No newline at end of file
+
+@bp.route("/add_parse_exception", methods=["POST"])
+def add_parse_exception():
+    """Append a parse exception rule to parser_exceptions.txt in the data directory."""
+    import json
+    from flask import current_app, request
+
+    data = request.get_json()
+    rule = data.get("rule", "").strip()
+    if not rule:
+        return "Missing rule", 400
+
+    # Find the correct data directory
+    app_config = getattr(current_app, "env_config", None)
+    if app_config and hasattr(app_config, "userdatadir"):
+        data_dir = app_config.userdatadir
+    else:
+        # Fallback: use platformdirs
+        try:
+            from platformdirs import PlatformDirs
+
+            dirs = PlatformDirs("Lute3", "Lute3")
+            data_dir = dirs.user_data_dir
+        except Exception:
+            return "Could not determine data directory", 500
+
+    exceptions_file = os.path.join(
+        data_dir, "plugins", "lute_mandarin", "parser_exceptions.txt"
+    )
+    os.makedirs(os.path.dirname(exceptions_file), exist_ok=True)
+    try:
+        with open(exceptions_file, "a", encoding="utf-8") as f:
+            f.write(rule + "\n")
+    except Exception as e:
+        return f"Failed to write exception: {str(e)}", 500
+    return "OK", 200
@@ -2,12 +2,30 @@
 Book domain objects.
 """
 
+import os
+import itertools
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from lute.models.book import BookTag, Book as DBBook, Text as DBText
 from lute.models.repositories import (
     BookRepository,
     BookTagRepository,
     LanguageRepository,
 )
+from lute.models.language import Language
+from lute.parse.base import ParsedToken, ParseContext
+from lute.parse.registry import init_parser_plugins, supported_parsers
+from lute.settings.current import current_settings
+
+
+# Books with at least this many characters are parsed in a process
+# pool, in chunks of about PARSE_CHUNK_CHARS characters.
+PARALLEL_PARSE_MIN_CHARS = 2_000_000
+PARSE_CHUNK_CHARS = 250_000
+
+# Streamed books are written in batches of this many pages.
+STREAMED_PAGE_BATCH_SIZE = 100
 
 
 def token_group_generator(tokens, group_type, threshold=500):
@@ -33,13 +51,17 @@ def token_group_generator(tokens, group_type, threshold=500):
             return tok.is_end_of_paragraph
         raise RuntimeError("Unhandled type " + group_type)
 
+    current_count = 0
+    buff_count = 0
     for token in tokens:
         buff.append(token)
+        if token.is_word:
+            buff_count += 1
         if _matches_group_delimiter(token):
             current_group.extend(buff)
-            # pylint: disable=consider-using-generator
-            current_count = sum([1 for t in current_group if t.is_word])
+            current_count += buff_count
             buff = []
+            buff_count = 0
 
             # Yield if threshold exceeded.
             # Remove the final paragreph marker if it's there, it's not needed.
@@ -47,6 +69,7 @@ def token_group_generator(tokens, group_type, threshold=500):
                 current_group = trim_paras(current_group)
                 yield current_group
                 current_group = []
+                current_count = 0
 
     # Add any remaining tokens
     if buff:
@@ -56,6 +79,148 @@ def token_group_generator(tokens, group_type, threshold=500):
         yield current_group
 
 
+def _split_at_paragraphs(text, size):
+    "Split text at the first newline after every size characters."
+    chunks = []
+    start = 0
+    while len(text) - start > size:
+        i = text.find("\n", start + size)
+        if i == -1:
+            break
+        chunks.append(text[start:i])
+        start = i + 1
+    chunks.append(text[start:])
+    return chunks
+
+
+def _iter_lines(text_chunks):
+    "Yield the lines of the text given as an iterable of chunks."
+    buff = []
+    for chunk in text_chunks:
+        lines = chunk.split("\n")
+        if len(lines) == 1:
+            buff.append(chunk)
+            continue
+        buff.append(lines[0])
+        yield "".join(buff)
+        yield from lines[1:-1]
+        buff = [lines[-1]]
+    yield "".join(buff)
+
+
+def _iter_segment_pieces(lines, size):
+    """
+    Yield (segment number, piece) for the lines of a text.
+
+    Segments are separated by '---' lines, as in
+    Repository._split_text_at_page_breaks().  Each piece is a run of
+    whole lines of at least size characters, except for the last piece
+    of each segment.
+    """
+    segnum = 0
+    piece = []
+    piece_len = 0
+    for line in lines:
+        if line.strip() == "---":
+            if piece:
+                yield segnum, "\n".join(piece)
+            segnum += 1
+            piece = []
+            piece_len = 0
+            continue
+        piece.append(line)
+        piece_len += len(line) + 1
+        if piece_len >= size:
+            yield segnum, "\n".join(piece)
+            piece = []
+            piece_len = 0
+    if piece:
+        yield segnum, "\n".join(piece)
+
+
+def _join_chunk_tokens(token_lists):
+    """
+    Yield the tokens of consecutive chunks of a segment.
+
+    Each chunk split consumed exactly one newline, so a paragraph
+    marker is added between every pair of chunks, even if a chunk is
+    empty or already ends with a marker (a blank line).
+    """
+    for i, tokens in enumerate(token_lists):
+        if i > 0:
+            yield ParsedToken("¶", False, True)
+        yield from tokens
+
+
+def _pool_initargs(language):
+    "Args for _init_pool_worker, to parse the language's texts."
+    return (
+        language.parser_type,
+        language.parser.data_directory,
+        dict(current_settings),
+    )
+
+
+def _init_pool_worker(parser_type, data_directory, settings):
+    """
+    Set up the parser in a new pool worker process.
+
+    Workers are spawned rather than forked, as forking the
+    multithreaded server can deadlock the child.  Spawned workers
+    start fresh, so the user settings (e.g. mecab_path, checked by
+    the Japanese parser), the parser plugins, and their data
+    directory are initialized again.
+    """
+    current_settings.update(settings)
+    parsers = dict(supported_parsers())
+    if parser_type not in parsers:
+        init_parser_plugins()
+        parsers = dict(supported_parsers())
+    if parser_type in parsers:
+        parsers[parser_type].data_directory = data_directory
+
+
+def _parse_in_worker(language_dict, text):
+    "Parse text in a pool worker process."
+    lang = Language.from_dict(language_dict)
+    return lang.get_parsed_tokens(text)
+
+
+def _get_parsed_tokens_in_pool(segments, language):
+    """
+    Get the tokens for each segment, parsing chunks in a process pool.
+
+    Segments are split into chunks at paragraph boundaries, and the
+    chunk tokens are joined with paragraph markers.
+    """
+    jobs = []
+    for segnum, seg in enumerate(segments):
+        for chunk in _split_at_paragraphs(seg, PARSE_CHUNK_CHARS):
+            jobs.append((segnum, chunk))
+
+    lang_dict = language.to_dict()
+    workers = min(len(jobs), os.cpu_count() or 1)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_pool_worker,
+        initargs=_pool_initargs(language),
+    ) as pool:
+        results = pool.map(
+            _parse_in_worker, [lang_dict] * len(jobs), [j[1] for j in jobs]
+        )
+        # segment number => its chunks' tokens, in order.
+        seg_chunk_tokens = defaultdict(list)
+        for (segnum, _), tokens in zip(jobs, results):
+            seg_chunk_tokens[segnum].append(tokens)
+
+    return [
+        ParseContext().add_all(list(_join_chunk_tokens(seg_chunk_tokens[segnum])))
+        for segnum in range(len(segments))
+    ]
+
+
 class Book:  # pylint: disable=too-many-instance-attributes
     """
     A book domain object, to create/edit lute.models.book.Books.
@@ -138,6 +303,54 @@ class Repository:
         self.session.add(dbbook)
         return dbbook
 
+    def add_streamed(self, book, text_chunks):
+        """
+        Add a new book, reading its text from the iterable text_chunks.
+
+        Only the current page's tokens are kept in memory: pages are
+        split as the text is read, and are inserted in batches of
+        STREAMED_PAGE_BATCH_SIZE.  The book and its pages are flushed
+        to the db session, but not committed.
+        """
+        if book.id is not None:
+            raise ValueError(f"book {book.title} already saved")
+        dbbook = self._build_db_book(book, add_pages=False)
+        self.session.add(dbbook)
+        self.session.flush()
+
+        lines = _iter_lines(text_chunks)
+        pieces = _iter_segment_pieces(lines, PARSE_CHUNK_CHARS)
+        lang = dbbook.language
+
+        def _insert(rows):
+            if rows:
+                self.session.execute(DBText.__table__.insert(), rows)
+
+        batch = []
+        order = 0
+        for _, seg_pieces in itertools.groupby(pieces, key=lambda p: p[0]):
+            tokens = _join_chunk_tokens(
+                lang.get_parsed_tokens(piece) for _, piece in seg_pieces
+            )
+            for page, toks in self._get_pages(book, tokens):
+                order += 1
+                batch.append(
+                    {
+                        "TxBkID": dbbook.id,
+                        "TxOrder": order,
+                        "TxText": page,
+                        "TxWordCount": len([t for t in toks if t.is_word]),
+                    }
+                )
+                if len(batch) >= STREAMED_PAGE_BATCH_SIZE:
+                    _insert(batch)
+                    batch = []
+        _insert(batch)
+
+        # The pages were inserted directly, so reload them if needed.
+        self.session.expire(dbbook, ["texts"])
+        return dbbook
+
     def delete(self, book):
         """
         Delete.
@@ -157,34 +370,49 @@ class Repository:
         "Break fulltext manually at lines consisting of '---' only."
         # Tried doing this with a regex without success.
         segments = []
-        current_segment = ""
+        current_lines = []
         for line in txt.split("\n"):
             if line.strip() == "---":
-                segments.append(current_segment.strip())
-                current_segment = ""
+                segments.append("\n".join(current_lines).strip())
+                current_lines = []
             else:
-                current_segment += line + "\n"
-        if current_segment:
-            segments.append(current_segment.strip())
+                current_lines.append(line)
+        if current_lines:
+            segments.append("\n".join(current_lines).strip())
         return segments
 
+    def _get_segment_tokens(self, segments, language):
+        "Parse the segments, using a process pool for very large books."
+        use_pool = sum(len(seg) for seg in segments) >= PARALLEL_PARSE_MIN_CHARS
+        if use_pool:
+            return _get_parsed_tokens_in_pool(segments, language)
+        return language.get_parsed_tokens_batch(segments)
+
+    def _get_pages(self, book, tokens):
+        "Yield (page text, page tokens) for the book's split settings."
+        for toks in token_group_generator(
+            tokens, book.split_by, book.threshold_page_tokens
+        ):
+            s = "".join([t.token for t in toks])
+            s = s.replace("\r", "").replace("¶", "\n").strip()
+            if s != "":
+                yield (s, toks)
+
     def _split_pages(self, book, language):
-        "Split fulltext into pages, respecting sentences."
+        """
+        Split fulltext into pages, respecting sentences.
 
-        pages = []
-        for segment in self._split_text_at_page_breaks(book.text):
-            tokens = language.parser.get_parsed_tokens(segment, language)
-            for toks in token_group_generator(
-                tokens, book.split_by, book.threshold_page_tokens
-            ):
-                s = "".join([t.token for t in toks])
-                s = s.replace("\r", "").replace("¶", "\n")
-                pages.append(s.strip())
-        pages = [p for p in pages if p.strip() != ""]
+        Returns array of (page text, page tokens), so that the text is
+        only parsed once.
+        """
 
+        pages = []
+        segments = self._split_text_at_page_breaks(book.text)
+        for tokens in self._get_segment_tokens(segments, language):
+            pages.extend(self._get_pages(book, tokens))
         return pages
 
-    def _build_db_book(self, book):
+    def _build_db_book(self, book, add_pages=True):
         "Convert a book business object to a DBBook."
 
         lang_repo = LanguageRepository(self.session)
@@ -199,10 +427,10 @@ class Repository:
 
         b = None
         if book.id is None:
-            pages = self._split_pages(book, lang)
+            pages = self._split_pages(book, lang) if add_pages else []
             b = DBBook(book.title, lang)
-            for index, page in enumerate(pages):
-                _ = DBText(b, page, index + 1)
+            for index, (page, tokens) in enumerate(pages):
+                _ = DBText(b, page, index + 1, parsed_tokens=tokens)
         else:
             b = self.book_repo.find(book.id)
 
@@ -4,7 +4,10 @@ book helper routines.
 
 import os
 import shutil
-from io import StringIO, TextIOWrapper, BytesIO
+import functools
+import codecs
+from contextlib import nullcontext
+from io import StringIO, TextIOWrapper, BytesIO, IncrementalNewlineDecoder
 from datetime import datetime
 import uuid
 from dataclasses import dataclass
@@ -16,6 +19,12 @@ from openepub import Epub, EpubError
 from pypdf import PdfReader
 from subtitle_parser import SrtParser, WebVttParser
 from lute.book.model import Repository
+from lute.models.book import Text
+
+
+# .txt files of at least this many bytes are imported by streaming
+# the file, rather than reading it all into memory.
+STREAMING_IMPORT_MIN_BYTES = 5 * 1024 * 1024
 
 
 class BookImportException(Exception):
@@ -29,6 +38,16 @@ class BookImportException(Exception):
         super().__init__(message)
 
 
+def _raise_if_file_missing(p, fldname):
+    if not os.path.exists(p):
+        raise BookImportException(f"Missing file {p} given in {fldname}")
+
+
+def _raise_if_none(p, fldname):
+    if p is None:
+        raise BookImportException(f"Must set {fldname}")
+
+
 @dataclass
 class BookDataFromUrl:
     "Data class"
@@ -104,6 +123,25 @@ class FileTextExtraction:
             msg = f"{f} is not utf-8 encoding, please convert it to utf-8 first (error: {str(e)})"
             raise BookImportException(message=msg, cause=e) from e
 
+    def get_textfile_chunks(self, filename, filestream, chunk_size=1024 * 1024):
+        """
+        Yield the content of a utf-8 text file in chunks, decoding
+        chunk_size bytes at a time.
+
+        Newlines are translated as in _get_textfile_content().
+        """
+        decoder = IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(), translate=True
+        )
+        try:
+            while data := filestream.read(chunk_size):
+                yield decoder.decode(data)
+            yield decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            f = filename
+            msg = f"{f} is not utf-8 encoding, please convert it to utf-8 first (error: {str(e)})"
+            raise BookImportException(message=msg, cause=e) from e
+
     def _get_epub_content(self, filename, filestream):
         """
         Get the content of the epub as a single string.
@@ -233,32 +271,76 @@ class Service:
         b.text = "\n\n".join(extracted_text)
         return b
 
-    def import_book(self, book, session):
-        """
-        Save the book as a dbbook, parsing and saving files as needed.
-        Returns new book created.
-        """
+    def _use_streaming(self, filename, size):
+        "True if the file should be imported with Repository.add_streamed()."
+        _, ext = os.path.splitext(filename)
+        return (ext or "").lower() == ".txt" and size >= STREAMING_IMPORT_MIN_BYTES
 
-        def _raise_if_file_missing(p, fldname):
-            if not os.path.exists(p):
-                raise BookImportException(f"Missing file {p} given in {fldname}")
+    def _remaining_size(self, stream):
+        "Bytes left to read in the stream, or 0 if it can't be determined."
+        try:
+            pos = stream.tell()
+            size = stream.seek(0, os.SEEK_END) - pos
+            stream.seek(pos)
+            return size
+        except (AttributeError, OSError, ValueError):
+            return 0
+
+    def _add_streamed(self, repo, session, book, filename, open_stream):
+        "Add the book, streaming its text from the file."
+        fte = FileTextExtraction()
+        with open_stream() as stream:
+            try:
+                chunks = fte.get_textfile_chunks(filename, stream)
+                dbbook = repo.add_streamed(book, chunks)
+            except Exception:
+                session.rollback()
+                raise
+        has_pages = session.query(Text.id).filter(Text.bk_id == dbbook.id).first()
+        if has_pages is None:
+            session.rollback()
+            raise BookImportException(f"{filename} is empty.")
+        return dbbook
 
-        def _raise_if_none(p, fldname):
-            if p is None:
-                raise BookImportException(f"Must set {fldname}")
+    def _load_text(self, book):
+        """
+        Set the book text from its text source path or stream.
 
+        Returns (filename, stream context manager factory) if the
+        text is too large to read, and should be streamed with
+        _add_streamed(), else None.
+        """
         fte = FileTextExtraction()
+        streamed = None
+
         if book.text_source_path:
             _raise_if_file_missing(book.text_source_path, "text_source_path")
             tsp = book.text_source_path
-            with open(tsp, mode="rb") as stream:
-                book.text = fte.get_file_content(tsp, stream)
+            if self._use_streaming(tsp, os.path.getsize(tsp)):
+                streamed = (tsp, functools.partial(open, tsp, "rb"))
+            else:
+                with open(tsp, mode="rb") as stream:
+                    book.text = fte.get_file_content(tsp, stream)
 
         if book.text_stream:
             _raise_if_none(book.text_stream_filename, "text_stream_filename")
-            book.text = fte.get_file_content(
-                book.text_stream_filename, book.text_stream
-            )
+            fname = book.text_stream_filename
+            if self._use_streaming(fname, self._remaining_size(book.text_stream)):
+                streamed = (fname, functools.partial(nullcontext, book.text_stream))
+            else:
+                book.text = fte.get_file_content(fname, book.text_stream)
+
+        return streamed
+
+    def import_book(self, book, session):
+        """
+        Save the book as a dbbook, parsing and saving files as needed.
+        Returns new book created.
+        """
+
+        # Large text files are streamed when the book is added, after
+        # the audio is handled.
+        streamed = self._load_text(book)
 
         if book.audio_source_path:
             _raise_if_file_missing(book.audio_source_path, "audio_source_path")
@@ -279,6 +361,9 @@ class Service:
             book.audio_filename = newname
 
         repo = Repository(session)
-        dbbook = repo.add(book)
+        if streamed is not None:
+            dbbook = self._add_streamed(repo, session, book, *streamed)
+        else:
+            dbbook = repo.add(book)
         repo.commit()
         return dbbook
@@ -42,36 +42,30 @@ class Service:
         """
         Calculate statuses and count of unique words per status.
 
-        Does a full render of a small number of pages
-        to calculate the distribution.
+        Finds the rendered terms of a small number of pages
+        to calculate the distribution, without making TextItems.
         """
 
         # DebugTimer.clear_total_summary()
         # dt = DebugTimer("get_status_distribution", display=False)
         texts = self._get_sample_texts(book)
 
-        # Getting the individual paragraphs per page, and then combining,
-        # is much faster than combining all pages into one giant page.
+        # Getting the terms per page, and then combining, is much
+        # faster than combining all pages into one giant page.
         service = RenderService(self.session)
-        mw = service.get_multiword_indexer(book.language)
-        textitems = []
-        for tx in texts:
-            textitems.extend(service.get_textitems(tx.text, book.language, mw))
+        page_texts = [tx.text for tx in texts]
+        text_ids = [tx.id for tx in texts]
+        status_text_lcs = service.get_status_text_lcs_batch(
+            page_texts, book.language, text_ids
+        )
         # # Old slower code:
         # text_sample = "\n".join([t.text for t in texts])
         # paras = get_paragraphs(text_sample, book.language) ... etc.
-        # dt.step("get_paragraphs")
-
-        textitems = [ti for ti in textitems if ti.is_word]
-        statterms = {0: [], 1: [], 2: [], 3: [], 4: [], 5: [], 98: [], 99: []}
-        for ti in textitems:
-            statterms[ti.wo_status or 0].append(ti.text_lc)
-
-        stats = {}
-        for statusval, allterms in statterms.items():
-            uniques = list(set(allterms))
-            statterms[statusval] = uniques
-            stats[statusval] = len(uniques)
+        # dt.step("get_status_text_lcs")
+
+        stats = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 98: 0, 99: 0}
+        for statusval, text_lcs in status_text_lcs.items():
+            stats[statusval] = len(text_lcs)
 
         # dt.step("compiled")
         # DebugTimer.total_summary()
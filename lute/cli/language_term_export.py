@@ -15,6 +15,7 @@ haber; 100; 1500; book1,book2; to exist; 99; hay (500), he (200), has (150) ...
 import csv
 from lute.db import db
 from lute.models.book import Book
+from lute.models.term import Term
 from lute.read.render.service import Service
 
 
@@ -50,18 +51,34 @@ def _add_term_to_dict(t, terms):
     return hsh
 
 
+def _get_book_textitems(b, multiword_indexer, batch_size=10):
+    "Yield the textitems for each page in the book, parsing pages in batches."
+    service = Service(db.session)
+    for start in range(0, len(b.texts), batch_size):
+        print(f"  page {start + 1} of {b.page_count}", end="\r")
+        page_texts = [t.text for t in b.texts[start : start + batch_size]]
+        yield from service.get_textitems_batch(
+            page_texts, b.language, multiword_indexer
+        )
+
+
+def _get_term(textitem, language):
+    "Get the textitem's Term, or a new unsaved status 0 Term."
+    if textitem.wo_id is not None:
+        return db.session.get(Term, textitem.wo_id)
+    t = Term.create_term_no_parsing(language, textitem.text)
+    t.status = 0
+    return t
+
+
 def _process_book(b, terms, multiword_indexer):
     "Process pages in book, add to output."
     print(f"Processing {b.title} ...")
-    i = 0
-    service = Service(db.session)
-    for text in b.texts:
-        i += 1
-        if i % 10 == 0:
-            print(f"  page {i} of {b.page_count}", end="\r")
-        textitems = service.get_textitems(text.text, b.language, multiword_indexer)
+    for textitems in _get_book_textitems(b, multiword_indexer):
         displayed_terms = [
-            ti.term for ti in textitems if ti.is_word and ti.term is not None
+            _get_term(ti, b.language)
+            for ti in textitems
+            if ti.is_word and ti.term is not None
         ]
         for t in displayed_terms:
             e = _add_term_to_dict(t, terms)
@@ -54,8 +54,22 @@ class AppConfig:  # pylint: disable=too-many-instance-attributes
         self.useraudiopath = os.path.join(self.datapath, "useraudio")
         self.userthemespath = os.path.join(self.datapath, "userthemes")
         self.temppath = os.path.join(self.datapath, "temp")
+        self.cachepath = os.path.join(self.datapath, "cache")
         self.dbfilename = os.path.join(self.datapath, self.dbname)
 
+        # Rendered pages kept in memory, and if pages dropped from
+        # memory are saved to the cache directory.
+        self.page_cache_size = int(config.get("PAGE_CACHE_SIZE", 50))
+        self.page_cache_disk = bool(config.get("PAGE_CACHE_DISK", False))
+
+        # Threads rendering the next page in the background, off by
+        # default for test dbs, so tests don't race the renders.
+        default_workers = 0 if self.is_test_db else 1
+        self.prerender_workers = int(config.get("PRERENDER_WORKERS", default_workers))
+        # If true, background renders also save the page's new status
+        # 0 terms, so the page's html can be cached.
+        self.prerender_save_terms = bool(config.get("PRERENDER_SAVE_TERMS", False))
+
         # Path to db backup.
         # When Lute starts up, it backs up the db
         # if migrations are going to be applied, just in case.
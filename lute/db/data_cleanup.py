@@ -53,12 +53,22 @@ def _set_texts_word_count(session, output_function):
 
     output_function(f"Fixing word counts for {len(recalc)} Texts.")
     pr = ProgressReporter(len(recalc), output_function)
+
+    # Parse the texts in batches by language.
+    by_language = {}
     for t in recalc:
-        pr.increment()
-        pt = t.book.language.get_parsed_tokens(t.text)
-        words = [w for w in pt if w.is_word]
-        t.word_count = len(words)
-        session.add(t)
+        by_language.setdefault(t.book.language, []).append(t)
+
+    batch_size = 100
+    for lang, texts in by_language.items():
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i : i + batch_size]
+            all_tokens = lang.get_parsed_tokens_batch([t.text for t in batch])
+            for t, pt in zip(batch, all_tokens):
+                pr.increment()
+                words = [w for w in pt if w.is_word]
+                t.word_count = len(words)
+                session.add(t)
     session.commit()
     output_function("Done.")
 
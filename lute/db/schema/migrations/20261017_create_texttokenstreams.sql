@@ -0,0 +1,18 @@
+-- Stored parsed tokens for each text, see lute/parse/token_stream.py.
+-- TtsKey is a hash of the parser settings and the text that was
+-- parsed, so stale tokens are replaced rather than used.
+
+BEGIN TRANSACTION;
+
+PRAGMA foreign_keys=on;
+
+CREATE TABLE texttokenstreams (
+  "TtsTxID" INTEGER PRIMARY KEY,
+  "TtsKey" VARCHAR(40) NOT NULL,
+  "TtsData" BLOB NOT NULL,
+  FOREIGN KEY("TtsTxID") REFERENCES "texts" ("TxID") ON DELETE CASCADE
+);
+
+PRAGMA foreign_keys=off;
+
+COMMIT;
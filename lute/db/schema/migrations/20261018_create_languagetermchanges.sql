@@ -0,0 +1,30 @@
+-- Counts of changes to each language's terms, kept current by the
+-- triggers in migrations_repeatable/trig_languagetermchanges.sql.
+-- In-process caches of term data (e.g. the multiword term indexers
+-- in lute/read/render/language_indexers.py, and the term statuses
+-- in lute/read/render/term_statuses.py) compare these counts to
+-- know if they're stale.
+--
+-- LtcChanges counts all changes to a language's terms (created,
+-- deleted, or text, status, or token count changed).
+-- LtcMultiwordChanges only counts changes to its multiword terms.
+--
+-- No foreign key to languages: the rows are kept if a language is
+-- deleted, so that a count never goes back to a value a cache has
+-- already seen.
+
+CREATE TABLE languagetermchanges (
+  "LtcLgID" INTEGER PRIMARY KEY,
+  "LtcMultiwordChanges" INTEGER NOT NULL DEFAULT 0,
+  "LtcChanges" INTEGER NOT NULL DEFAULT 0
+);
+
+-- Each language's counts start at a random value, so that the
+-- counts of different databases (e.g. a restored backup) don't match
+-- the counts that saved caches were built for.  Languages created
+-- later get their row when they're created, see
+-- trig_languagetermchanges.sql.
+
+INSERT INTO languagetermchanges (LtcLgID, LtcMultiwordChanges, LtcChanges)
+SELECT LgID, abs(random() % 1000000000), abs(random() % 1000000000)
+FROM languages;
@@ -0,0 +1,50 @@
+-- Inverted index of the lowercase tokens in each sentence, for
+-- finding term references (see lute/term/model.py
+-- ReferencesRepository) without scanning every sentence.
+-- Rows are added when sentences are saved, see
+-- lute/models/book.py.  Whitespace and paragraph marker tokens
+-- aren't indexed.
+--
+-- Existing sentences are indexed by splitting their zws-joined
+-- text.  SeTextLC is '*' if LOWER(SeText) gives the same result as
+-- the parser (or NULL for old sentences not yet cleaned up).
+
+BEGIN TRANSACTION;
+
+PRAGMA foreign_keys=on;
+
+CREATE TABLE sentencetokens (
+  "StTokenLC" VARCHAR(250) NOT NULL,
+  "StSeID" INTEGER NOT NULL,
+  PRIMARY KEY ("StTokenLC", "StSeID"),
+  FOREIGN KEY("StSeID") REFERENCES "sentences" ("SeID") ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX "StSeID" ON "sentencetokens" ("StSeID");
+
+WITH RECURSIVE split(seid, tok, rest) AS (
+  SELECT
+    SeID,
+    '',
+    substr(
+      CASE WHEN SeTextLC = '*' OR SeTextLC IS NULL THEN LOWER(SeText)
+      ELSE SeTextLC END,
+      2
+    )
+  FROM sentences
+  WHERE SeText IS NOT NULL
+  UNION ALL
+  SELECT
+    seid,
+    substr(rest, 1, instr(rest, char(8203)) - 1),
+    substr(rest, instr(rest, char(8203)) + 1)
+  FROM split
+  WHERE instr(rest, char(8203)) > 0
+)
+INSERT OR IGNORE INTO sentencetokens ("StTokenLC", "StSeID")
+SELECT tok, seid FROM split
+WHERE trim(tok) <> '' AND tok <> '¶';
+
+PRAGMA foreign_keys=off;
+
+COMMIT;
@@ -0,0 +1,93 @@
+-- Counts start at a random value, see
+-- migrations/20261018_create_languagetermchanges.sql.
+--
+-- LtcChanges counts every change to a language's terms.
+-- LtcMultiwordChanges only counts changes to its multiword terms.
+
+DROP TRIGGER IF EXISTS trig_words_after_insert_count_multiword_changes;
+DROP TRIGGER IF EXISTS trig_words_after_update_count_multiword_changes;
+DROP TRIGGER IF EXISTS trig_words_after_delete_count_multiword_changes;
+
+
+DROP TRIGGER IF EXISTS trig_languages_after_insert_add_term_changes;
+
+CREATE TRIGGER trig_languages_after_insert_add_term_changes
+-- created by db/schema/migrations_repeatable/trig_languagetermchanges.sql
+-- The counts are created with the language, so that caches built
+-- before its first term change see the same counts as after.
+AFTER INSERT ON languages
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO languagetermchanges
+      (LtcLgID, LtcMultiwordChanges, LtcChanges)
+    VALUES
+      (new.LgID, abs(random() % 1000000000), abs(random() % 1000000000));
+END;
+
+
+DROP TRIGGER IF EXISTS trig_words_after_insert_count_changes;
+
+CREATE TRIGGER trig_words_after_insert_count_changes
+-- created by db/schema/migrations_repeatable/trig_languagetermchanges.sql
+AFTER INSERT ON words
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO languagetermchanges
+      (LtcLgID, LtcMultiwordChanges, LtcChanges)
+    VALUES
+      (new.WoLgID, abs(random() % 1000000000), abs(random() % 1000000000));
+    UPDATE languagetermchanges
+    SET LtcChanges = LtcChanges + 1,
+    LtcMultiwordChanges = LtcMultiwordChanges +
+      CASE WHEN new.WoTokenCount > 1 THEN 1 ELSE 0 END
+    WHERE LtcLgID = new.WoLgID;
+END;
+
+
+DROP TRIGGER IF EXISTS trig_words_after_update_count_changes;
+
+CREATE TRIGGER trig_words_after_update_count_changes
+-- created by db/schema/migrations_repeatable/trig_languagetermchanges.sql
+AFTER UPDATE OF WoTextLC, WoStatus, WoTokenCount, WoLgID ON words
+FOR EACH ROW
+WHEN old.WoTextLC IS NOT new.WoTextLC
+  or old.WoStatus IS NOT new.WoStatus
+  or old.WoTokenCount IS NOT new.WoTokenCount
+  or old.WoLgID IS NOT new.WoLgID
+BEGIN
+    INSERT OR IGNORE INTO languagetermchanges
+      (LtcLgID, LtcMultiwordChanges, LtcChanges)
+    VALUES
+      (old.WoLgID, abs(random() % 1000000000), abs(random() % 1000000000)),
+      (new.WoLgID, abs(random() % 1000000000), abs(random() % 1000000000));
+    UPDATE languagetermchanges
+    SET LtcChanges = LtcChanges + 1,
+    LtcMultiwordChanges = LtcMultiwordChanges +
+      CASE WHEN (old.WoTokenCount > 1 or new.WoTokenCount > 1)
+        AND (
+          old.WoTextLC IS NOT new.WoTextLC
+          or old.WoTokenCount IS NOT new.WoTokenCount
+          or old.WoLgID IS NOT new.WoLgID
+        )
+      THEN 1 ELSE 0 END
+    WHERE LtcLgID in (old.WoLgID, new.WoLgID);
+END;
+
+
+DROP TRIGGER IF EXISTS trig_words_after_delete_count_changes;
+
+CREATE TRIGGER trig_words_after_delete_count_changes
+-- created by db/schema/migrations_repeatable/trig_languagetermchanges.sql
+AFTER DELETE ON words
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO languagetermchanges
+      (LtcLgID, LtcMultiwordChanges, LtcChanges)
+    VALUES
+      (old.WoLgID, abs(random() % 1000000000), abs(random() % 1000000000));
+    UPDATE languagetermchanges
+    SET LtcChanges = LtcChanges + 1,
+    LtcMultiwordChanges = LtcMultiwordChanges +
+      CASE WHEN old.WoTokenCount > 1 THEN 1 ELSE 0 END
+    WHERE LtcLgID = old.WoLgID;
+END;
@@ -4,6 +4,7 @@ Book entity.
 
 import sqlite3
 from contextlib import closing
+from sqlalchemy import event, text as sqltext
 from lute.db import db
 
 booktags = db.Table(
@@ -168,9 +169,13 @@ class Text(db.Model):
         cascade="all, delete-orphan",
     )
 
-    def __init__(self, book, text, order=1):
+    def __init__(self, book, text, order=1, parsed_tokens=None):
+        """
+        parsed_tokens: optional tokens for the text, if it has already
+        been parsed (e.g. when splitting a new book into pages).
+        """
         self.book = book
-        self.text = text
+        self._set_text(text, parsed_tokens)
         self.order = order
         self.sentences = []
 
@@ -190,10 +195,15 @@ class Text(db.Model):
 
     @text.setter
     def text(self, s):
+        self._set_text(s)
+
+    def _set_text(self, s, toks=None):
+        "Set the text, and the word count and sentences from its tokens."
         self._text = s
         if s.strip() == "":
             return
-        toks = self._get_parsed_tokens()
+        if toks is None:
+            toks = self._get_parsed_tokens()
         wordtoks = [t for t in toks if t.is_word]
         self.word_count = len(wordtoks)
         if self._read_date is not None:
@@ -348,9 +358,30 @@ class Sentence(db.Model):
         sentence.order = senumber
         sentence.text_content = _sentence_string([t.token for t in tokens])
         sentence.set_lowercase_text(parser)
+        # Saved to the sentencetokens index when the sentence is inserted.
+        sentence.token_lcs = {
+            parser.get_lowercase(t.token)
+            for t in tokens
+            if t.token.strip() != "" and t.token != "¶"
+        }
         return sentence
 
 
+@event.listens_for(Sentence, "after_insert")
+def _index_sentence_tokens(mapper, connection, target):
+    "Add the new sentence's tokens to the sentencetokens index."
+    # pylint: disable=unused-argument
+    token_lcs = getattr(target, "token_lcs", None)
+    if not token_lcs:
+        return
+    sql = """
+        INSERT OR IGNORE INTO sentencetokens (StTokenLC, StSeID)
+        VALUES (:token_lc, :seid)
+    """
+    params = [{"token_lc": lc, "seid": target.id} for lc in token_lcs]
+    connection.execute(sqltext(sql), params)
+
+
 class TextBookmark(db.Model):
     """
     Bookmarks for a given Book page
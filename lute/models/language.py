@@ -4,7 +4,8 @@ Language entity.
 
 import re
 from lute.db import db
-from lute.parse.registry import get_parser, is_supported
+from lute.parse.base import ParseContext
+from lute.parse.registry import get_language_parser, is_supported
 
 
 class LanguageDictionary(db.Model):
@@ -116,7 +117,7 @@ class Language(
     @property
     def parser(self):
         "Note: this throws if the parser is not supported!!!"
-        return get_parser(self.parser_type)
+        return get_language_parser(self.id, self.parser_type)
 
     @property
     def is_supported(self):
@@ -124,7 +125,15 @@ class Language(
         return is_supported(self.parser_type)
 
     def get_parsed_tokens(self, s):
-        return self.parser.get_parsed_tokens(s, self)
+        "Get the ParsedTokens for s, numbered in a new ParseContext."
+        return ParseContext().add_all(self.parser.get_parsed_tokens(s, self))
+
+    def get_parsed_tokens_batch(self, strings):
+        "Get the ParsedTokens for each string, each numbered separately."
+        return [
+            ParseContext().add_all(tokens)
+            for tokens in self.parser.get_parsed_tokens_batch(strings, self)
+        ]
 
     def get_lowercase(self, s) -> str:
         return self.parser.get_lowercase(s)
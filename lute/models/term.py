@@ -162,13 +162,28 @@ class Term(
         when new terms are created from an already-parsed
         and already-tokenized page of text.
         """
-        t = Term()
-        t.language = language
-        t._text = text  # pylint: disable=protected-access
-        t.text_lc = language.get_lowercase(text)
-        t.romanization = language.parser.get_reading(text)
-        t._calc_token_count()  # pylint: disable=protected-access
-        return t
+        return Term.create_terms_no_parsing(language, [text])[0]
+
+    @staticmethod
+    def create_terms_no_parsing(language, texts):
+        """
+        Create terms for all of the texts, without reparsing.
+
+        The readings for all of the texts are fetched from the
+        parser in a single call.
+        """
+        parser = language.parser
+        readings = parser.get_readings(texts)
+        ret = []
+        for text, reading in zip(texts, readings):
+            t = Term()
+            t.language = language
+            t._text = text  # pylint: disable=protected-access
+            t.text_lc = parser.get_lowercase(text)
+            t.romanization = reading
+            t._calc_token_count()  # pylint: disable=protected-access
+            ret.append(t)
+        return ret
 
     def __repr__(self):
         return f"<Term {self.id} '{self.text}'>"
@@ -10,38 +10,24 @@ class ParsedToken:
     """
     A single parsed token from an input text.
 
-    As tokens are created, the class counters
-    (starting with cls_) are assigned to the ParsedToken
-    and then incremented appropriately.
+    The order and sentence_number are assigned by a ParseContext
+    after parsing; a new token has zeroes for both.
     """
 
-    # Class counters.
-    cls_sentence_number = 0
-    cls_order = 0
-
-    @classmethod
-    def reset_counters(cls):
-        """
-        Reset all the counters.
-        """
-        ParsedToken.cls_sentence_number = 0
-        ParsedToken.cls_order = 0
+    __slots__ = (
+        "token",
+        "is_word",
+        "is_end_of_sentence",
+        "order",
+        "sentence_number",
+    )
 
     def __init__(self, token: str, is_word: bool, is_end_of_sentence: bool = False):
         self.token = token
         self.is_word = is_word
         self.is_end_of_sentence = is_end_of_sentence
-
-        ParsedToken.cls_order += 1
-        self.order = ParsedToken.cls_order
-
-        self.sentence_number = ParsedToken.cls_sentence_number
-
-        # Increment counters after the TextToken has been
-        # completed, so that it belongs to the correct
-        # sentence.
-        if self.is_end_of_sentence:
-            ParsedToken.cls_sentence_number += 1
+        self.order = 0
+        self.sentence_number = 0
 
     @property
     def is_end_of_paragraph(self):
@@ -57,6 +43,37 @@ class ParsedToken:
         return f'<"{self.token}" ({attrs})>'
 
 
+class ParseContext:
+    """
+    Numbering state for a single parse.
+
+    Each parse gets its own context, so concurrent parses can't
+    affect each other's numbering.
+    """
+
+    def __init__(self):
+        self.order = 0
+        self.sentence_number = 0
+
+    def add(self, token: ParsedToken):
+        "Assign the next order and sentence number to the token."
+        self.order += 1
+        token.order = self.order
+        token.sentence_number = self.sentence_number
+
+        # Increment the sentence number after the token has been
+        # completed, so that it belongs to the correct sentence.
+        if token.is_end_of_sentence:
+            self.sentence_number += 1
+        return token
+
+    def add_all(self, tokens: List[ParsedToken]) -> List[ParsedToken]:
+        "Number all of the tokens, returning the tokens."
+        for t in tokens:
+            self.add(t)
+        return tokens
+
+
 class AbstractParser(ABC):
     """
     Abstract parser, inherited from by all parsers.
@@ -93,6 +110,36 @@ class AbstractParser(ABC):
         """
         return True
 
+    @classmethod
+    def environment_key(cls):
+        """
+        Hashable value for any external state that the parser instance
+        depends on.
+
+        Parser instances are re-used (see
+        lute.parse.registry.get_language_parser()), and a new one is
+        created if this value changes.
+        """
+        return None
+
+    def get_parse_key(self, language):
+        """
+        Hashable value of everything that determines the tokens for a
+        text, other than the text itself.
+
+        Stored tokens (see lute.parse.token_stream) are only re-used if
+        this hasn't changed.  Parsers that use other data (e.g. a user
+        dictionary file) should include it.
+        """
+        return (
+            self.name(),
+            language.character_substitutions,
+            language.regexp_split_sentences,
+            language.exceptions_split_sentences,
+            language.word_characters,
+            self.environment_key(),
+        )
+
     @classmethod
     @abstractmethod
     def name(cls):
@@ -106,6 +153,16 @@ class AbstractParser(ABC):
         Get an array of ParsedTokens from the input text for the given language.
         """
 
+    def get_parsed_tokens_batch(self, texts: List[str], language) -> List[List]:
+        """
+        Get an array of ParsedToken arrays, one for each of the input texts.
+
+        The default implementation parses each text in turn.  Parsers
+        with a high per-call cost (e.g. loading a model or dictionary)
+        can override this to handle all of the texts at once.
+        """
+        return [self.get_parsed_tokens(t, language) for t in texts]
+
     def get_reading(self, text: str):  # pylint: disable=unused-argument
         """
         Get the pronunciation for the given text.  For most
@@ -113,6 +170,15 @@ class AbstractParser(ABC):
         """
         return None
 
+    def get_readings(self, texts: List[str]) -> List:
+        """
+        Get the pronunciations for all of the texts.
+
+        Parsers with a high per-call cost for readings should
+        override this to handle all of the texts at once.
+        """
+        return [self.get_reading(t) for t in texts]
+
     def get_lowercase(self, text: str):
         """
         Return the lowcase text.
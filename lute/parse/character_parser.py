@@ -7,10 +7,12 @@ perform the actual parsing.
 Includes classes:
 
 - ClassicalChineseParser
+- CharacterClassifier
 
 """
 
 import re
+import functools
 from typing import List
 from lute.parse.base import ParsedToken, AbstractParser
 
@@ -45,14 +47,45 @@ class ClassicalChineseParser(AbstractParser):
         text = text.replace("\n", "¶")
         text = text.strip()
 
-        tokens = []
-        pattern = f"[{language.word_characters}]"
-        for char in text:
-            is_word_char = re.match(pattern, char) is not None
-            is_end_of_sentence = char in language.regexp_split_sentences
-            if char == "¶":
-                is_end_of_sentence = True
-            p = ParsedToken(char, is_word_char, is_end_of_sentence)
-            tokens.append(p)
-
-        return tokens
+        flags = CharacterClassifier.for_language(language).get_flags(text)
+        return [ParsedToken(char, *flags[char]) for char in text]
+
+
+class CharacterClassifier:
+    """
+    Word and end-of-sentence lookup table for a language's settings.
+
+    Each distinct character is only checked against the word
+    characters once, and the result is stored in the table, so long
+    texts are classified with a dict lookup per character.
+    """
+
+    def __init__(self, word_characters, regexp_split_sentences):
+        self.word_re = re.compile(f"[{word_characters}]")
+        self.sentence_ends = set(regexp_split_sentences)
+        self.sentence_ends.add("¶")
+        self.flags = {}
+
+    @staticmethod
+    def for_language(lang):
+        "Get the (cached) classifier for the language."
+        return CharacterClassifier._get_cached(
+            lang.word_characters, lang.regexp_split_sentences
+        )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _get_cached(word_characters, regexp_split_sentences):
+        return CharacterClassifier(word_characters, regexp_split_sentences)
+
+    def get_flags(self, text):
+        """
+        Return the lookup table, after adding any characters in text
+        that aren't in it yet.  The table maps each character to
+        (is_word, is_end_of_sentence).
+        """
+        flags = self.flags
+        for char in set(text).difference(flags):
+            is_word = self.word_re.match(char) is not None
+            flags[char] = (is_word, char in self.sentence_ends)
+        return flags
@@ -6,14 +6,17 @@ MeCab to do parsing.
 
 Includes classes:
 
+- MeCabPool
 - JapaneseParser
 
 """
 
+from contextlib import contextmanager
 from io import StringIO
 import sys
 import os
 import re
+import threading
 from typing import List
 from natto import MeCab
 import jaconv
@@ -21,6 +24,54 @@ from lute.parse.base import ParsedToken, AbstractParser
 from lute.settings.current import current_settings
 
 
+class MeCabPool:
+    """
+    Thread-safe pool of natto MeCab taggers, grouped by flags.
+
+    Creating a MeCab instance loads the mecab library and its
+    dictionary, which is slow compared to a parse, so taggers are
+    kept and re-used.  A tagger isn't safe to use from multiple
+    threads at once, so each caller checks out its own tagger, and
+    returns it to the pool when done.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._generation = 0
+
+    @contextmanager
+    def tagger(self, flags=None):
+        "Yield a MeCab tagger for the flags, returning it to the pool after."
+        with self._lock:
+            generation = self._generation
+            idle = self._idle.get(flags, [])
+            nm = idle.pop() if idle else None
+        if nm is None:
+            nm = MeCab(flags)
+
+        # If the caller raises, the tagger isn't returned to the pool,
+        # in case the failure left it in a bad state.
+        yield nm
+
+        with self._lock:
+            # Taggers created before a clear() are dropped, as they may
+            # be using an old mecab library.
+            if generation == self._generation:
+                self._idle.setdefault(flags, []).append(nm)
+
+    def idle_count(self, flags=None):
+        "Number of taggers available for the flags."
+        with self._lock:
+            return len(self._idle.get(flags, []))
+
+    def clear(self):
+        "Drop all pooled taggers, e.g. if the mecab path changes."
+        with self._lock:
+            self._idle = {}
+            self._generation += 1
+
+
 class JapaneseParser(AbstractParser):
     """
     Japanese parser.
@@ -36,6 +87,16 @@ class JapaneseParser(AbstractParser):
     _is_supported = None
     _old_mecab_path = None
 
+    # Shared by all parser instances.
+    tagger_pool = MeCabPool()
+
+    # Flags: ref https://github.com/buruzaemon/natto-py:
+    #    -F = node format
+    #    -U = unknown format
+    #    -E = EOP format
+    _parse_flags = r"-F %m\t%t\t%h\n -U %m\t%t\t%h\n -E EOP\t3\t7\n"
+    _reading_flags = r"-O yomi"
+
     @classmethod
     def is_supported(cls):
         """
@@ -70,10 +131,16 @@ class JapaneseParser(AbstractParser):
         finally:
             sys.stderr = sys.__stderr__
 
+        JapaneseParser.tagger_pool.clear()
         JapaneseParser._old_mecab_path = mecab_path
         JapaneseParser._is_supported = mecab_works
         return mecab_works
 
+    @classmethod
+    def environment_key(cls):
+        "A new parser is needed if the mecab path changes."
+        return (current_settings.get("mecab_path", "") or "").strip()
+
     @classmethod
     def name(cls):
         return "Japanese"
@@ -86,11 +153,7 @@ class JapaneseParser(AbstractParser):
 
         # If the string contains a "\n", MeCab appears to silently
         # remove it.  Splitting it works (ref test_JapaneseParser).
-        # Flags: ref https://github.com/buruzaemon/natto-py:
-        #    -F = node format
-        #    -U = unknown format
-        #    -E = EOP format
-        with MeCab(r"-F %m\t%t\t%h\n -U %m\t%t\t%h\n -E EOP\t3\t7\n") as nm:
+        with JapaneseParser.tagger_pool.tagger(self._parse_flags) as nm:
             for para in text.split("\n"):
                 for n in nm.parse(para, as_nodes=True):
                     lines.append(n.feature)
@@ -140,19 +203,33 @@ class JapaneseParser(AbstractParser):
         Returns None if the text is all hiragana, or the pronunciation
         doesn't add value (same as text).
         """
-        if self._string_is_hiragana(text):
-            return None
+        return self.get_readings([text])[0]
 
+    def get_readings(self, texts: List[str]):
+        """
+        Get the pronunciations for all of the texts, using a single tagger.
+        """
         jp_reading_setting = current_settings.get("japanese_reading", "").strip()
         if jp_reading_setting == "":
             # Don't set reading if nothing specified.
-            return None
+            return [None] * len(texts)
+
+        need_readings = [t for t in texts if not self._string_is_hiragana(t)]
+        if len(need_readings) == 0:
+            return [None] * len(texts)
+
+        readings = {}
+        with JapaneseParser.tagger_pool.tagger(self._reading_flags) as nm:
+            for t in need_readings:
+                if t not in readings:
+                    readings[t] = self._get_reading(nm, t, jp_reading_setting)
+        return [readings.get(t) for t in texts]
 
-        flags = r"-O yomi"
+    def _get_reading(self, nm, text, jp_reading_setting):
+        "Get the reading for the text using the MeCab tagger nm."
         readings = []
-        with MeCab(flags) as nm:
-            for n in nm.parse(text, as_nodes=True):
-                readings.append(n.feature)
+        for n in nm.parse(text, as_nodes=True):
+            readings.append(n.feature)
         readings = [r.strip() for r in readings if r is not None and r.strip() != ""]
 
         ret = "".join(readings).strip()
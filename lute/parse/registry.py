@@ -6,6 +6,7 @@ List of available parsers.
 
 from importlib.metadata import entry_points
 from sys import version_info
+import time
 
 from lute.parse.base import AbstractParser
 from lute.parse.space_delimited_parser import SpaceDelimitedParser, TurkishParser
@@ -20,6 +21,13 @@ __LUTE_PARSERS__ = {
     "classicalchinese": ClassicalChineseParser,
 }
 
+# Parser instances re-used by get_language_parser(), by
+# (language id, parser name, parser class, parser environment).
+__PARSER_INSTANCES__ = {}
+
+# Counters for the instance cache, see parser_cache_info().
+__PARSER_CACHE_STATS__ = {"hits": 0, "misses": 0, "create_seconds": 0.0}
+
 
 def init_parser_plugins():
     """
@@ -46,6 +54,8 @@ def init_parser_plugins():
     if custom_parser_eps is None:
         return
 
+    reset_parser_cache()
+
     for custom_parser_ep in custom_parser_eps:
         name = custom_parser_ep.name
         klass = custom_parser_ep.load()
@@ -65,6 +75,57 @@ def get_parser(parser_name) -> AbstractParser:
     return pclass()
 
 
+def get_language_parser(language_id, parser_name) -> AbstractParser:
+    """
+    Return the parser for the language, re-using the instance if possible.
+
+    A new instance is only created (and checked with is_supported())
+    the first time that a language uses a parser, or if the parser
+    class or its environment_key() changes, e.g. when the mecab path
+    setting is changed.
+    """
+    pclass = __LUTE_PARSERS__.get(parser_name)
+    env_key = pclass.environment_key() if pclass is not None else None
+    key = (language_id, parser_name, pclass, env_key)
+    ret = __PARSER_INSTANCES__.get(key)
+    if ret is not None:
+        __PARSER_CACHE_STATS__["hits"] += 1
+        return ret
+
+    start = time.perf_counter()
+    ret = get_parser(parser_name)
+    __PARSER_CACHE_STATS__["create_seconds"] += time.perf_counter() - start
+    __PARSER_CACHE_STATS__["misses"] += 1
+
+    # Drop any stale instances for the language.
+    stale = [k for k in __PARSER_INSTANCES__ if k[0] == language_id]
+    for k in stale:
+        __PARSER_INSTANCES__.pop(k, None)
+    __PARSER_INSTANCES__[key] = ret
+    return ret
+
+
+def reset_parser_cache():
+    "Discard all cached parser instances and reset the cache stats."
+    __PARSER_INSTANCES__.clear()
+    __PARSER_CACHE_STATS__.update({"hits": 0, "misses": 0, "create_seconds": 0.0})
+
+
+def parser_cache_info():
+    """
+    Return stats for the parser instance cache, similar to
+    functools.lru_cache's cache_info().
+
+    "saved_seconds" estimates the time saved by re-using instances,
+    using the average time taken to create a new one.
+    """
+    ret = dict(__PARSER_CACHE_STATS__)
+    ret["size"] = len(__PARSER_INSTANCES__)
+    avg = ret["create_seconds"] / ret["misses"] if ret["misses"] > 0 else 0
+    ret["saved_seconds"] = avg * ret["hits"]
+    return ret
+
+
 def is_supported(parser_name) -> bool:
     "Return True if the specified parser is present and supported."
     if parser_name not in __LUTE_PARSERS__:
@@ -7,10 +7,13 @@ perform the actual parsing.
 Includes classes:
 
 - SpaceDelimitedParser
+- LanguageTokenizer
 - TurkishParser
 """
 
 import functools
+import json
+import os
 import re
 import sys
 import unicodedata
@@ -20,6 +23,77 @@ from typing import List
 from lute.parse.base import ParsedToken, AbstractParser
 
 
+# Unicode categories reference: https://www.compart.com/en/unicode/category
+WORD_CHARACTER_CATEGORIES = ["Cf", "Ll", "Lm", "Lo", "Lt", "Lu", "Mc", "Mn", "Sk"]
+
+# Prebuilt codepoint ranges for the default word characters, by
+# unicodedata version.  Regenerate with "inv build-word-chars".
+WORD_CHARACTER_RANGES_FILE = os.path.join(
+    os.path.dirname(__file__), "default_word_character_ranges.json"
+)
+
+
+def find_word_character_ranges():
+    """
+    Return [[start, end], ...] codepoint ranges of the characters in
+    WORD_CHARACTER_CATEGORIES.
+
+    This checks every codepoint, and takes a few seconds.
+    """
+    categories = set(WORD_CHARACTER_CATEGORIES)
+    ranges = []
+    current = None
+    for i in range(1, sys.maxunicode):
+        if unicodedata.category(chr(i)) not in categories:
+            if current is not None:
+                ranges.append(current)
+                current = None
+        elif current is None:
+            # Starting a new range.
+            current = [i, i]
+        else:
+            # Extending existing range.
+            current[1] = i
+
+    if current is not None:
+        ranges.append(current)
+    return ranges
+
+
+def _load_word_character_ranges():
+    "Ranges from WORD_CHARACTER_RANGES_FILE for this python, or None."
+    try:
+        with open(WORD_CHARACTER_RANGES_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("categories") != WORD_CHARACTER_CATEGORIES:
+        return None
+    packed = data.get("ranges", {}).get(unicodedata.unidata_version)
+    if packed is None:
+        return None
+    return [packed[i : i + 2] for i in range(0, len(packed), 2)]
+
+
+def write_word_character_ranges_file():
+    """
+    Add the ranges for this python's unicodedata version to
+    WORD_CHARACTER_RANGES_FILE.  Ranges for other versions are kept.
+    """
+    data = {"categories": WORD_CHARACTER_CATEGORIES, "ranges": {}}
+    if os.path.exists(WORD_CHARACTER_RANGES_FILE):
+        with open(WORD_CHARACTER_RANGES_FILE, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        if old.get("categories") == WORD_CHARACTER_CATEGORIES:
+            data["ranges"] = old["ranges"]
+
+    packed = [n for r in find_word_character_ranges() for n in r]
+    data["ranges"][unicodedata.unidata_version] = packed
+    with open(WORD_CHARACTER_RANGES_FILE, "w", encoding="utf-8") as f:
+        json.dump(data, f, sort_keys=True)
+        f.write("\n")
+
+
 class SpaceDelimitedParser(AbstractParser):
     """
     A general parser for space-delimited languages,
@@ -39,48 +113,33 @@ class SpaceDelimitedParser(AbstractParser):
     @staticmethod
     @functools.lru_cache
     def get_default_word_characters() -> str:
-        """Return default value for lang.word_characters."""
+        """
+        Return default value for lang.word_characters.
 
-        # Unicode categories reference: https://www.compart.com/en/unicode/category
-        categories = set(["Cf", "Ll", "Lm", "Lo", "Lt", "Lu", "Mc", "Mn", "Sk"])
+        The codepoint ranges are loaded from the prebuilt ranges file
+        if it has them for this python's unicodedata version;
+        otherwise they're found by checking every codepoint.
+        """
 
         # There are more than 130,000 characters across all these categories.
         # Expressing this a single character at a time, mostly using unicode
         # escape sequences like \u1234 or \U12345678, would require 1 megabyte.
         # Converting to ranges like \u1234-\u1256 requires only 10K.
-        ranges = []
-        current = None
-
-        def add_current_to_ranges():
-            def ucode(n):
-                "Unicode point for integer."
-                fstring = r"\u{:04x}" if n < 0x10000 else r"\U{:08x}"
-                return (fstring).format(n)
-
-            start_code = ucode(current[0])
-            if current[0] == current[1]:
-                range_string = start_code
-            else:
-                endcode = ucode(current[1])
-                range_string = f"{start_code}-{endcode}"
-            ranges.append(range_string)
-
-        for i in range(1, sys.maxunicode):
-            if unicodedata.category(chr(i)) not in categories:
-                if current is not None:
-                    add_current_to_ranges()
-                    current = None
-            elif current is None:
-                # Starting a new range.
-                current = [i, i]
-            else:
-                # Extending existing range.
-                current[1] = i
-
-        if current is not None:
-            add_current_to_ranges()
-
-        return "".join(ranges)
+        ranges = _load_word_character_ranges()
+        if ranges is None:
+            ranges = find_word_character_ranges()
+
+        def ucode(n):
+            "Unicode point for integer."
+            fstring = r"\u{:04x}" if n < 0x10000 else r"\U{:08x}"
+            return (fstring).format(n)
+
+        def range_string(start, end):
+            if start == end:
+                return ucode(start)
+            return f"{ucode(start)}-{ucode(end)}"
+
+        return "".join([range_string(start, end) for start, end in ranges])
 
     @staticmethod
     @functools.lru_cache
@@ -157,6 +216,11 @@ class SpaceDelimitedParser(AbstractParser):
             ]
         )
 
+    @staticmethod
+    def get_tokenizer(lang) -> "LanguageTokenizer":
+        "Return the compiled tokenizer for the language's current settings."
+        return LanguageTokenizer.for_language(lang)
+
     def get_parsed_tokens(self, text: str, language) -> List[ParsedToken]:
         "Return parsed tokens."
 
@@ -184,23 +248,14 @@ class SpaceDelimitedParser(AbstractParser):
         """
         Returns ParsedToken array for given language.
         """
-        replacements = lang.character_substitutions.split("|")
-        for replacement in replacements:
-            fromto = replacement.strip().split("=")
-            if len(fromto) >= 2:
-                rfrom = fromto[0].strip()
-                rto = fromto[1].strip()
-                text = text.replace(rfrom, rto)
-
-        text = text.replace("\r\n", "\n")
-        text = text.replace("{", "[")
-        text = text.replace("}", "]")
+        tokenizer = self.get_tokenizer(lang)
+        text = tokenizer.substitute(text)
 
         tokens = []
         paras = text.split("\n")
         pcount = len(paras)
         for i, para in enumerate(paras):
-            self.parse_para(para, lang, tokens)
+            tokenizer.parse_para(para, tokens)
             if i != (pcount - 1):
                 tokens.append(ParsedToken("¶", False, True))
 
@@ -210,17 +265,124 @@ class SpaceDelimitedParser(AbstractParser):
         """
         Parse a string, appending the tokens to the list of tokens.
         """
-        termchar = lang.word_characters.strip()
+        self.get_tokenizer(lang).parse_para(text, tokens)
+
+
+class LanguageTokenizer:
+    """
+    The compiled form of a Language's parsing settings.
+
+    Building the word and end-of-sentence regexes and splitting
+    the character substitutions is done once per distinct set of
+    settings, rather than on every parse.  Instances are cached by
+    settings_key(), so editing any of the language's parsing
+    settings results in a new tokenizer.
+    """
+
+    # Replacements always done after the language's substitutions.
+    _standard_substitutions = [("\r\n", "\n"), ("{", "["), ("}", "]")]
+
+    def __init__(
+        self,
+        character_substitutions,
+        regexp_split_sentences,
+        exceptions_split_sentences,
+        word_characters,
+    ):
+        self._init_substitutions(character_substitutions)
+
+        termchar = word_characters.strip()
         if not termchar:
             termchar = SpaceDelimitedParser.get_default_word_characters()
-
-        splitex = lang.exceptions_split_sentences.replace(".", "\\.")
-        pattern = rf"({splitex}|[{termchar}]*)"
+        splitex = exceptions_split_sentences.replace(".", "\\.")
+        pattern = rf"({splitex}|[{termchar}]+)"
         if splitex.strip() == "":
-            pattern = rf"([{termchar}]*)"
+            pattern = rf"([{termchar}]+)"
+        self.word_re = re.compile(pattern, flags=re.IGNORECASE)
+
+        splitchar = regexp_split_sentences.strip()
+        if not splitchar:
+            splitchar = SpaceDelimitedParser.get_default_regexp_split_sentences()
+        self.end_of_sentence_re = re.compile(
+            f"[{re.escape(splitchar)}]", flags=re.IGNORECASE
+        )
+
+    @staticmethod
+    def settings_key(lang):
+        "Hashable key of all the language settings used during parsing."
+        return (
+            lang.character_substitutions,
+            lang.regexp_split_sentences,
+            lang.exceptions_split_sentences,
+            lang.word_characters,
+        )
+
+    @staticmethod
+    def for_language(lang):
+        "Get the (cached) tokenizer for the language."
+        return LanguageTokenizer._get_cached(*LanguageTokenizer.settings_key(lang))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _get_cached(*settings):
+        return LanguageTokenizer(*settings)
 
-        m = self.preg_match_capture(pattern, text)
-        wordtoks = list(filter(lambda t: t[0] != "", m))
+    def _init_substitutions(self, character_substitutions):
+        """
+        Build the substitution table.
+
+        Single-character substitutions are done in one pass with
+        str.translate(), and multi-character substitutions are applied
+        in order afterwards.  This gives the same result as applying
+        every substitution in order, provided that no substitution
+        creates text that another substitution would replace; if that
+        isn't the case, all substitutions are applied in order.
+        """
+        pairs = []
+        for replacement in character_substitutions.split("|"):
+            fromto = replacement.strip().split("=")
+            if len(fromto) >= 2:
+                rfrom = fromto[0].strip()
+                rto = fromto[1].strip()
+                if rfrom != "":
+                    pairs.append((rfrom, rto))
+
+        user_from_chars = set("".join(f for f, _ in pairs))
+        user_to_chars = set("".join(t for _, t in pairs))
+        single_chars = {f for f, _ in pairs if len(f) == 1}
+        multi_chars = set("".join(f for f, _ in pairs if len(f) > 1))
+        can_reorder = (
+            not user_to_chars & (user_from_chars | set("\r\n{}"))
+            and not user_from_chars & set("\r\n{}[]")
+            and not single_chars & multi_chars
+        )
+
+        if can_reorder:
+            char_map = {"{": "[", "}": "]"}
+            for f, t in pairs:
+                if len(f) == 1:
+                    # The first substitution for a character is the one used.
+                    char_map.setdefault(f, t)
+            self.char_table = str.maketrans(char_map)
+            self.ordered_substitutions = [(f, t) for f, t in pairs if len(f) > 1]
+            self.ordered_substitutions.append(("\r\n", "\n"))
+        else:
+            self.char_table = None
+            self.ordered_substitutions = pairs + self._standard_substitutions
+
+    def substitute(self, text):
+        "Apply the character substitutions to the text."
+        if self.char_table is not None:
+            text = text.translate(self.char_table)
+        for rfrom, rto in self.ordered_substitutions:
+            text = text.replace(rfrom, rto)
+        return text
+
+    def parse_para(self, text: str, tokens: List[ParsedToken]):
+        """
+        Parse a string, appending the tokens to the list of tokens.
+        """
+        eos_search = self.end_of_sentence_re.search
 
         def add_non_words(s):
             """
@@ -228,32 +390,23 @@ class SpaceDelimitedParser(AbstractParser):
             matches any of the split_sentence values, mark it as an
             end-of-sentence.
             """
-            if not s:
-                return
-            splitchar = lang.regexp_split_sentences.strip()
-            if not splitchar:
-                splitchar = SpaceDelimitedParser.get_default_regexp_split_sentences()
-            pattern = f"[{re.escape(splitchar)}]"
-            has_eos = False
-            if pattern != "[]":  # Should never happen, but ...
-                allmatches = self.preg_match_capture(pattern, s)
-                has_eos = len(allmatches) > 0
-            tokens.append(ParsedToken(s, False, has_eos))
-
-        # For each wordtok, add all non-words before the wordtok, and
-        # then add the wordtok.
+            if s:
+                tokens.append(ParsedToken(s, False, eos_search(s) is not None))
+
+        # For each word, add all non-words before the word, and
+        # then add the word.
         pos = 0
-        for wt in wordtoks:
-            w = wt[0]
-            wp = wt[1]
-            s = text[pos:wp]
-            add_non_words(s)
+        for m in self.word_re.finditer(text):
+            w = m.group()
+            if w == "":
+                continue
+            wp = m.start()
+            add_non_words(text[pos:wp])
             tokens.append(ParsedToken(w, True, False))
             pos = wp + len(w)
 
         # Add anything left over.
-        s = text[pos:]
-        add_non_words(s)
+        add_non_words(text[pos:])
 
 
 class TurkishParser(SpaceDelimitedParser):
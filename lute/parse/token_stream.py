@@ -0,0 +1,116 @@
+"""
+Compact serialized form of a text's ParsedTokens.
+
+Parsing can be slow (e.g. for Japanese and Mandarin), so the tokens
+for each page are stored in the texttokenstreams table and re-used
+until the text or the language's parser settings change.
+
+Each token string is stored once in a vocabulary, and the tokens are
+stored as arrays of vocabulary ids and word/end-of-sentence flags.
+"""
+
+import hashlib
+import struct
+import sys
+import zlib
+from array import array
+from typing import List
+from lute import __version__
+from lute.parse.base import ParsedToken, ParseContext
+
+# Change this if the stored format changes.
+FORMAT_VERSION = 1
+
+_MAGIC = b"LTS1"
+
+# magic, vocabulary size, token count, vocabulary utf-8 byte count
+_HEADER = struct.Struct("<4sIII")
+
+_IS_WORD = 1
+_IS_END_OF_SENTENCE = 2
+
+
+def stream_key(parser, language, text: str) -> str:
+    """
+    Key for the tokens of the text parsed with the language's settings.
+
+    Stored tokens are only used if the key hasn't changed.
+    """
+    k = (FORMAT_VERSION, __version__, parser.get_parse_key(language), text)
+    return hashlib.sha1(repr(k).encode("utf-8")).hexdigest()
+
+
+def _to_little_endian(a: array) -> array:
+    "Arrays are stored little-endian."
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
+
+
+def encode(tokens: List[ParsedToken]) -> bytes:
+    "Serialize the tokens."
+    vocab = {}
+    ids = array("I")
+    flags = bytearray()
+    for t in tokens:
+        ids.append(vocab.setdefault(t.token, len(vocab)))
+        f = _IS_WORD if t.is_word else 0
+        if t.is_end_of_sentence:
+            f |= _IS_END_OF_SENTENCE
+        flags.append(f)
+
+    words = list(vocab)
+    lengths = array("I", [len(w) for w in words])
+    vocab_bytes = "".join(words).encode("utf-8")
+    header = _HEADER.pack(_MAGIC, len(words), len(ids), len(vocab_bytes))
+    parts = [
+        header,
+        _to_little_endian(lengths).tobytes(),
+        vocab_bytes,
+        _to_little_endian(ids).tobytes(),
+        bytes(flags),
+    ]
+    return zlib.compress(b"".join(parts))
+
+
+def _read_array(raw: bytes, start: int, count: int):
+    "Read count unsigned ints at start, returning the array and the end."
+    a = array("I")
+    end = start + a.itemsize * count
+    a.frombytes(raw[start:end])
+    return _to_little_endian(a), end
+
+
+def _read_header(raw: bytes):
+    "Get the vocabulary size, token count, and vocabulary byte count."
+    magic, vocab_count, token_count, vocab_byte_count = _HEADER.unpack_from(raw)
+    if magic != _MAGIC:
+        raise ValueError("Not a token stream")
+    return vocab_count, token_count, vocab_byte_count
+
+
+def _read_vocabulary(raw: bytes, vocab_count: int, vocab_byte_count: int):
+    "Get the vocabulary strings, and the position after them."
+    lengths, pos = _read_array(raw, _HEADER.size, vocab_count)
+    vocab_text = raw[pos : pos + vocab_byte_count].decode("utf-8")
+    words = []
+    start = 0
+    for n in lengths:
+        words.append(vocab_text[start : start + n])
+        start += n
+    return words, pos + vocab_byte_count
+
+
+def decode(data: bytes) -> List[ParsedToken]:
+    "Get the ParsedTokens from serialized data, numbered in a new ParseContext."
+    raw = zlib.decompress(data)
+    vocab_count, token_count, vocab_byte_count = _read_header(raw)
+    words, pos = _read_vocabulary(raw, vocab_count, vocab_byte_count)
+    ids, pos = _read_array(raw, pos, token_count)
+    flags = raw[pos : pos + token_count]
+
+    tokens = [
+        ParsedToken(words[i], bool(f & _IS_WORD), bool(f & _IS_END_OF_SENTENCE))
+        for i, f in zip(ids, flags)
+    ]
+    return ParseContext().add_all(tokens)
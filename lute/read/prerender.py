@@ -0,0 +1,118 @@
+"""
+Background rendering of the next page.
+
+After a page is served, the next page is rendered by a small thread
+pool: it's parsed and its terms are found, and the result is put in
+the page cache (see read.service.Service.get_page_content), so that
+going to the next page doesn't have to do that work.
+
+By default, nothing is written to the db for a page that the reader
+hasn't opened: its new status 0 terms are saved when it's opened.
+If save_terms is set, they're saved in the background as well, and
+the page's html is cached.
+
+Each book has at most one scheduled page.  Scheduling another page
+for the book (e.g. if the reader navigates elsewhere) cancels the
+previous one if it hasn't finished.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lute.db import db
+from lute.models.repositories import BookRepository
+from lute.read.service import Service
+
+
+class _Job:
+    "A scheduled page render."
+
+    def __init__(self, pagenum):
+        self.pagenum = pagenum
+        self.cancelled = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        "Don't start the render, or stop it before it saves terms."
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def is_active(self):
+        "True if still going to render."
+        return not self.cancelled.is_set() and not self.future.done()
+
+
+__PRERENDER__ = {"app": None, "pool": None, "save_terms": False}
+# book id => _Job
+__JOBS__ = {}
+__LOCK__ = threading.Lock()
+
+
+def init_prerender(app, max_workers=1, save_terms=False):
+    """
+    Render pages for the app with max_workers threads, or none if 0,
+    saving new terms if save_terms.
+    """
+    shutdown_prerender()
+    if max_workers > 0:
+        pool = ThreadPoolExecutor(max_workers, thread_name_prefix="lute-prerender")
+        __PRERENDER__["app"] = app
+        __PRERENDER__["pool"] = pool
+        __PRERENDER__["save_terms"] = save_terms
+
+
+def shutdown_prerender():
+    "Cancel all jobs and stop the pool."
+    with __LOCK__:
+        for job in __JOBS__.values():
+            job.cancel()
+        __JOBS__.clear()
+        pool = __PRERENDER__["pool"]
+        __PRERENDER__["app"] = None
+        __PRERENDER__["pool"] = None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _render(app, bookid, job, save_terms):
+    "Render the page in a new app context, unless cancelled."
+    if job.cancelled.is_set():
+        return
+    with app.app_context():
+        book = BookRepository(db.session).find(bookid)
+        if book is None or job.pagenum > book.page_count:
+            return
+        Service(db.session).prerender_page(
+            book, job.pagenum, job.cancelled.is_set, save_terms
+        )
+
+
+def schedule_prerender(bookid, pagenum):
+    """
+    Render the book's page in the background, cancelling any other
+    page scheduled for the book.  Returns the Future, or None if
+    background rendering is off or the page is already scheduled.
+    """
+    with __LOCK__:
+        app, pool = __PRERENDER__["app"], __PRERENDER__["pool"]
+        if pool is None:
+            return None
+        current = __JOBS__.get(bookid)
+        if current is not None:
+            if current.pagenum == pagenum and current.is_active():
+                return None
+            current.cancel()
+        job = _Job(pagenum)
+        __JOBS__[bookid] = job
+        save_terms = __PRERENDER__["save_terms"]
+        job.future = pool.submit(_render, app, bookid, job, save_terms)
+        return job.future
+
+
+def cancel_prerender(bookid):
+    "Cancel the book's scheduled page, if any."
+    with __LOCK__:
+        job = __JOBS__.pop(bookid, None)
+    if job is not None:
+        job.cancel()
@@ -20,9 +20,9 @@ with some of the Terms overlapping:
 """
 
 import re
-from collections import Counter
-from lute.models.term import Term
+from lute.read.render.term_changes import TermValues
 from lute.read.render.text_item import TextItem
+from lute.read.render.multiword_indexer import MultiwordTermIndexer
 
 # from lute.utils.debug_helpers import DebugTimer
 
@@ -58,6 +58,29 @@ def get_string_indexes(strings, content):
     return ret
 
 
+def lowercase_tokens(tokens, parser):
+    """
+    Get the lowercase text of each token.
+
+    Pages repeat the same few hundred tokens, so each distinct token
+    is only lowercased once.
+    """
+    lcs = {}
+    ret = []
+    for t in tokens:
+        lc = lcs.get(t.token)
+        if lc is None:
+            lc = parser.get_lowercase(t.token)
+            lcs[t.token] = lc
+        ret.append(lc)
+    return ret
+
+
+def find_multiword_matches(tokens_lc, multiword_term_indexer):
+    "Get the (text_lc, index) of all multiword terms in the tokens."
+    return multiword_term_indexer.search_all(tokens_lc)
+
+
 # pylint: disable=too-many-arguments,too-many-positional-arguments
 def _make_textitem(index, text, text_lc, count, sentence_number, term):
     "Make a TextItem."
@@ -73,50 +96,117 @@ def _make_textitem(index, text, text_lc, count, sentence_number, term):
     return r
 
 
-def _create_missing_status_0_terms(tokens, terms, language):
-    "Make new terms as needed for all tokens, using case of last instance."
+def _create_missing_status_0_terms(tokens, tokens_lc, terms, language):
+    """
+    Make new unsaved status 0 render terms as needed for all tokens.
 
-    original_word_tokens = {t.token for t in tokens if t.is_word}
-    parser = language.parser
-    lc_word_tokens = {parser.get_lowercase(t): t for t in original_word_tokens}
+    These are only TermValues: if the terms are needed as Terms
+    (e.g. to be saved), they're created later from the TextItems.
+    """
+    lc_word_tokens = {lc for t, lc in zip(tokens, tokens_lc) if t.is_word}
     term_text_lcs = {t.text_lc for t in terms}
 
-    missing_word_tokens = [
-        original for lc, original in lc_word_tokens.items() if lc not in term_text_lcs
+    return [
+        TermValues(None, language.id, lc, 0, 1)
+        for lc in lc_word_tokens
+        if lc not in term_text_lcs
     ]
 
-    # Note: create the terms _without parsing_ because some parsers
-    # break up characters when the words are given out of context.
-    missing_word_tokens = list(set(missing_word_tokens))
-    new_terms = [Term.create_term_no_parsing(language, t) for t in missing_word_tokens]
-    for t in new_terms:
-        t.status = 0
 
-    return new_terms
+def get_visible_spans(token_count, multiword_spans):
+    """
+    Get the (index, token_count, display_count) of the items that are
+    rendered, in order, for a page of token_count tokens with
+    multiword items at the (index, token_count) multiword_spans.
+
+    Each token position is shown by the item that starts first, or
+    the longest if several start at the same index (see
+    get_textitems()).  Only the longest item starting at each index
+    can be shown, so its end is all that's needed, and the positions
+    shown by an item are always contiguous.  The items are found in
+    a single pass over the ends, without sorting.
+    """
+    # ends[i] is the end (exclusive) of the longest item starting at i.
+    ends = list(range(1, token_count + 1))
+    for index, count in multiword_spans:
+        if index + count > ends[index]:
+            ends[index] = index + count
+
+    spans = []
+    start = 0
+    owner = 0
+    while start < token_count:
+        end = ends[owner]
+        spans.append((owner, end - owner, end - start))
+        # Next is the first item after owner that is still showing at end.
+        owner += 1
+        while owner < token_count and ends[owner] <= end:
+            owner += 1
+        start = end
+    return spans
+
+
+def _get_page_terms(
+    tokens, terms, language, multiword_term_indexer, tokens_lc, matches
+):
+    """
+    Get the text_lc to term dict, including new status 0 terms,
+    and the (index, token_count) of the multiword terms.
+    """
+    parser = language.parser
+    if tokens_lc is None:
+        tokens_lc = lowercase_tokens(tokens, parser)
+    new_unknown_terms = _create_missing_status_0_terms(
+        tokens, tokens_lc, terms, language
+    )
+    all_terms = terms + new_unknown_terms
+    text_to_term = {t.text_lc: t for t in all_terms}
+
+    if matches is None:
+        if multiword_term_indexer is None:
+            multiword_term_indexer = MultiwordTermIndexer()
+            for t in all_terms:
+                if t.token_count > 1:
+                    multiword_term_indexer.add(t.text_lc)
+        matches = find_multiword_matches(tokens_lc, multiword_term_indexer)
+    multiword_spans = [
+        (index, text_lc.count(zws) + 1)
+        for text_lc, index in matches
+        if text_lc in text_to_term
+    ]
+    return tokens_lc, text_to_term, multiword_spans
 
 
-def get_textitems(tokens, terms, language, multiword_term_indexer=None):
+def get_textitems(
+    tokens,
+    terms,
+    language,
+    multiword_term_indexer=None,
+    tokens_lc=None,
+    matches=None,
+):
     """
     Return TextItems that will **actually be rendered**.
 
-    Method to determine what should be rendered:
+    tokens_lc (the lowercased tokens) and matches (the multiword term
+    matches in tokens_lc) can be given if the caller has already
+    calculated them.
 
-    - Create TextItems for all of the tokens, finding their
-      starting index in the tokens.
+    Method to determine what should be rendered:
 
-    - "Write" the TextItems to an array in correctly sorted
-      order, so that the correct TextItems take precendence
-      in the final rendering.
+    - Find all of the items: one for each token, and one for each
+      multiword term, with their starting index in the tokens.
 
-    - Calculate any term overlaps.
+    - Each token is shown by the item that starts first, or by the
+      longest item if several start at the same index.  The items
+      that are shown, and how many of their tokens are shown, are
+      calculated by get_visible_spans().
 
-    - Return the final list of TextItems that will actually
-      be rendered.
+    - Make TextItems only for those.
 
     ---
 
-    Applying the above algorithm to the example given in the class
-    header:
+    Applying the above to the example given in the class header:
 
     We have the following TextTokens A-I:
 
@@ -129,133 +219,91 @@ def get_textitems(tokens, terms, language, multiword_term_indexer=None):
       "F G"       (L)
       "C D E"     (M)
 
-    Creating TextItems for all of the terms, finding their starting
-    indices in the tokens:
+    The items, by starting index:
 
       TextToken    index   length
       ----         -----   ------
       [A]          0       1
-      [B]          1       1
-      ...
-      [I]          8       1
       [B C]        1       2
+      [B]          1       1
+      [C D E]      2       3
+      [C]          2       1
+      [D]          3       1
       [E F G H I]  4       5
+      [E]          4       1
       [F G]        5       2
-      [C D E]      2       3
+      [F]          5       1
+      [G]          6       1
+      [H]          7       1
+      [I]          8       1
+
+    The item showing each token is the first one in the list that
+    covers it:
+
+      shown by: [A] [B C] [B C] [C D E] [C D E] [E F G H I] ... [E F G H I]
+                [A] [B      C]  [-D          E] [-F     G    H           I]
 
-    Sorting by index, then decreasing token count:
-
-      TextToken    index   length   ID (for later reference)
-      ----         -----   ------   ------------------------
-      [A]          0       1        t1
-      [B C]        1       2        t2
-      [B]          1       1        t3
-      [C D E]      2       3        t4
-      [C]          2       1        t5
-      [D]          3       1        t6
-      [E F G H I]  4       5        t7
-      [E]          4       1        t8
-      [F G]        5       2        t9
-      [F]          5       1        t10
-      [G]          6       1        t11
-      [H]          7       1        t12
-      [I]          8       1        t13
-
-    Starting at the bottom of the above list and
-    working upwards:
-
-      - ID of [I] is written to index 8: [] [] [] [] [] [] [] [] [t13]
-      - ID of [H] to index 7: [] [] [] [] [] [] [] [t12] [t13]
-      - ...
-      - [F G] to index 5 *and* 6: [] [] [] [] [] [t9] [t9] [t12] [t13]
-      - [E] to index 4:  [] [] [] [] [t8] [t9] [t9] [t12] [t13]
-      - [E F G H I] to indexes 4-8:   [] [] [] [] [t7] [t7] [t7] [t7] [t7]
-      - ... etc
-
-    Using the TextItem IDs, the resulting array would be:
-
-      output array: [t1] [t2] [t2] [t4] [t4] [t7] [t7] [t7] [t7]
-                    [A]  [B     C] [-D    E] [-F    G    H    I]
-
-    The only TextItems that will be shown are therefore:
-      t1, t2, t3, t7
-
-    To calculate what text is actually displayed, the count
-    of each ID is used.  e.g.:
-      - ID t7 appears 4 times in the output array.  The last 4 tokens of
-        [E F G H I] are [F G H I], which will be used as t7's display text.
-      - ID t2 appears 2 times.  The last 2 tokens of [B C] are [B C],
+    To calculate what text is actually displayed, the count of
+    tokens shown by each item is used.  e.g.:
+      - [E F G H I] shows 4 tokens.  The last 4 tokens of
+        [E F G H I] are [F G H I], which will be used as its display text.
+      - [B C] shows 2 tokens.  The last 2 tokens of [B C] are [B C],
         so that will be the display text. etc.
     """
     # pylint: disable=too-many-locals
 
     # dt = DebugTimer("get_textitems", display=False)
 
-    new_unknown_terms = _create_missing_status_0_terms(tokens, terms, language)
-    # dt.step("new_unknown_terms")
-
-    all_terms = terms + new_unknown_terms
-    text_to_term = {dt.text_lc: dt for dt in all_terms}
+    tokens_lc, text_to_term, multiword_spans = _get_page_terms(
+        tokens, terms, language, multiword_term_indexer, tokens_lc, matches
+    )
+    # dt.step("page terms")
 
     tokens_orig = [t.token for t in tokens]
-    tokens_lc = [language.parser.get_lowercase(t) for t in tokens_orig]
-
     textitems = []
-
-    def _add_textitem(index, text_lc, count):
-        "Add a TextItem for position index in tokens."
-        text_orig = tokens_orig[index]
-        if count > 1:
+    current_paragraph = 0
+    for index, count, display_count in get_visible_spans(len(tokens), multiword_spans):
+        if count == 1:
+            text_orig = tokens_orig[index]
+            text_lc = tokens_lc[index]
+        else:
             text_orig = zws.join(tokens_orig[index : index + count])
-        text_lc = zws.join(tokens_lc[index : index + count])
+            text_lc = zws.join(tokens_lc[index : index + count])
         sentence_number = tokens[index].sentence_number
         term = text_to_term.get(text_lc, None)
         ti = _make_textitem(index, text_orig, text_lc, count, sentence_number, term)
-        textitems.append(ti)
-
-    # Single-word terms.
-    for index, _ in enumerate(tokens):
-        _add_textitem(index, tokens_lc[index], 1)
-    # dt.step("single word textitems")
-
-    # Multiword terms.
-    if multiword_term_indexer is not None:
-        for r in multiword_term_indexer.search_all(tokens_lc):
-            mwt = text_to_term[r[0]]
-            count = mwt.token_count
-            _add_textitem(r[1], r[0], count)
-        # dt.step(f"get mw textitems w indexer")
-    else:
-        multiword_terms = [t.text_lc for t in all_terms if t.token_count > 1]
-        for e in get_string_indexes(multiword_terms, zws.join(tokens_lc)):
-            count = e[0].count(zws) + 1
-            _add_textitem(e[1], e[0], count)
-        # dt.step("mw textitems without indexer")
-
-    # Sorting by index, then decreasing token count.
-    textitems = sorted(textitems, key=lambda x: (x.index, -x.token_count))
-
-    # "Write out" TextItems to the output array.
-    output_textitem_ids = [None] * len(tokens)
-    for ti in reversed(textitems):
-        for c in range(ti.index, ti.index + ti.token_count):
-            output_textitem_ids[c] = id(ti)
-
-    # Calc display_counts; e.g. if a textitem's id shows up 3 times
-    # in the output_textitem_ids, it should display 3 tokens.
-    id_counts = dict(Counter(output_textitem_ids))
-    for ti in textitems:
-        ti.display_count = id_counts.get(id(ti), 0)
-    # dt.step("display_count")
-
-    textitems = [ti for ti in textitems if ti.display_count > 0]
-
-    current_paragraph = 0
-    for ti in textitems:
+        ti.display_count = display_count
         ti.paragraph_number = current_paragraph
-        if ti.text == "¶":
+        if text_orig == "¶":
             current_paragraph += 1
-    # dt.step("paragraphs")
-    # dt.step("done")
+        textitems.append(ti)
+    # dt.step("textitems")
 
     return textitems
+
+
+def get_status_text_lcs(
+    tokens,
+    terms,
+    language,
+    multiword_term_indexer=None,
+    tokens_lc=None,
+    matches=None,
+):
+    """
+    Get the text_lc of the terms that would be rendered, by status,
+    without making TextItems, e.g. for book stats.  The args are as
+    for get_textitems().
+    """
+    tokens_lc, text_to_term, multiword_spans = _get_page_terms(
+        tokens, terms, language, multiword_term_indexer, tokens_lc, matches
+    )
+    ret = {}
+    for index, count, _ in get_visible_spans(len(tokens), multiword_spans):
+        text_lc = tokens_lc[index]
+        if count > 1:
+            text_lc = zws.join(tokens_lc[index : index + count])
+        term = text_to_term.get(text_lc)
+        if term is not None:
+            ret.setdefault(term.status or 0, set()).add(text_lc)
+    return ret
@@ -0,0 +1,103 @@
+"""
+Write the html for a page of rendered paragraphs.
+
+The output is byte-for-byte the same as the templates
+read/page_content.html and read/textitem.html, which are kept as
+the reference (see tests/unit/read/render/test_html_writer.py), but
+it's much faster than rendering every TextItem through Jinja.  See
+utils/bench_page_content.py.
+"""
+
+from markupsafe import escape
+
+_PAGE_START = "\n\n"
+
+_PARA_START = "\n\n<p>\n  "
+
+# Ends with a blank element for empty paragraphs (blank lines) to show up.
+_PARA_END = '\n\n  \n  <span class="textitem">&ZeroWidthSpace;</span>\n</p>\n\n'
+
+# Jinja's sentence_id is never incremented, because the loop's
+# "set" is scoped to each iteration: every sentence gets sent_1.
+_SENTENCE_START = '\n  <span class="textsentence" id="sent_1">\n    \n    '
+
+_SENTENCE_END = "\n  </span>\n  \n  "
+
+_PAGE_END = (
+    "\n\n<script>\n"
+    "  // Defined in lute.js\n"
+    "  parent.reset_cursor_marker();\n"
+    "  parent.add_status_classes();\n"
+    "</script>"
+)
+
+
+def _item_html(item, parts):
+    "Append the html parts of the item."
+    try:
+        lang_id = str(item.lang_id)
+    except AttributeError:
+        lang_id = ""
+    wo_id = item.wo_id
+    parts += (
+        '<span id="ID-',
+        str(item.sentence_number),
+        "-",
+        str(item.index),
+        '"\n      class="',
+        escape(item.html_class_string),
+        '"\n      data-lang-id="',
+        escape(lang_id),
+        '"\n      data-paragraph-id="',
+        str(item.paragraph_number),
+        '"\n      data-sentence-id="',
+        str(item.sentence_number),
+        '"\n      data-text="',
+        escape(item.text),
+        '"\n      data-status-class="',
+        escape(item.status_class),
+        '"\n      data-order="',
+        str(item.index),
+        '"\n      ',
+    )
+    if wo_id is not None:
+        parts += ('data-wid="', escape(str(wo_id)), '"\n      ')
+    parts += (">", item.html_display_text, "</span>")
+
+
+def item_html(item):
+    "Html for a single TextItem."
+    parts = []
+    _item_html(item, parts)
+    return "".join(parts)
+
+
+def sentence_html(item_htmls):
+    "Html for a sentence, given the html of its items."
+    return _SENTENCE_START + "".join(item_htmls) + _SENTENCE_END
+
+
+def page_html(paragraph_sentence_htmls):
+    "Html for the page, given the html of each paragraph's sentences."
+    parts = [_PAGE_START]
+    for sentences in paragraph_sentence_htmls:
+        parts.append(_PARA_START)
+        parts.extend(sentences)
+        parts.append(_PARA_END)
+    parts.append(_PAGE_END)
+    return "".join(parts)
+
+
+def page_content_html(paragraphs):
+    "Html for the paragraphs from read.render.service.Service.get_paragraphs()."
+    parts = [_PAGE_START]
+    for para in paragraphs:
+        parts.append(_PARA_START)
+        for sentence in para:
+            parts.append(_SENTENCE_START)
+            for item in sentence:
+                _item_html(item, parts)
+            parts.append(_SENTENCE_END)
+        parts.append(_PARA_END)
+    parts.append(_PAGE_END)
+    return "".join(parts)
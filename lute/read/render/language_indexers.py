@@ -0,0 +1,176 @@
+"""
+Long-lived multiword term indexers, one per language.
+
+Building a MultiwordTermIndexer for a language with many multiword
+terms is slow, so each language's indexer is built once and kept.
+
+Multiword Terms created, renamed, or deleted through the ORM are
+added to or removed from the kept indexer when the session commits.
+Other changes are caught by the languagetermchanges counter, and
+the indexer is rebuilt.  See term_changes.py.
+
+Built indexers are also saved to the cache directory with their
+counter value, and the committed ORM changes are appended to a
+change log next to them, so that a restarted process can load the
+indexer rather than build it again.
+"""
+
+import json
+import os
+import threading
+from sqlalchemy import text as sqltext
+
+from lute.read.render.multiword_indexer import MultiwordTermIndexer
+from lute.read.render.term_changes import (
+    MULTIWORD,
+    add_commit_listener,
+    get_change_counts,
+)
+
+
+# language id => (multiword change count, indexer)
+__LANGUAGE_INDEXERS__ = {}
+__LOCK__ = threading.Lock()
+
+# Directory for saved indexers, None if they're not saved.
+__SAVE_DIR__ = {"path": None}
+
+# Saved indexers with more logged changes than this are rebuilt.
+MAX_SAVED_CHANGES = 5000
+
+
+def reset_language_indexers():
+    "Discard all indexers, e.g. if the database is replaced."
+    with __LOCK__:
+        __LANGUAGE_INDEXERS__.clear()
+
+
+def init_language_indexers(save_dir=None):
+    "Discard all indexers, and save new ones to save_dir if given."
+    reset_language_indexers()
+    __SAVE_DIR__["path"] = save_dir
+
+
+def _saved_files(language_id):
+    "Saved indexer and change log filenames, or None if not saving."
+    d = __SAVE_DIR__["path"]
+    if d is None:
+        return None
+    base = os.path.join(d, f"multiword_{int(language_id)}")
+    return f"{base}.idx", f"{base}.log"
+
+
+def _apply_ops(mw, ops):
+    "Add and remove terms."
+    for op, lc in ops:
+        if op == "add":
+            mw.add(lc)
+        else:
+            mw.remove(lc)
+
+
+def _load_saved(language_id, count):
+    """
+    Load the saved indexer and apply its logged changes.
+
+    Returns None if there's no saved indexer for the change count.
+    """
+    files = _saved_files(language_id)
+    if files is None:
+        return None
+    idxfile, logfile = files
+    try:
+        with open(logfile, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+    except FileNotFoundError:
+        entries = []
+    except (OSError, ValueError):
+        return None
+    if sum(len(e["ops"]) for e in entries) > MAX_SAVED_CHANGES:
+        return None
+
+    current = entries[0]["start"] if entries else count
+    mw = MultiwordTermIndexer.load(idxfile, str(current))
+    if mw is None:
+        return None
+    for e in entries:
+        if e["start"] != current:
+            return None
+        _apply_ops(mw, e["ops"])
+        current = e["end"]
+    return mw if current == count else None
+
+
+def _save(language_id, count, mw):
+    "Save the indexer for the change count, with an empty change log."
+    files = _saved_files(language_id)
+    if files is None:
+        return
+    idxfile, logfile = files
+    try:
+        if os.path.exists(logfile):
+            os.remove(logfile)
+        mw.save(idxfile, str(count))
+    except OSError:
+        pass
+
+
+def _log_saved_changes(language_id, start, end, ops):
+    "Append the committed changes to the saved indexer's change log."
+    files = _saved_files(language_id)
+    if files is None or not os.path.exists(files[0]):
+        return
+    entry = {"start": start, "end": end, "ops": ops}
+    try:
+        with open(files[1], "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError:
+        pass
+
+
+def get_language_indexer(session, language_id):
+    "Get the indexer loaded with all the language's multiword terms."
+    counts = get_change_counts(session.connection(), [language_id])
+    count = counts[language_id][MULTIWORD]
+    with __LOCK__:
+        cached = __LANGUAGE_INDEXERS__.get(language_id)
+    if cached is not None and cached[0] == count:
+        return cached[1]
+
+    mw = _load_saved(language_id, count)
+    if mw is None:
+        mw = MultiwordTermIndexer()
+        sql = sqltext(
+            """
+            SELECT WoTextLC FROM words
+            WHERE WoLgID=:language_id and WoTokenCount>1
+            """
+        )
+        for r in session.execute(sql, {"language_id": language_id}).all():
+            mw.add(r[0])
+        _save(language_id, count, mw)
+    with __LOCK__:
+        __LANGUAGE_INDEXERS__[language_id] = (count, mw)
+    return mw
+
+
+def _apply_committed_changes(changes):
+    "Apply committed term changes to the indexers, or discard them."
+    with __LOCK__:
+        for lgid, rec in changes.items():
+            cached = __LANGUAGE_INDEXERS__.get(lgid)
+            if cached is None:
+                continue
+            start, end = rec.start[MULTIWORD], rec.end[MULTIWORD]
+            if not rec.exact[MULTIWORD] or cached[0] != start:
+                del __LANGUAGE_INDEXERS__[lgid]
+                continue
+            mw = cached[1]
+            ops = rec.multiword_ops()
+            _apply_ops(mw, ops)
+            __LANGUAGE_INDEXERS__[lgid] = (end, mw)
+            if start != end:
+                _log_saved_changes(lgid, start, end, ops)
+
+
+add_commit_listener(_apply_committed_changes)
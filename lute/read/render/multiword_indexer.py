@@ -1,40 +1,408 @@
 """
-Find terms in contest string using ahocorapy.
+Find multiword terms in a sequence of tokens.
 """
 
-from ahocorapy.keywordtree import KeywordTree
+import os
+import struct
+import sys
+import threading
+from array import array
 
+# Saved indexer file:
+# magic, key byte count, node count, edge count, token count,
+# term count, token utf-8 byte count, term utf-8 byte count
+_MAGIC = b"LMW1"
+_HEADER = struct.Struct("<4sIIIIIII")
 
-class MultiwordTermIndexer:
+
+def _to_little_endian(a):
+    "Arrays are saved little-endian."
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
+
+
+class _PackedGoto:
+    """
+    Saved goto transitions, as arrays of each node's edges.
+
+    The transition dicts are only made for the nodes used.
+    """
+
+    def __init__(self, starts, tids, children):
+        self.starts = starts
+        self.tids = tids
+        self.children = children
+        self.dicts = {}
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self, node):
+        d = self.dicts.get(node)
+        if d is None:
+            if node >= len(self):
+                raise IndexError(node)
+            a, b = self.starts[node], self.starts[node + 1]
+            d = dict(zip(self.tids[a:b], self.children[a:b]))
+            self.dicts[node] = d
+        return d
+
+
+class _PackedOutput:
+    """
+    Saved outputs, as arrays of each node's terms.
+
+    Output lists are only made for the nodes used.
     """
-    Find terms in strings using ahocorapy.
+
+    def __init__(self, starts, terms, counts):
+        self.starts = starts
+        self.terms = terms
+        self.counts = counts
+        self.lists = {}
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self, node):
+        lst = self.lists.get(node)
+        if lst is None:
+            if node >= len(self):
+                raise IndexError(node)
+            a, b = self.starts[node], self.starts[node + 1]
+            lst = list(zip(self.terms[a:b], self.counts[a:b]))
+            self.lists[node] = lst
+        return lst
+
+    def __setitem__(self, node, value):
+        self.lists[node] = value
+
+
+class MultiwordTermIndexer:  # pylint: disable=too-many-instance-attributes
+    """
+    Find terms in token sequences, using an Aho-Corasick automaton
+    over token ids.
+
+    Terms are added as zws-joined strings (e.g. Term.text_lc), and
+    each of their tokens is interned as an integer id.  Searching a
+    list of tokens then takes time proportional to the number of
+    tokens, regardless of the number of terms, and gives the token
+    index of each match directly.
+
+    Terms can be added and removed after searching, so an indexer
+    can be kept for the life of the app (see language_indexers.py).
+    Terms added after the automaton is built go to a small pending
+    indexer that is searched as well, and that is merged into the
+    automaton when it gets too big.
+
+    A finalized indexer can be saved to a file, and loaded again
+    much faster than it can be built (see save() and load()).
     """
 
     zws = "\u200B"  # zero-width space
 
+    # Max terms in the pending indexer before it's merged.
+    PENDING_MERGE_SIZE = 500
+
     def __init__(self):
-        self.kwtree = KeywordTree(case_insensitive=True)
+        # Token string => id.
+        self.token_ids = {}
+
+        # The automaton.  Node 0 is the root; for each node:
+        # - goto: {token id: next node}
+        # - fail: node for the longest proper suffix in the trie
+        # - output: [(term, token count)] of terms ending at the node
+        # - output_link: nearest fail node with output, or 0
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.output_link = [0]
         self.finalized = False
 
+        self.pending = None
+        self._lock = threading.RLock()
+
     def add(self, t):
-        "Add zws-enclosed term to tree."
-        add_t = f"{self.zws}{t}{self.zws}"
-        self.kwtree.add(add_t)
+        "Add zws-joined term."
+        with self._lock:
+            if not self.finalized:
+                self._add(t)
+                return
+            if t in self:
+                return
+            if self.pending is None:
+                self.pending = MultiwordTermIndexer()
+            self.pending._add(t)  # pylint: disable=protected-access
+            if self.pending.term_count() > self.PENDING_MERGE_SIZE:
+                self._merge_pending()
+
+    def _add(self, t):
+        "Add the term to the trie."
+        self._unpack()
+        parts = t.split(self.zws)
+        node = 0
+        for part in parts:
+            tid = self.token_ids.setdefault(part, len(self.token_ids))
+            nxt = self.goto[node].get(tid)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.output_link.append(0)
+                self.goto[node][tid] = nxt
+            node = nxt
+        entry = (t, len(parts))
+        if entry not in self.output[node]:
+            self.output[node].append(entry)
+        self.finalized = False
+
+    def _merge_pending(self):
+        "Add the pending terms to the automaton."
+        pending = self.pending
+        self.pending = None
+        for outputs in pending.output:
+            for t, _ in outputs:
+                self._add(t)
+
+    def _find_node(self, t):
+        "Node for the term, or None."
+        node = 0
+        for part in t.split(self.zws):
+            node = self.goto[node].get(self.token_ids.get(part, -1))
+            if node is None:
+                return None
+        return node
+
+    def __contains__(self, t):
+        with self._lock:
+            node = self._find_node(t)
+            if node is not None and any(e[0] == t for e in self.output[node]):
+                return True
+            return self.pending is not None and t in self.pending
+
+    def remove(self, t):
+        """
+        Remove zws-joined term.
+
+        Only the term's output is removed; its trie nodes and links
+        are left as-is, which doesn't affect the search results.
+        """
+        with self._lock:
+            node = self._find_node(t)
+            if node is not None:
+                self.output[node] = [e for e in self.output[node] if e[0] != t]
+            if self.pending is not None:
+                self.pending.remove(t)
+
+    def term_count(self):
+        "Number of terms in the indexer."
+        with self._lock:
+            ret = sum(len(outputs) for outputs in self.output)
+            if self.pending is not None:
+                ret += self.pending.term_count()
+            return ret
+
+    def _finalize(self):
+        "Calculate the fail and output links, breadth-first."
+        self._unpack()
+        goto = self.goto
+        fail = self.fail
+        output_link = self.output_link
+        queue = list(goto[0].values())
+        for node in queue:
+            fail[node] = 0
+            output_link[node] = 0
+        for node in queue:
+            for tid, child in goto[node].items():
+                f = fail[node]
+                while f and tid not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(tid, 0)
+                fail[child] = f
+                output_link[child] = f if self.output[f] else output_link[f]
+                queue.append(child)  # pylint: disable=modified-iterating-list
+        self.finalized = True
 
     def search_all(self, lc_tokens):
         "Find all terms and starting token index."
-        if not self.finalized:
-            self.kwtree.finalize()
-            self.finalized = True
-
-        zws = self.zws
-        content = zws + zws.join(lc_tokens) + zws
-        zwsindexes = [i for i, char in enumerate(content) if char == zws]
-        results = self.kwtree.search_all(content)
-
-        for result in results:
-            # print(f"{result}\n", flush=True)
-            t = result[0].strip(zws)
-            charpos = result[1]
-            index = zwsindexes.index(charpos)
-            yield (t, index)
+        with self._lock:
+            if not self.finalized:
+                self._finalize()
+            ret = list(self._search(lc_tokens))
+            if self.pending is not None:
+                ret.extend(self.pending.search_all(lc_tokens))
+        return ret
+
+    def _search(self, lc_tokens):
+        "Search the automaton."
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        output_link = self.output_link
+        token_ids = self.token_ids
+
+        node = 0
+        for index, tok in enumerate(lc_tokens):
+            tid = token_ids.get(tok, -1)
+            while node and tid not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(tid, 0)
+
+            n = node
+            while n:
+                for t, count in output[n]:
+                    yield (t, index - count + 1)
+                n = output_link[n]
+
+    def _unpack(self):
+        "Change a loaded automaton to lists, so it can be changed."
+        if not isinstance(self.goto, _PackedGoto):
+            return
+        self.goto = [self.goto[i] for i in range(len(self.goto))]
+        self.output = [list(self.output[i]) for i in range(len(self.output))]
+        self.fail = list(self.fail)
+        self.output_link = list(self.output_link)
+
+    def save(self, filename, key):  # pylint: disable=too-many-locals
+        """
+        Save the finalized automaton to the file.
+
+        The file is written as little-endian uint32 arrays (the
+        transitions, links, and outputs of each node) and
+        NUL-separated utf-8 tokens and terms, so it can be read
+        back with little work.  The key is saved with it, to check
+        if the file is current on load.
+
+        Returns False if the automaton can't be saved.
+        """
+        with self._lock:
+            if self.pending is not None:
+                self._merge_pending()
+            if not self.finalized:
+                self._finalize()
+            tokens = list(self.token_ids)
+            terms = [t for outputs in self.output for t, _ in outputs]
+            if any("\0" in t for t in tokens + terms):
+                return False
+
+            node_count = len(self.goto)
+            starts = array("I", [0])
+            tids = array("I")
+            children = array("I")
+            out_starts = array("I", [0])
+            counts = array("I")
+            for node in range(node_count):
+                edges = sorted(self.goto[node].items())
+                tids.extend(e[0] for e in edges)
+                children.extend(e[1] for e in edges)
+                starts.append(len(tids))
+                counts.extend(c for _, c in self.output[node])
+                out_starts.append(len(counts))
+
+            key_bytes = key.encode("utf-8")
+            key_bytes += b"\0" * (-len(key_bytes) % 4)
+            token_bytes = "\0".join(tokens).encode("utf-8")
+            term_bytes = "\0".join(terms).encode("utf-8")
+            header = _HEADER.pack(
+                _MAGIC,
+                len(key_bytes),
+                node_count,
+                len(tids),
+                len(tokens),
+                len(terms),
+                len(token_bytes),
+                len(term_bytes),
+            )
+            arrays = [
+                starts,
+                tids,
+                children,
+                array("I", self.fail),
+                array("I", self.output_link),
+                out_starts,
+                counts,
+            ]
+            tmp = f"{filename}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(header)
+                f.write(key_bytes)
+                for a in arrays:
+                    f.write(_to_little_endian(a).tobytes())
+                f.write(token_bytes)
+                f.write(term_bytes)
+            os.replace(tmp, filename)
+            return True
+
+    @staticmethod
+    def load(filename, key):
+        """
+        Load the indexer saved with the key, or None if it wasn't.
+
+        The whole file is read, and its arrays are copied out, so the
+        file isn't kept open.
+        """
+        try:
+            with open(filename, "rb") as f:
+                data = f.read()
+            return MultiwordTermIndexer._load_from_buffer(data, key)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def _load_from_buffer(buf, key):  # pylint: disable=too-many-locals
+        "Load from the saved bytes."
+        (
+            magic,
+            key_byte_count,
+            node_count,
+            edge_count,
+            token_count,
+            term_count,
+            token_byte_count,
+            term_byte_count,
+        ) = _HEADER.unpack_from(buf)
+        pos = _HEADER.size
+        saved_key = buf[pos : pos + key_byte_count].rstrip(b"\0")
+        if magic != _MAGIC or saved_key != key.encode("utf-8"):
+            return None
+        pos += key_byte_count
+
+        def _read_array(count):
+            nonlocal pos
+            a = array("I")
+            end = pos + a.itemsize * count
+            a.frombytes(buf[pos:end])
+            pos = end
+            return _to_little_endian(a)
+
+        def _read_strings(byte_count, count):
+            nonlocal pos
+            s = buf[pos : pos + byte_count].decode("utf-8")
+            pos += byte_count
+            if count == 0:
+                return []
+            ret = s.split("\0")
+            if len(ret) != count:
+                raise ValueError("Bad string count")
+            return ret
+
+        starts = _read_array(node_count + 1)
+        tids = _read_array(edge_count)
+        children = _read_array(edge_count)
+        fail = _read_array(node_count)
+        output_link = _read_array(node_count)
+        out_starts = _read_array(node_count + 1)
+        counts = _read_array(term_count)
+        tokens = _read_strings(token_byte_count, token_count)
+        terms = _read_strings(term_byte_count, term_count)
+
+        mw = MultiwordTermIndexer()
+        mw.token_ids = dict(zip(tokens, range(token_count)))
+        mw.goto = _PackedGoto(starts, tids, children)
+        mw.fail = fail
+        mw.output = _PackedOutput(out_starts, terms, counts)
+        mw.output_link = output_link
+        mw.finalized = True
+        return mw
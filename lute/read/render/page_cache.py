@@ -0,0 +1,175 @@
+"""
+Cache of rendered page html.
+
+Rendering a page parses it, finds its terms, and writes its html.
+The html is cached for each text, with a key of the text's token
+stream key (the text and the language's parser settings) and the
+language's term change count (see term_changes.py).  Any change to
+the language's terms changes the count, so the cached html is
+not used.
+
+The most recently used pages are kept in memory, with their page
+state (see page_diff.py).  If a spill directory is given, pages
+dropped from memory are saved there, compressed, without their
+state.
+
+Pages rendered in the background without saving their new terms
+(see read/prerender.py) can't be cached as html, so their parsed
+and looked-up paragraphs are kept instead, until the page is opened.
+"""
+
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+
+class PageCache:
+    "LRU cache of each text's html, optionally spilling to disk."
+
+    def __init__(self, max_entries=50, spill_dir=None, max_spill_entries=2000):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.max_spill_entries = max_spill_entries
+        # text id => (key, html, state)
+        self._entries = OrderedDict()
+        # text id => (key, paragraphs)
+        self._paragraphs = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_locks = [threading.Lock() for _ in range(16)]
+
+    def _spill_file(self, text_id):
+        return os.path.join(self.spill_dir, f"page_{int(text_id)}.z")
+
+    def get(self, text_id, key):
+        "Get the html for the text, or None if it's not cached with the key."
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(text_id)
+            if entry is not None:
+                self._entries.move_to_end(text_id)
+                return entry[1] if entry[0] == key else None
+        html = self._read_spilled(text_id, key)
+        if html is not None:
+            self.put(text_id, key, html)
+        return html
+
+    def render_lock(self, language_id):
+        """
+        Lock held while rendering a page of the language, so that
+        pages rendered at the same time (e.g. by read/prerender.py)
+        don't create the same new terms.
+        """
+        return self._render_locks[language_id % len(self._render_locks)]
+
+    def get_state(self, text_id):
+        "Get the state of the text's last cached html, regardless of key."
+        with self._lock:
+            entry = self._entries.get(text_id)
+            return entry[2] if entry is not None else None
+
+    def put(self, text_id, key, html, state=None):
+        """
+        Cache the text's html.  If the key is None, the html is never
+        returned by get(), but the state is kept.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[text_id] = (key, html, state)
+            self._entries.move_to_end(text_id)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+        for evicted_id, (evicted_key, evicted_html, _) in evicted:
+            if evicted_key is not None:
+                self._spill(evicted_id, evicted_key, evicted_html)
+
+    def put_paragraphs(self, text_id, key, paragraphs):
+        "Keep the text's rendered paragraphs until they're popped."
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._paragraphs[text_id] = (key, paragraphs)
+            self._paragraphs.move_to_end(text_id)
+            while len(self._paragraphs) > self.max_entries:
+                self._paragraphs.popitem(last=False)
+
+    def pop_paragraphs(self, text_id, key):
+        "Remove the text's paragraphs, returning them if kept with the key."
+        with self._lock:
+            entry = self._paragraphs.pop(text_id, None)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    def has_paragraphs(self, text_id):
+        "True if the text's paragraphs are kept."
+        with self._lock:
+            return text_id in self._paragraphs
+
+    def clear(self):
+        "Remove all entries, including spilled ones."
+        with self._lock:
+            self._entries.clear()
+            self._paragraphs.clear()
+        for f in self._spilled_files():
+            self._remove(f)
+
+    def _spilled_files(self):
+        "Spilled files, oldest first."
+        if self.spill_dir is None or not os.path.isdir(self.spill_dir):
+            return []
+        files = [
+            os.path.join(self.spill_dir, f)
+            for f in os.listdir(self.spill_dir)
+            if f.startswith("page_") and f.endswith(".z")
+        ]
+        return sorted(files, key=os.path.getmtime)
+
+    def _remove(self, filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def _spill(self, text_id, key, html):
+        "Save the html to the spill dir, removing the oldest if there are too many."
+        if self.spill_dir is None:
+            return
+        data = zlib.compress(f"{key}\n{html}".encode("utf-8"))
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_file(text_id), "wb") as f:
+                f.write(data)
+        except OSError:
+            return
+        files = self._spilled_files()
+        for f in files[: max(0, len(files) - self.max_spill_entries)]:
+            self._remove(f)
+
+    def _read_spilled(self, text_id, key):
+        "Read the spilled html, None if missing or if its key differs."
+        if self.spill_dir is None:
+            return None
+        try:
+            with open(self._spill_file(text_id), "rb") as f:
+                data = zlib.decompress(f.read()).decode("utf-8")
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+        saved_key, html = data.split("\n", 1)
+        return html if saved_key == key else None
+
+
+__PAGE_CACHE__ = {"cache": PageCache()}
+
+
+def init_page_cache(max_entries=50, spill_dir=None):
+    "Replace the page cache, e.g. if the database is replaced."
+    __PAGE_CACHE__["cache"] = PageCache(max_entries, spill_dir)
+
+
+def get_page_cache():
+    "The page cache."
+    return __PAGE_CACHE__["cache"]
@@ -0,0 +1,102 @@
+"""
+Changes to a rendered page, for updating the reading pane in place.
+
+When a term is saved from the reading pane, the page is re-rendered,
+and only the changes from the previously rendered page are sent to
+the client:
+
+- spans that are still the same (same token range and text) but
+  have a new class, status, or term id are updated in place;
+
+- sentences whose spans changed (e.g. a multiword term was created
+  or deleted, adding or removing overlaps) are replaced.
+
+The previously rendered page is kept as a PageState in the page
+cache.
+"""
+
+from collections import namedtuple
+
+from lute.read.render.html_writer import item_html, page_html, sentence_html
+
+
+SpanState = namedtuple(
+    "SpanState", ["id", "text", "html_class", "status_class", "wid", "html"]
+)
+
+
+def _span_state(item):
+    return SpanState(
+        f"ID-{item.sentence_number}-{item.index}",
+        item.text,
+        item.html_class_string,
+        item.status_class,
+        item.wo_id,
+        item_html(item),
+    )
+
+
+def render_page(paragraphs):
+    """
+    Get the page html and PageState for the paragraphs from
+    read.render.service.Service.get_paragraphs().
+
+    The state is a tuple of paragraphs, each a tuple of sentences,
+    each a tuple of SpanStates.
+    """
+    state = tuple(
+        tuple(tuple(_span_state(item) for item in sentence) for sentence in para)
+        for para in paragraphs
+    )
+    html = page_html(
+        [
+            [sentence_html([s.html for s in sentence]) for sentence in para]
+            for para in state
+        ]
+    )
+    return html, state
+
+
+def _shape(state):
+    return [len(para) for para in state]
+
+
+def page_diff(old, new):
+    """
+    Get the changes from the old to the new PageState, as a dict:
+
+    {
+      "spans": [ {"id", "class", "status", "wid"}, ... ],
+      "sentences": [ {"index", "html"}, ... ]
+    }
+
+    where sentence index is the sentence's position on the page.
+
+    Returns None if the pages don't have the same paragraphs and
+    sentences, e.g. if the text was edited, and the full page must be
+    reloaded.
+    """
+    if old is None or new is None or _shape(old) != _shape(new):
+        return None
+    spans = []
+    sentences = []
+    old_sentences = [s for para in old for s in para]
+    new_sentences = [s for para in new for s in para]
+    for index, (olds, news) in enumerate(zip(old_sentences, new_sentences)):
+        if olds == news:
+            continue
+        if [(s.id, s.text) for s in olds] != [(s.id, s.text) for s in news]:
+            html = sentence_html([s.html for s in news])
+            sentences.append({"index": index, "html": html})
+            continue
+        spans += [
+            {
+                "id": n.id,
+                "class": n.html_class,
+                "status": n.status_class,
+                "wid": n.wid,
+            }
+            for o, n in zip(olds, news)
+            if o != n
+        ]
+    return {"spans": spans, "sentences": sentences}
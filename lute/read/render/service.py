@@ -7,12 +7,21 @@ import re
 from sqlalchemy import text as sqltext
 
 from lute.models.term import Term
-from lute.parse.base import ParsedToken
-from lute.read.render.calculate_textitems import get_textitems as calc_get_textitems
-from lute.read.render.multiword_indexer import MultiwordTermIndexer
+from lute.parse import token_stream
+from lute.read.render.calculate_textitems import (
+    find_multiword_matches,
+    get_status_text_lcs,
+    get_textitems as calc_get_textitems,
+    lowercase_tokens,
+)
+from lute.read.render.language_indexers import get_language_indexer
+from lute.read.render.term_statuses import get_term_statuses
 
 # from lute.utils.debug_helpers import DebugTimer
 
+# Max ids in a single "IN (...)" query.
+SQL_IN_CHUNK_SIZE = 500
+
 
 class Service:
     "Service."
@@ -34,59 +43,38 @@ class Service:
         tokens = language.get_parsed_tokens(cleaned)
         return self._find_all_terms_in_tokens(tokens, language)
 
-    def _get_multiword_terms(self, language):
-        "Get all multiword terms."
-        sql = sqltext(
-            """
-            SELECT WoID, WoTextLC FROM words
-            WHERE WoLgID=:language_id and WoTokenCount>1
-            """
-        )
-        sql = sql.bindparams(language_id=language.id)
-        return self.session.execute(sql).all()
-
-    def _find_all_multi_word_term_text_lcs_in_content(self, text_lcs, language):
-        "Find multiword terms, return list of text_lcs."
-
-        # There are a few ways of finding multi-word Terms
-        # (with token_count > 1) in the content:
-        #
-        # 1. load each mword term text_lc via sql and check.
-        # 2. using the model
-        # 3. SQL with "LIKE"
-        #
-        # During reasonable test runs with my data, the times in seconds
-        # for each are similar (~0.02, ~0.05, ~0.025).  This method is
-        # only used for small amounts of data, and the user experience hit
-        # is negligible, so I'll use the first method which IMO is the clearest
-        # code.
-
-        zws = "\u200B"  # zero-width space
-        content = zws + zws.join(text_lcs) + zws
-
-        # Method 1:
-        reclist = self._get_multiword_terms(language)
-        return [p[1] for p in reclist if f"{zws}{p[1]}{zws}" in content]
-
-        ## # Method 2: use the model.
-        ## contained_term_qry = self.session.query(Term).filter(
-        ##     Term.language == language,
-        ##     Term.token_count > 1,
-        ##     func.instr(content, Term.text_lc) > 0,
-        ## )
-        ## return [r.text_lc for r in contained_term_qry.all()]
-
-        ## # Method 3: Query with LIKE
-        ## sql = sqltext(
-        ##     """
-        ##     SELECT WoTextLC FROM words
-        ##     WHERE WoLgID=:lid and WoTokenCount>1
-        ##     AND :content LIKE '%' || :zws || WoTextLC || :zws || '%'
-        ##     """
-        ## )
-        ## sql = sql.bindparams(lid=language.id, content=content, zws=zws)
-        ## recs = self.session.execute(sql).all()
-        ## return [r[0] for r in recs]
+    def _find_lcs_and_matches(self, tokens, language, kwtree=None):
+        """
+        Get the lowercase text of the tokens, and the (text_lc, index)
+        of all of the multiword terms in the tokens.
+        """
+        tokens_lc = lowercase_tokens(tokens, language.parser)
+        if kwtree is None:
+            kwtree = self.get_multiword_indexer(language)
+        return tokens_lc, find_multiword_matches(tokens_lc, kwtree)
+
+    def _find_term_values(self, language, tokens_lc, matches):
+        """
+        Find the TermValues (id, status, etc) of all of the tokens
+        and multiword terms, from the language's term status
+        dictionary.
+        """
+        if language.id is None:
+            return []
+        statuses = get_term_statuses(self.session, language.id)
+        text_lcs = set(tokens_lc)
+        text_lcs.update(m[0] for m in matches)
+        return [statuses[lc] for lc in text_lcs if lc in statuses]
+
+    def _find_term_values_in_tokens(self, tokens, language, kwtree=None):
+        """
+        Find the TermValues (id, status, etc) of all terms contained in
+        the tokens, from the language's term status dictionary.
+        """
+        if language.id is None:
+            return []
+        tokens_lc, matches = self._find_lcs_and_matches(tokens, language, kwtree)
+        return self._find_term_values(language, tokens_lc, matches)
 
     def _find_all_terms_in_tokens(self, tokens, language, kwtree=None):
         """
@@ -101,89 +89,146 @@ class Service:
         Method:
         - build list of lowercase text in the tokens
         - append all multword term strings that exist in the content
-        - query for Terms that exist in the list
+        - look up the term ids in the language's term status dictionary
+        - load the Terms, in chunks so that large content doesn't hit
+          SQLite's limit on query parameters
+        """
+        ids = [v.id for v in self._find_term_values_in_tokens(tokens, language, kwtree)]
+        ret = []
+        for i in range(0, len(ids), SQL_IN_CHUNK_SIZE):
+            chunk = ids[i : i + SQL_IN_CHUNK_SIZE]
+            ret.extend(self.session.query(Term).filter(Term.id.in_(chunk)).all())
+        return ret
+
+    def _get_stored_tokens(self, text_ids, keys):
+        "Get the stored tokens for the text ids whose keys are still current."
+        ids = [i for i in text_ids if i is not None]
+        if len(ids) == 0:
+            return {}
+        sql = sqltext(
+            f"""
+            SELECT TtsTxID, TtsKey, TtsData FROM texttokenstreams
+            WHERE TtsTxID in ({', '.join(str(int(i)) for i in ids)})
+            """
+        )
+        current = dict(zip(text_ids, keys))
+        return {
+            txid: token_stream.decode(data)
+            for txid, key, data in self.session.execute(sql).all()
+            if current.get(txid) == key
+        }
+
+    def _store_tokens(self, text_id, key, tokens):
+        "Save the tokens for the text id, to be committed by the caller."
+        sql = sqltext(
+            """
+            INSERT OR REPLACE INTO texttokenstreams (TtsTxID, TtsKey, TtsData)
+            VALUES (:txid, :key, :data)
+            """
+        )
+        params = {"txid": text_id, "key": key, "data": token_stream.encode(tokens)}
+        self.session.execute(sql, params)
 
-        Note: this method only uses indexes for multiword terms, as any
-        content analyzed is first parsed into tokens before being passed
-        to this routine.  There's no need to search for single-word Terms
-        in the tokenized strings, they can be found by a simple query.
+    def _get_parsed_tokens_batch(self, cleaned, language, text_ids):
         """
+        Get the tokens for each cleaned string.
 
-        # Performance: About half of the time in this routine is spent in
-        # Step 1 (finding multiword terms), the rest in step 2 (the actual
-        # query).
-        # dt = DebugTimer("_find_all_terms_in_tokens", display=True)
+        If the string's text id is given, the tokens stored for the
+        text are used if still current, or the string is parsed and
+        the tokens are stored.
+        """
+        if text_ids is None:
+            return language.get_parsed_tokens_batch(cleaned)
 
         parser = language.parser
-        text_lcs = [parser.get_lowercase(t.token) for t in tokens]
+        keys = [token_stream.stream_key(parser, language, s) for s in cleaned]
+        ret = self._get_stored_tokens(text_ids, keys)
+        to_parse = [i for i, txid in enumerate(text_ids) if txid not in ret]
+        parsed = language.get_parsed_tokens_batch([cleaned[i] for i in to_parse])
+        results = [ret.get(txid) for txid in text_ids]
+        for i, tokens in zip(to_parse, parsed):
+            results[i] = tokens
+            if text_ids[i] is not None:
+                self._store_tokens(text_ids[i], keys[i], tokens)
+        return results
+
+    def get_textitems(self, s, language, multiword_term_indexer=None, text_id=None):
+        """
+        Get array of TextItems for the string s.
 
-        # Step 1: get the multiwords in the content.
-        if kwtree is None:
-            mword_terms = self._find_all_multi_word_term_text_lcs_in_content(
-                text_lcs, language
-            )
-        else:
-            results = kwtree.search_all(text_lcs)
-            mword_terms = [r[0] for r in results]
-        # dt.step("filtered mword terms")
-
-        # Step 2: load the Term objects.
-        #
-        # The Term fetch is actually performant -- there is no
-        # real difference between loading the Term objects versus
-        # loading raw data with SQL and getting dicts.
-        #
-        # Code for getting raw data:
-        # param_keys = [f"w{i}" for i, _ in enumerate(text_lcs)]
-        # keys_placeholders = ','.join([f":{k}" for k in param_keys])
-        # param_dict = dict(zip(param_keys, text_lcs))
-        # param_dict["langid"] = language.id
-        # sql = sqltext(f"""SELECT WoID, WoTextLC FROM words
-        #     WHERE WoLgID=:langid and WoTextLC in ({keys_placeholders})""")
-        # sql = sql.bindparams(language.id, *text_lcs)
-        # results = self.session.execute(sql, param_dict).fetchall()
-        text_lcs.extend(mword_terms)
-        tok_strings = list(set(text_lcs))
-        terms_matching_tokens_qry = self.session.query(Term).filter(
-            Term.text_lc.in_(tok_strings), Term.language == language
-        )
-        all_terms = terms_matching_tokens_qry.all()
-        # dt.step("exec query")
+        If no multiword_term_indexer is given, the language's
+        long-lived indexer is used.
 
-        return all_terms
+        If the Text id of s is given, its stored tokens are used if
+        they're current, rather than parsing s again.
+        """
+        cleaned = re.sub(r" +", " ", s)
+        tokens = self._get_parsed_tokens_batch([cleaned], language, [text_id])[0]
+        return self._get_textitems_for_tokens(tokens, language, multiword_term_indexer)
 
-    def get_textitems(self, s, language, multiword_term_indexer=None):
+    def get_textitems_batch(
+        self, strings, language, multiword_term_indexer=None, text_ids=None
+    ):
         """
-        Get array of TextItems for the string s.
+        Get an array of TextItem arrays, one for each string.
 
-        The multiword_term_indexer is a big performance boost, but takes
-        time to initialize.
+        All of the strings are parsed in a single parser call, which
+        is faster for parsers with a high per-call cost.  text_ids
+        are used as in get_textitems().
         """
-        # Hacky reset of state of ParsedToken state.
-        # _Shouldn't_ be needed but doesn't hurt, even if it's lame.
-        ParsedToken.reset_counters()
+        cleaned = [re.sub(r" +", " ", s) for s in strings]
+        return [
+            self._get_textitems_for_tokens(tokens, language, multiword_term_indexer)
+            for tokens in self._get_parsed_tokens_batch(cleaned, language, text_ids)
+        ]
 
-        cleaned = re.sub(r" +", " ", s)
-        tokens = language.get_parsed_tokens(cleaned)
-        terms = self._find_all_terms_in_tokens(tokens, language, multiword_term_indexer)
-        textitems = calc_get_textitems(tokens, terms, language, multiword_term_indexer)
-        return textitems
+    def _get_textitems_for_tokens(
+        self, tokens, language, multiword_term_indexer, calc=calc_get_textitems
+    ):
+        """
+        Find the terms for the tokens, and calculate the TextItems
+        (or whatever calc returns).  The tokens are only lowercased and
+        searched for multiword terms once.
+        """
+        if language.id is None and multiword_term_indexer is None:
+            return calc(tokens, [], language)
+        tokens_lc, matches = self._find_lcs_and_matches(
+            tokens, language, multiword_term_indexer
+        )
+        terms = self._find_term_values(language, tokens_lc, matches)
+        return calc(tokens, terms, language, tokens_lc=tokens_lc, matches=matches)
+
+    def get_status_text_lcs_batch(self, strings, language, text_ids=None):
+        """
+        Get the text_lc of the terms rendered in the strings, by
+        status, without making TextItems.  text_ids are used as in
+        get_textitems().
+        """
+        cleaned = [re.sub(r" +", " ", s) for s in strings]
+        mw = self.get_multiword_indexer(language)
+        ret = {}
+        for tokens in self._get_parsed_tokens_batch(cleaned, language, text_ids):
+            lcs = self._get_textitems_for_tokens(
+                tokens, language, mw, calc=get_status_text_lcs
+            )
+            for status, text_lcs in lcs.items():
+                ret.setdefault(status, set()).update(text_lcs)
+        return ret
 
     def get_multiword_indexer(self, language):
-        "Return indexer loaded with all multiword terms."
-        mw = MultiwordTermIndexer()
-        for r in self._get_multiword_terms(language):
-            mw.add(r[1])
-        return mw
+        """
+        Return indexer loaded with all multiword terms.
 
-    def get_paragraphs(self, s, language):
+        The indexer is built once per language and kept current as
+        terms change, see language_indexers.py.
         """
-        Get array of arrays of TextItems for the given string s.
+        return get_language_indexer(self.session, language.id)
 
-        This doesn't use an indexer, as it should only be used
-        for a single page of text!
+    def get_paragraphs(self, s, language, text_id=None):
+        """
+        Get array of arrays of TextItems for the given string s.
         """
-        textitems = self.get_textitems(s, language)
+        textitems = self.get_textitems(s, language, text_id=text_id)
 
         def _split_textitems_by_paragraph(textitems):
             "Split by ¶"
@@ -0,0 +1,272 @@
+"""
+Committed Term changes, for in-process caches of each language's terms.
+
+The caches (see language_indexers.py and term_statuses.py) are kept
+current in two ways:
+
+- Terms created, changed, or deleted through the ORM are recorded
+  by the session events below, and passed to the commit listeners
+  when the session commits, so the caches can be updated in place.
+
+- Any change to the words table (including raw SQL, triggers, or
+  another process) increments the language's counters in the
+  languagetermchanges table.  Each cache records the counts it
+  reflects, and reloads if the db counts differ.
+
+The recorded changes can only be applied if the counts changed by
+exactly the number of recorded changes.  For example, if a term's
+status change is passed on by db triggers to terms that "follow"
+it, the count goes up by more than one, and the caches reload.
+"""
+
+from collections import namedtuple
+from sqlalchemy import event, text as sqltext
+from sqlalchemy.orm import Session, attributes
+
+from lute.models.term import Term
+from lute.models.language import Language
+
+
+# Indexes of the counts in the (multiword, all) count tuples.
+MULTIWORD = 0
+ALL = 1
+
+TermValues = namedtuple(
+    "TermValues", ["id", "language_id", "text_lc", "status", "token_count"]
+)
+
+
+class LanguageChanges:
+    """
+    A language's committed term changes.
+
+    changes is a list of (old, new) TermValues, either of which is
+    None if the term was created or deleted.  start and end are the
+    (multiword, all) counts before and after the changes, and
+    exact[i] is True if the changes account for all of count i's
+    changes.
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.end = start
+        self.exact = [True, True]
+        self.changes = []
+
+    def add_flush(self, before, after, expected, changes):
+        "Add the changes of a flush."
+        for i in (MULTIWORD, ALL):
+            ok = self.end[i] == before[i] and after[i] - before[i] == expected[i]
+            self.exact[i] = self.exact[i] and ok
+        self.end = after
+        self.changes.extend(changes)
+
+    def invalidate(self):
+        "The changes can't be applied."
+        self.exact = [False, False]
+
+    def multiword_ops(self):
+        "Changes as ('add' or 'remove', text_lc) of multiword terms."
+
+        def _key(v):
+            if v is None or (v.token_count or 0) <= 1:
+                return None
+            return (v.text_lc, v.token_count, v.language_id)
+
+        ops = []
+        for old, new in self.changes:
+            oldkey, newkey = _key(old), _key(new)
+            if oldkey == newkey:
+                continue
+            if oldkey is not None:
+                ops.append(("remove", old.text_lc))
+            if newkey is not None:
+                ops.append(("add", new.text_lc))
+        return ops
+
+
+__COMMIT_LISTENERS__ = []
+
+_BEFORE_KEY = "lute_term_change_counts"
+_CHANGES_KEY = "lute_term_changes"
+
+
+def add_commit_listener(fn):
+    """
+    Call fn({language id: LanguageChanges}) after each commit with
+    term changes.
+    """
+    if fn not in __COMMIT_LISTENERS__:
+        __COMMIT_LISTENERS__.append(fn)
+
+
+def get_change_counts(conn, language_ids=None):
+    """
+    Get the (multiword, all) change counts for the language ids, or
+    for all languages with changes if no ids are given.
+    """
+    sql = """
+        SELECT LtcLgID, LtcMultiwordChanges, LtcChanges
+        FROM languagetermchanges
+    """
+    ret = {}
+    if language_ids is not None:
+        if len(language_ids) == 0:
+            return {}
+        ids = ", ".join(str(int(i)) for i in language_ids)
+        sql += f" WHERE LtcLgID in ({ids})"
+        ret = {lgid: (0, 0) for lgid in language_ids}
+    for lgid, mw, allcount in conn.execute(sqltext(sql)).all():
+        ret[lgid] = (mw, allcount)
+    return ret
+
+
+def add_sql_changes(session, language_id, before, changes):
+    """
+    Record term changes made with SQL rather than through the ORM,
+    to be passed to the commit listeners like flushed changes.
+
+    before is the language's counts from get_change_counts() before
+    the SQL ran, and changes are (old, new) TermValues as recorded
+    for flushes.  If the counts didn't change by exactly the number
+    of changes (e.g. some rows were ignored), the caches reload.
+    """
+    after = get_change_counts(session.connection(), [language_id])[language_id]
+    expected = [0, len(changes)]
+    expected[MULTIWORD] = len([c for c in changes if _is_multiword_change(*c)])
+    info = session.info.setdefault(_CHANGES_KEY, {})
+    rec = info.setdefault(language_id, LanguageChanges(before))
+    rec.add_flush(before, after, expected, changes)
+
+
+def _old_and_new(obj, key):
+    "Get the committed and current values of the attribute."
+    hist = attributes.get_history(obj, key)
+    old = (hist.deleted or hist.unchanged or [None])[0]
+    new = (hist.added or hist.unchanged or [None])[0]
+    return old, new
+
+
+def _term_values(t):
+    "Old and new TermValues of the term, before a flush is finished."
+    keys = ("language_id", "text_lc", "status", "token_count")
+    hists = {k: _old_and_new(t, k) for k in keys}
+    old = TermValues(t.id, *[hists[k][0] for k in keys])
+    new = TermValues(t.id, *[hists[k][1] for k in keys])
+    if t.language is not None:
+        new = new._replace(language_id=t.language.id)
+    return old, new
+
+
+def _is_multiword_change(old, new):
+    "True if the change is counted by LtcMultiwordChanges."
+    if old is None or new is None:
+        return ((old or new).token_count or 0) > 1
+    if (old.token_count or 0) <= 1 and (new.token_count or 0) <= 1:
+        return False
+    return (old.text_lc, old.token_count, old.language_id) != (
+        new.text_lc,
+        new.token_count,
+        new.language_id,
+    )
+
+
+def _get_flushed_changes(session):
+    """
+    Get the term changes of the session's flush, by language id,
+    the number of changes each language's counts should go up by,
+    and the ids of languages whose changes can't be known.
+    """
+    changes = []
+    invalid = set()
+
+    for t in session.new:
+        if isinstance(t, Term):
+            changes.append((None, _term_values(t)[1]))
+    for t in session.dirty:
+        if isinstance(t, Term):
+            old, new = _term_values(t)
+            if old != new:
+                changes.append((old, new))
+    for obj in session.deleted:
+        if isinstance(obj, Language):
+            invalid.add(obj.id)
+        elif isinstance(obj, Term):
+            old = _term_values(obj)[0]
+            if None in (old.text_lc, old.token_count, old.language_id):
+                invalid.add(old.language_id)
+            else:
+                changes.append((old, None))
+
+    by_language = {}
+    expected = {}
+    for old, new in changes:
+        is_mw = _is_multiword_change(old, new)
+        lgids = {v.language_id for v in (old, new) if v is not None}
+        for lgid in lgids:
+            e = expected.setdefault(lgid, [0, 0])
+            e[ALL] += 1
+            e[MULTIWORD] += 1 if is_mw else 0
+            by_language.setdefault(lgid, []).append(
+                (
+                    old if old is not None and old.language_id == lgid else None,
+                    new if new is not None and new.language_id == lgid else None,
+                )
+            )
+    invalid.discard(None)
+    return by_language, expected, invalid
+
+
+def _has_term_changes(session):
+    "True if the session's flush may change terms."
+    return any(
+        isinstance(obj, Term)
+        for objs in (session.new, session.dirty, session.deleted)
+        for obj in objs
+    ) or any(isinstance(obj, Language) for obj in session.deleted)
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):  # pylint: disable=unused-argument
+    "Record the change counts before term changes are flushed."
+    if _has_term_changes(session):
+        session.info[_BEFORE_KEY] = get_change_counts(session.connection())
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):  # pylint: disable=unused-argument
+    "Record the flushed term changes."
+    before = session.info.pop(_BEFORE_KEY, None)
+    if before is None:
+        return
+    by_language, expected, invalid = _get_flushed_changes(session)
+    lgids = set(by_language) | invalid
+    if len(lgids) == 0:
+        return
+    after = get_change_counts(session.connection(), lgids)
+    info = session.info.setdefault(_CHANGES_KEY, {})
+    for lgid in lgids:
+        b = before.get(lgid, (0, 0))
+        rec = info.setdefault(lgid, LanguageChanges(b))
+        rec.add_flush(
+            b, after[lgid], expected.get(lgid, [0, 0]), by_language.get(lgid, [])
+        )
+        if lgid in invalid:
+            rec.invalidate()
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    "Pass the committed changes to the listeners."
+    info = session.info.pop(_CHANGES_KEY, None)
+    if not info:
+        return
+    for fn in __COMMIT_LISTENERS__:
+        fn(info)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    "Discard the changes."
+    session.info.pop(_CHANGES_KEY, None)
+    session.info.pop(_BEFORE_KEY, None)
@@ -0,0 +1,78 @@
+"""
+In-process term status dictionaries, one per language.
+
+Rendering a page needs the id, status, and token count of each term
+in it.  Each language's terms are loaded once into a dict of text_lc
+to TermValues, so pages can be rendered without querying the words
+table.
+
+Terms created, changed, or deleted through the ORM are written
+through to the dict when the session commits.  Other changes (e.g.
+bulk status updates in SQL, or statuses passed on to "following"
+terms by db triggers) are caught by the languagetermchanges counter,
+and the dict is reloaded.  See term_changes.py.
+"""
+
+import threading
+from sqlalchemy import text as sqltext
+
+from lute.read.render.term_changes import (
+    ALL,
+    TermValues,
+    add_commit_listener,
+    get_change_counts,
+)
+
+
+# language id => (change count, {text_lc: TermValues})
+__LANGUAGE_STATUSES__ = {}
+__LOCK__ = threading.Lock()
+
+
+def reset_term_statuses():
+    "Discard all dicts, e.g. if the database is replaced."
+    with __LOCK__:
+        __LANGUAGE_STATUSES__.clear()
+
+
+def get_term_statuses(session, language_id):
+    "Get the dict of text_lc to TermValues for all of the language's terms."
+    count = get_change_counts(session.connection(), [language_id])[language_id][ALL]
+    with __LOCK__:
+        cached = __LANGUAGE_STATUSES__.get(language_id)
+    if cached is not None and cached[0] == count:
+        return cached[1]
+
+    sql = sqltext(
+        """
+        SELECT WoID, WoLgID, WoTextLC, WoStatus, WoTokenCount FROM words
+        WHERE WoLgID=:language_id
+        """
+    )
+    rows = session.execute(sql, {"language_id": language_id}).all()
+    statuses = {r[2]: TermValues(*r) for r in rows}
+    with __LOCK__:
+        __LANGUAGE_STATUSES__[language_id] = (count, statuses)
+    return statuses
+
+
+def _apply_committed_changes(changes):
+    "Write committed term changes through to the dicts, or discard them."
+    with __LOCK__:
+        for lgid, rec in changes.items():
+            cached = __LANGUAGE_STATUSES__.get(lgid)
+            if cached is None:
+                continue
+            if not rec.exact[ALL] or cached[0] != rec.start[ALL]:
+                del __LANGUAGE_STATUSES__[lgid]
+                continue
+            statuses = cached[1]
+            for old, new in rec.changes:
+                if old is not None:
+                    statuses.pop(old.text_lc, None)
+                if new is not None:
+                    statuses[new.text_lc] = new
+            __LANGUAGE_STATUSES__[lgid] = (rec.end[ALL], statuses)
+
+
+add_commit_listener(_apply_committed_changes)
@@ -9,12 +9,30 @@ class TextItem:  # pylint: disable=too-many-instance-attributes
 
     Data structure for template read/textitem.html
 
-    Some elements are lazy loaded, because they're only needed in
-    certain situations.
+    A page has thousands of these, so they use __slots__, and the
+    display text and html classes are only calculated once.
     """
 
+    __slots__ = (
+        "index",
+        "lang_id",
+        "text",
+        "text_lc",
+        "is_word",
+        "token_count",
+        "_display_count",
+        "sentence_number",
+        "paragraph_number",
+        "_term",
+        "wo_status",
+        "extra_html_classes",
+        "_display_text",
+        "_html_class_string",
+    )
+
     def __init__(self, term=None):
         self.index: int
+        # lang_id is only set for items with terms.
         self.lang_id: int
         self.text: str  # The original, un-overlapped text.
         self.text_lc: str
@@ -25,16 +43,18 @@ class TextItem:  # pylint: disable=too-many-instance-attributes
 
         # Number of tokens that should be displayed, starting from the
         # end of the string.
-        self.display_count: int = 1
+        self._display_count: int = 1
 
         self.sentence_number: int = 0
         self.paragraph_number: int = 0
 
+        self.extra_html_classes = []
+        self._display_text = None
+        self._html_class_string = None
+
         # Calls setter
         self.term = term
 
-        self.extra_html_classes = []
-
         # TODO code
         # # The flash message can be None, so we need an extra flag
         # # to determine if it has been loaded or not.
@@ -46,6 +66,10 @@ class TextItem:  # pylint: disable=too-many-instance-attributes
 
     @property
     def term(self):
+        """
+        The term: a Term, or a read-only render term
+        (term_changes.TermValues) with the id, status, etc.
+        """
         return self._term
 
     @property
@@ -59,11 +83,26 @@ class TextItem:  # pylint: disable=too-many-instance-attributes
     def term(self, t):
         self.wo_status = None
         self._term = t
+        self._html_class_string = None
         if t is None:
             return
-        self.lang_id = t.language.id
+        self.lang_id = t.language_id
+        if self.lang_id is None:
+            # New unsaved Term.
+            self.lang_id = t.language.id
         self.wo_status = t.status
 
+    @property
+    def display_count(self):
+        "Number of tokens displayed."
+        return self._display_count
+
+    @display_count.setter
+    def display_count(self, n):
+        self._display_count = n
+        self._display_text = None
+        self._html_class_string = None
+
     # TODO - reactivate with non-lazy query results.
     # @property
     # def flash_message(self):
@@ -83,9 +122,13 @@ class TextItem:  # pylint: disable=too-many-instance-attributes
     @property
     def display_text(self):
         "Show last n tokens, if some of the textitem is covered."
-        toks = self.text.split(zws)
-        disp_toks = toks[-self.display_count :]
-        return zws.join(disp_toks)
+        if self._display_text is None:
+            if self._display_count == self.token_count:
+                self._display_text = self.text
+            else:
+                toks = self.text.split(zws)
+                self._display_text = zws.join(toks[-self._display_count :])
+        return self._display_text
 
     @property
     def html_display_text(self):
@@ -111,12 +154,19 @@ class TextItem:  # pylint: disable=too-many-instance-attributes
     def add_html_class(self, c):
         "Add extra class to term."
         self.extra_html_classes.append(c)
+        self._html_class_string = None
 
     @property
     def html_class_string(self):
         """
         Create class string for TextItem.
         """
+        if self._html_class_string is None:
+            self._html_class_string = self._calc_html_class_string()
+        return self._html_class_string
+
+    def _calc_html_class_string(self):
+        "Calculate the class string."
         if self.is_word == 0:
             return "textitem"
 
@@ -4,6 +4,7 @@
 
 from flask import Blueprint, flash, request, render_template, redirect, jsonify
 from lute.read.service import Service
+from lute.read.prerender import schedule_prerender, cancel_prerender
 from lute.read.forms import TextForm
 from lute.term.model import Repository
 from lute.term.routes import handle_term_form
@@ -47,6 +48,15 @@ def _find_book(bookid):
     return br.find(bookid)
 
 
+def _prerender_next_page(book, pagenum):
+    "Render the page after pagenum in the background, if there is one."
+    pagenum = book.page_in_range(pagenum)
+    if pagenum < book.page_count:
+        schedule_prerender(book.id, pagenum + 1)
+    else:
+        cancel_prerender(book.id)
+
+
 @bp.route("/<int:bookid>", methods=["GET"])
 def read(bookid):
     """
@@ -106,6 +116,8 @@ def page_done():
 
     service = Service(db.session)
     service.mark_page_read(bookid, pagenum, restknown)
+    # Marking the rest as known changes the terms on the next page.
+    _prerender_next_page(_find_book(bookid), pagenum)
     return jsonify("ok")
 
 
@@ -180,8 +192,9 @@ def start_reading(bookid, pagenum):
         flash(f"No book matching id {bookid}")
         return redirect("/", 302)
     service = Service(db.session)
-    paragraphs = service.start_reading(book, pagenum)
-    return render_template("read/page_content.html", paragraphs=paragraphs)
+    html = service.get_page_content(book, pagenum, True)
+    _prerender_next_page(book, pagenum)
+    return html
 
 
 @bp.route("/refresh_page/<int:bookid>/<int:pagenum>", methods=["GET"])
@@ -192,8 +205,21 @@ def refresh_page(bookid, pagenum):
         flash(f"No book matching id {bookid}")
         return redirect("/", 302)
     service = Service(db.session)
-    paragraphs = service.get_paragraphs(book, pagenum)
-    return render_template("read/page_content.html", paragraphs=paragraphs)
+    return service.get_page_content(book, pagenum)
+
+
+@bp.route("/page_changes/<int:bookid>/<int:pagenum>", methods=["GET"])
+def page_changes(bookid, pagenum):
+    """
+    Called by ajax after terms are saved.  Returns the changed spans
+    and sentences since the page was last rendered, or null if the
+    page must be reloaded with refresh_page.
+    """
+    book = _find_book(bookid)
+    if book is None:
+        return jsonify(None)
+    service = Service(db.session)
+    return jsonify(service.get_page_changes(book, pagenum))
 
 
 @bp.route("/empty", methods=["GET"])
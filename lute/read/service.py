@@ -5,12 +5,22 @@ Reading helpers.
 from collections import defaultdict
 from datetime import datetime
 import functools
+from sqlalchemy import text as sqltext
 from lute.models.term import Term, Status
 from lute.models.book import Text, WordsRead
 from lute.models.repositories import BookRepository, UserSettingRepository
 from lute.book.stats import Service as StatsService
-from lute.read.render.service import Service as RenderService
+from lute.parse import token_stream
+from lute.read.render.service import Service as RenderService, SQL_IN_CHUNK_SIZE
 from lute.read.render.calculate_textitems import get_string_indexes
+from lute.read.render.page_cache import get_page_cache
+from lute.read.render.page_diff import page_diff, render_page
+from lute.read.render.term_changes import (
+    ALL,
+    TermValues,
+    add_sql_changes,
+    get_change_counts,
+)
 from lute.term.model import Repository
 
 # from lute.utils.debug_helpers import DebugTimer
@@ -101,26 +111,26 @@ class Service:
         for any new Terms.
         """
         rs = RenderService(self.session)
-        paragraphs = rs.get_paragraphs(text.text, text.book.language)
-        self._save_new_status_0_terms(paragraphs)
-
-        unknowns = [
-            ti.term
-            for para in paragraphs
-            for sentence in para
-            for ti in sentence
-            if ti.is_word and ti.term.status == 0
-        ]
+        paragraphs = rs.get_paragraphs(text.text, text.book.language, text.id)
+        self._save_new_status_0_terms(paragraphs, text.book.language)
+
+        unknown_ids = list(
+            {
+                ti.wo_id
+                for para in paragraphs
+                for sentence in para
+                for ti in sentence
+                if ti.is_word and ti.wo_status == 0
+            }
+        )
 
         batch_size = 100
-        i = 0
-
-        for t in unknowns:
-            t.status = Status.WELLKNOWN
-            self.session.add(t)
-            i += 1
-            if i % batch_size == 0:
-                self.session.commit()
+        for i in range(0, len(unknown_ids), batch_size):
+            batch = unknown_ids[i : i + batch_size]
+            for t in self.session.query(Term).filter(Term.id.in_(batch)).all():
+                t.status = Status.WELLKNOWN
+                self.session.add(t)
+            self.session.commit()
 
         # Commit any remaining.
         self.session.commit()
@@ -138,22 +148,89 @@ class Service:
             repo.add(t)
         repo.commit()
 
-    def _save_new_status_0_terms(self, paragraphs):
-        "Add status 0 terms for new textitems in paragraph."
+    def _get_term_values(self, language_id, text_lcs):
+        "Get the {text_lc: TermValues} of the saved terms."
+        ret = {}
+        for i in range(0, len(text_lcs), SQL_IN_CHUNK_SIZE):
+            chunk = text_lcs[i : i + SQL_IN_CHUNK_SIZE]
+            params = {f"lc{j}": lc for j, lc in enumerate(chunk)}
+            sql = f"""
+                SELECT WoID, WoLgID, WoTextLC, WoStatus, WoTokenCount FROM words
+                WHERE WoLgID = :lgid AND WoTextLC IN ({', '.join(':' + k for k in params)})
+            """
+            params["lgid"] = language_id
+            for row in self.session.execute(sqltext(sql), params).all():
+                ret[row[2]] = TermValues(*row)
+        return ret
+
+    def _insert_status_0_terms(self, language, texts):
+        """
+        Insert status 0 terms for the {text_lc: text} texts, and
+        return the saved {text_lc: TermValues}, and the number of
+        terms inserted.
+
+        The terms are inserted with a single executemany, rather than
+        through the ORM.  Terms that already exist (e.g. created by
+        another page open) are ignored by the WoTextLCLgID unique
+        index, and the saved values are read back.
+        """
+        if len(texts) == 0:
+            return {}, 0
+        conn = self.session.connection()
+        before = get_change_counts(conn, [language.id])[language.id]
+
+        # Note: the terms are created _without parsing_ because some
+        # parsers break up characters when the words are given out of
+        # context.
+        text_lcs = list(texts.keys())
+        readings = language.parser.get_readings([texts[lc] for lc in text_lcs])
+        zws = "\u200B"
+        params = [
+            {
+                "lgid": language.id,
+                "text": texts[lc],
+                "text_lc": lc,
+                "reading": reading,
+                "token_count": texts[lc].count(zws) + 1,
+            }
+            for lc, reading in zip(text_lcs, readings)
+        ]
+        sql = """
+            INSERT OR IGNORE INTO words
+            (WoLgID, WoText, WoTextLC, WoStatus, WoRomanization, WoTokenCount)
+            VALUES (:lgid, :text, :text_lc, 0, :reading, :token_count)
+        """
+        added = self.session.execute(sqltext(sql), params).rowcount
+
+        saved = self._get_term_values(language.id, text_lcs)
+        add_sql_changes(
+            self.session,
+            language.id,
+            before,
+            [(None, saved[lc]) for lc in text_lcs],
+        )
+        self.session.commit()
+        return saved, added
+
+    def _save_new_status_0_terms(self, paragraphs, language):
+        "Add status 0 terms for new textitems in paragraph, return the count added."
         tis_with_new_terms = [
             ti
             for para in paragraphs
             for sentence in para
             for ti in sentence
-            if ti.is_word and ti.term.id is None and ti.term.status == 0
+            if ti.is_word and ti.wo_id is None and ti.wo_status == 0
         ]
 
+        # Using the case of the last instance.
+        texts = {ti.text_lc: ti.text for ti in tis_with_new_terms}
+        saved, added = self._insert_status_0_terms(language, texts)
         for ti in tis_with_new_terms:
-            self.session.add(ti.term)
-        self.session.commit()
+            ti.term = saved[ti.text_lc]
+        return added
 
-    def _get_reading_data(self, dbbook, pagenum, track_page_open=False):
-        "Get paragraphs, set text.start_date if needed."
+    def _open_page(self, dbbook, pagenum, track_page_open):
+        "Get the page's text, set text.start_date if needed."
         text = dbbook.text_at_page(pagenum)
         text.load_sentences()
         svc = StatsService(self.session)
@@ -166,14 +243,112 @@ class Service:
         self.session.add(dbbook)
         self.session.add(text)
         self.session.commit()
+        return text
+
+    def _render_page(self, text, paragraphs=None):
+        """
+        Get the text's paragraphs, saving new status 0 terms.
 
+        paragraphs are the text's already rendered paragraphs, if any
+        (see prerender_page()).
+        """
         lang = text.book.language
-        rs = RenderService(self.session)
-        paragraphs = rs.get_paragraphs(text.text, lang)
-        self._save_new_status_0_terms(paragraphs)
+        if paragraphs is None:
+            rs = RenderService(self.session)
+            paragraphs = rs.get_paragraphs(text.text, lang, text.id)
+        added = self._save_new_status_0_terms(paragraphs, lang)
+        return paragraphs, added
 
+    def _get_reading_data(self, dbbook, pagenum, track_page_open=False):
+        "Get paragraphs, set text.start_date if needed."
+        text = self._open_page(dbbook, pagenum, track_page_open)
+        paragraphs, _ = self._render_page(text)
         return paragraphs
 
+    def _term_change_count(self, language):
+        "The language's term change count, see render/term_changes.py."
+        conn = self.session.connection()
+        return get_change_counts(conn, [language.id])[language.id][ALL]
+
+    def _get_page(self, text, cancelled=None):
+        """
+        Get the page html and state, from the page cache if current.
+
+        The cache key is the text and parser settings, and the
+        language's term change count.  Saving the page's new status 0
+        terms changes the count, so the html is cached with the count
+        after they're saved.  If something else changed the language's
+        terms during rendering, the counts don't add up, and only the
+        page state is kept.
+
+        Returns None if cancelled() is True before rendering starts.
+        """
+        lang = text.book.language
+        cache = get_page_cache()
+        with cache.render_lock(lang.id):
+            skey = token_stream.stream_key(lang.parser, lang, text.text)
+            start = self._term_change_count(lang)
+            html = cache.get(text.id, f"{skey}:{start}")
+            if html is not None:
+                return html, cache.get_state(text.id)
+            if cancelled is not None and cancelled():
+                return None
+
+            paragraphs = cache.pop_paragraphs(text.id, f"{skey}:{start}")
+            paragraphs, added = self._render_page(text, paragraphs)
+            html, state = render_page(paragraphs)
+            end = self._term_change_count(lang)
+            key = f"{skey}:{end}" if end == start + added else None
+            cache.put(text.id, key, html, state)
+            return html, state
+
+    def get_page_content(self, dbbook, pagenum, track_page_open=False):
+        "Get the page html, set text.start_date if needed."
+        text = self._open_page(dbbook, pagenum, track_page_open)
+        return self._get_page(text)[0]
+
+    def prerender_page(self, dbbook, pagenum, cancelled=None, save_terms=False):
+        """
+        Render the page into the page cache, without opening it.
+        Called by read/prerender.py.
+
+        If save_terms, the page's new status 0 terms are saved and
+        its html is cached.  Otherwise nothing is written to the db:
+        the page is only parsed and its terms found, and the
+        paragraphs are kept for when the page is opened, if the
+        language's terms haven't changed by then.
+        """
+        text = dbbook.text_at_page(pagenum)
+        if save_terms:
+            self._get_page(text, cancelled)
+            return
+
+        lang = text.book.language
+        cache = get_page_cache()
+        with cache.render_lock(lang.id):
+            skey = token_stream.stream_key(lang.parser, lang, text.text)
+            key = f"{skey}:{self._term_change_count(lang)}"
+            if cache.get(text.id, key) is not None:
+                return
+            if cancelled is not None and cancelled():
+                return
+            # No text id, so the parsed tokens aren't stored.
+            paragraphs = RenderService(self.session).get_paragraphs(text.text, lang)
+            cache.put_paragraphs(text.id, key, paragraphs)
+
+    def get_page_changes(self, dbbook, pagenum):
+        """
+        Get the changes to the page since it was last rendered, as
+        returned by page_diff(), e.g. after terms were saved.
+
+        Returns None if the full page must be reloaded.
+        """
+        text = dbbook.text_at_page(pagenum)
+        old = get_page_cache().get_state(text.id)
+        if old is None:
+            return None
+        return page_diff(old, self._get_page(text)[1])
+
     def get_paragraphs(self, dbbook, pagenum):
         "Get the paragraphs for the book."
         return self._get_reading_data(dbbook, pagenum, False)
@@ -1110,6 +1110,59 @@ function make_status_update_hash(new_status, elements) {
 }
 
 
+/**
+ * Update the page text after terms are saved.
+ *
+ * Only the changed spans and sentences are fetched and updated in
+ * place; the full page is reloaded if the server can't give the
+ * changes (e.g. the page isn't cached, or the text was edited).
+ * on_done is called after either.
+ */
+function update_page_text(on_done) {
+  const bookid = $('#book_id').val();
+  const pagenum = $('#page_num').val();
+
+  let reload_page = function() {
+    const url = `/read/refresh_page/${bookid}/${pagenum}`;
+    $('#thetext').load(url, on_done);
+  };
+
+  let apply_changes = function(changes) {
+    const sentences = $('#thetext span.textsentence');
+    for (const s of changes.sentences) {
+      $(sentences[s.index]).replaceWith(s.html);
+    }
+    for (const c of changes.spans) {
+      const el = $(`#${c.id}`);
+      el.attr('class', c.class);
+      el.attr('data-status-class', c.status).data('status-class', c.status);
+      if (c.wid == null)
+        el.removeAttr('data-wid').removeData('wid');
+      else
+        el.attr('data-wid', c.wid).data('wid', c.wid);
+    }
+    // Same as a full reload: see read/page_content.html.
+    $('span.wordhover').removeClass('wordhover');
+    reset_cursor_marker();
+    add_status_classes();
+    on_done();
+  };
+
+  $.ajax({
+    url: `/read/page_changes/${bookid}/${pagenum}`,
+    type: 'get',
+    dataType: 'JSON',
+    success: function(changes) {
+      if (changes == null)
+        reload_page();
+      else
+        apply_changes(changes);
+    },
+    error: reload_page
+  });
+}
+
+
 function post_bulk_update(updates) {
   if (updates.length == 0) {
     // console.log("No updates.");
@@ -1133,14 +1186,6 @@ function post_bulk_update(updates) {
       $('span.wordhover').removeClass('wordhover');
   };
 
-  let reload_text_div = function() {
-    const bookid = $('#book_id').val();
-    const pagenum = $('#page_num').val();
-    const url = `/read/refresh_page/${bookid}/${pagenum}`;
-    const repel = $('#thetext');
-    repel.load(url, re_mark_selected_ids);
-  };
-
   $.ajax({
     url: '/term/bulk_update_status',
     type: 'post',
@@ -1148,7 +1193,7 @@ function post_bulk_update(updates) {
     dataType: 'JSON',
     contentType: 'application/json',
     success: function(response) {
-      reload_text_div();
+      update_page_text(re_mark_selected_ids);
       if (elements.length == 1) {
         update_term_form(firstel, first_status);
       }
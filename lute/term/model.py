@@ -14,6 +14,7 @@ from lute.models.repositories import (
     TermRepository,
     TermTagRepository,
 )
+from lute.term.search_index import find_matches
 
 
 class Term:  # pylint: disable=too-many-instance-attributes
@@ -195,9 +196,9 @@ class Repository:
 
     def find_matches(self, langid, text, max_results=50):
         """
-        Return array of Term business objects for the DBTerms
+        Return array of TermMatches for the DBTerms
         with the same langid, matching the text.
-        If no match, return [].
+        If no match, return [].  See search_index.py.
         """
         spec = self._search_spec_term(langid, text)
         text_lc = spec.text_lc
@@ -205,41 +206,7 @@ class Repository:
         if search == "":
             return []
 
-        sql_query = """SELECT
-        t.WoID as id,
-        t.WoText as text,
-        t.WoTextLC as text_lc,
-        t.WoTranslation as translation,
-        t.WoStatus as status,
-        t.WoLgID as language_id,
-        CASE WHEN wp.WpParentWoID IS NOT NULL THEN 1 ELSE 0 END AS has_children,
-        CASE WHEN t.WoTextLC = :text_lc THEN 2
-          WHEN t.WoTextLC LIKE :text_lc_starts_with THEN 1
-          ELSE 0
-        END as text_starts_with_search_string
-
-        FROM words AS t
-        LEFT JOIN (
-          select WpParentWoID from wordparents group by WpParentWoID
-        ) wp on wp.WpParentWoID = t.WoID
-
-        WHERE t.WoLgID = :langid AND t.WoTextLC LIKE :text_lc_wildcard
-
-        ORDER BY text_starts_with_search_string DESC, has_children DESC, t.WoTextLC
-        LIMIT :max_results
-        """
-        # print(sql_query)
-        params = {
-            "text_lc": text_lc,
-            "text_lc_wildcard": f"%{text_lc}%",
-            "text_lc_starts_with": f"{text_lc}%",
-            "langid": langid,
-            "max_results": max_results,
-        }
-        # print(params)
-
-        alchsql = sqlalchemy.text(sql_query)
-        return self.session.execute(alchsql, params).fetchall()
+        return find_matches(self.session, langid, text_lc, max_results)
 
     def get_term_tags(self):
         "Get all available term tags, helper method."
@@ -427,6 +394,10 @@ class ReferencesRepository:
     Lookup terms.
     """
 
+    # Max text_lcs searched per query: each is a SELECT in a compound
+    # SELECT, and sqlite allows at most 500.
+    QUERY_CHUNK_SIZE = 400
+
     def __init__(self, _session, limit=20, include_unread=False):
         "Init."
         self.session = _session
@@ -461,11 +432,33 @@ class ReferencesRepository:
         return self._find_references(searchterm)
 
     def _find_references(self, searchterm):
-        "Find refs."
+        "Find refs for the term, its children, and its parents' families."
+        if searchterm is None:
+            return {"term": [], "children": [], "parents": []}
+
+        families = []
+        for parent in searchterm.parents:
+            family = [parent] + parent.children
+            families.append((parent, [t for t in family if t.id != searchterm.id]))
+
+        # All of the family's refs are found in a single query.
+        all_terms = [searchterm] + searchterm.children
+        for _, family in families:
+            all_terms += family
+        refs = self._get_references_by_text_lc(
+            searchterm.language.id, [t.text_lc for t in all_terms]
+        )
+
+        def _refs(terms):
+            return [r for t in terms for r in refs.get(t.text_lc, [])]
+
         references = {
-            "term": self._get_references(searchterm),
-            "children": self._get_child_references(searchterm),
-            "parents": self._get_parent_references(searchterm),
+            "term": _refs([searchterm]),
+            "children": _refs(searchterm.children),
+            "parents": [
+                {"term": parent.text_lc, "refs": _refs(family)}
+                for parent, family in families
+            ],
         }
         return references
 
@@ -484,77 +477,111 @@ class ReferencesRepository:
             ret.append(TermReference(row[0], row[1], row[2], row[3], sentence))
         return ret
 
-    def _get_references(self, term):
+    def _matching_sentences_sql(self, i, term_lc, params):
         """
-        Search the sentences.text_content (or textlc_content if needed).
+        Sql selecting (i, SeID) for the sentences containing term_lc,
+        adding its query params.
+
+        Only the sentences that have all of the term's tokens are
+        checked, from the sentencetokens index (saved when sentences
+        are loaded), rather than scanning every sentence with LIKE.
+        """
+        zws = chr(0x200B)  # zero-width space
+        tokens = {t for t in term_lc.split(zws) if t.strip() != "" and t != "¶"}
+        candidates = ""
+        if len(tokens) > 0:
+            selects = []
+            for j, t in enumerate(sorted(tokens)):
+                params[f"t{i}_{j}"] = t
+                selects.append(
+                    f"SELECT StSeID FROM sentencetokens WHERE StTokenLC = :t{i}_{j}"
+                )
+            candidates = f"""
+                INNER JOIN (
+                    { " INTERSECT ".join(selects) }
+                ) cands ON cands.StSeID = SeID"""
+        params[f"pattern{i}"] = f"%{zws}{term_lc}{zws}%"
+        return f"""
+            SELECT {i} AS TermIdx, SeID
+            FROM sentences{ candidates }
+            WHERE SeText IS NOT NULL
+            AND CASE WHEN SeTextLC == '*' THEN SeText ELSE SeTextLC END LIKE :pattern{i}"""
+
+    def _get_references_by_text_lc(self, language_id, text_lcs):
+        """
+        Search the sentences.text_content (or textlc_content if needed)
+        for all of the text_lcs at once, returning a dict of text_lc =>
+        up to self.limit TermReferences, most recently read first.
 
         sentence.textlc_content is set to '*' if a call to sqlite's LOWER
         returns the same data as using the sentence Language.parser.  This
         saves a pile of space, at least in my case with Spanish, as only
         0.5% of the lowercased sentences actually differ.
         """
-        if term is None:
-            return []
+        text_lcs = list(dict.fromkeys(text_lcs))
+        ret = {}
+        n = self.QUERY_CHUNK_SIZE
+        for i in range(0, len(text_lcs), n):
+            ret.update(self._query_references(language_id, text_lcs[i : i + n]))
+        return ret
 
+    def _query_references(self, language_id, text_lcs):
+        "Get the references for at most QUERY_CHUNK_SIZE distinct text_lcs."
         only_include_read = "TxReadDate IS NOT NULL"
         if self.include_unread:
             only_include_read = "1=1"  # include everything.
 
-        term_lc = term.text_lc
+        params = {}
+        matches = " UNION ALL ".join(
+            self._matching_sentences_sql(i, term_lc, params)
+            for i, term_lc in enumerate(text_lcs)
+        )
         query = sqlalchemy.text(
             f"""
-            SELECT DISTINCT
-                texts.TxBkID,
-                TxID,
-                TxOrder,
-                BkTitle || ' (' || TxOrder || '/' || pc.c || ')' AS TxTitle,
-                SeText
-            FROM sentences
-            INNER JOIN texts ON TxID = SeTxID
-            INNER JOIN books ON BkID = texts.TxBkID
-            INNER JOIN (
-                SELECT TxBkID, COUNT(*) AS c
-                FROM texts
-                GROUP BY TxBkID
-            ) pc ON pc.TxBkID = texts.TxBkID
-            WHERE { only_include_read }
-            AND SeText IS NOT NULL
-            AND CASE WHEN SeTextLC == '*' THEN SeText ELSE SeTextLC END LIKE :pattern
-            AND BkLgID = {term.language.id}
-            ORDER BY TxReadDate desc, TxID desc
-            LIMIT {self.limit}
+            WITH matches AS ({ matches }
+            ),
+            refs AS (
+                SELECT
+                    TermIdx,
+                    texts.TxBkID,
+                    TxID,
+                    TxOrder,
+                    BkTitle || ' (' || TxOrder || '/' || pc.c || ')' AS TxTitle,
+                    SeText,
+                    TxReadDate,
+                    MIN(matches.SeID) AS SeID
+                FROM matches
+                INNER JOIN sentences ON sentences.SeID = matches.SeID
+                INNER JOIN texts ON TxID = SeTxID
+                INNER JOIN books ON BkID = texts.TxBkID
+                INNER JOIN (
+                    SELECT TxBkID, COUNT(*) AS c
+                    FROM texts
+                    GROUP BY TxBkID
+                ) pc ON pc.TxBkID = texts.TxBkID
+                WHERE { only_include_read }
+                AND BkLgID = {int(language_id)}
+                GROUP BY TermIdx, TxID, SeText
+            ),
+            ranked AS (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY TermIdx
+                    ORDER BY TxReadDate desc, TxID desc, SeID
+                ) AS rownum
+                FROM refs
+            )
+            SELECT TxBkID, TxID, TxOrder, TxTitle, SeText, TermIdx
+            FROM ranked
+            WHERE rownum <= {int(self.limit)}
+            ORDER BY TermIdx, rownum
         """
         )
         # print(query)
 
-        pattern = f"%{chr(0x200B)}{term_lc}{chr(0x200B)}%"
-        params = {"pattern": pattern}
-        result = self.session.execute(query, params)
-        return self._build_term_references(term_lc, result)
-
-    def _get_all_refs(self, terms):
-        all_references = []
-        for term in terms:
-            references = self._get_references(term)
-            all_references.extend(references)
-        return all_references
-
-    def _get_parent_references(self, term):
-        parent_references = []
-        for parent in term.parents:
-            parent_term_lc = parent.text_lc
-            references = self._get_family_references(parent, term)
-            parent_references.append({"term": parent_term_lc, "refs": references})
-        return parent_references
-
-    def _get_family_references(self, parent, term):
-        if term is None or parent is None:
-            return []
-        family = [parent] + parent.children
-        family = [t for t in family if t.id != term.id]
-        return self._get_all_refs(family)
-
-    def _get_child_references(self, term):
-        if term is None:
-            return []
-        return self._get_all_refs(term.children)
+        rows = {}
+        for row in self.session.execute(query, params):
+            rows.setdefault(row[5], []).append(row)
+        return {
+            term_lc: self._build_term_references(term_lc, rows.get(i, []))
+            for i, term_lc in enumerate(text_lcs)
+        }
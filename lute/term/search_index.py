@@ -0,0 +1,287 @@
+"""
+In-process term search indexes, one per language, for autocomplete.
+
+Searching the words table with LIKE '%x%' (and finding which terms
+have children) scans every term on every keystroke.  Instead, each
+language's text_lcs are kept sorted, so terms starting with the
+search are found by bisection, and are joined into a single string,
+so terms containing the search are found with str.find() rather
+than by checking each term.
+
+The index is built from the term status dict (see
+read/render/term_statuses.py), and is kept current the same way:
+committed ORM term changes are written through, and other changes
+are caught by the languagetermchanges counter.  Changes to parents
+aren't counted, so the set of parents is reloaded after any commit
+that may have changed them.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from sqlalchemy import event, text as sqltext
+from sqlalchemy.orm import Session, attributes
+
+from lute.models.term import Term
+from lute.read.render.term_changes import (
+    ALL,
+    add_commit_listener,
+    get_change_counts,
+)
+from lute.read.render.term_statuses import get_term_statuses
+
+
+TermMatch = namedtuple(
+    "TermMatch",
+    [
+        "id",
+        "text",
+        "text_lc",
+        "translation",
+        "status",
+        "language_id",
+        "has_children",
+        "text_starts_with_search_string",
+    ],
+)
+
+
+class TermSearchIndex:
+    "A language's sorted term text_lcs, and which terms are parents."
+
+    # Separates the text_lcs in the joined string.
+    SEPARATOR = "\n"
+
+    def __init__(self, count, text_lcs, parents):
+        self.count = count
+        self.text_lcs = sorted(text_lcs)
+        self.parents = set(parents)
+        # True if the parents should be reloaded.
+        self.parents_stale = False
+        self._sorted_parents = None
+        self._joined = None
+        self._starts = None
+
+    def add(self, text_lc):
+        "Add the term."
+        i = bisect_left(self.text_lcs, text_lc)
+        if i == len(self.text_lcs) or self.text_lcs[i] != text_lc:
+            self.text_lcs.insert(i, text_lc)
+            self._joined = None
+
+    def remove(self, text_lc):
+        "Remove the term."
+        i = bisect_left(self.text_lcs, text_lc)
+        if i < len(self.text_lcs) and self.text_lcs[i] == text_lc:
+            del self.text_lcs[i]
+            self._joined = None
+        if text_lc in self.parents:
+            self.parents.discard(text_lc)
+            self._sorted_parents = None
+
+    def set_parents(self, parents):
+        "Set the text_lcs of the terms with children."
+        self.parents = set(parents)
+        self.parents_stale = False
+        self._sorted_parents = None
+
+    def _starting_with(self, keys, s):
+        "Keys starting with s, in order."
+        for i in range(bisect_left(keys, s), len(keys)):
+            if not keys[i].startswith(s):
+                break
+            yield keys[i]
+
+    def _containing(self, s):
+        "Terms containing s, in order."
+        if self._joined is None:
+            self._joined = self.SEPARATOR.join(self.text_lcs)
+            self._starts = []
+            pos = 0
+            for t in self.text_lcs:
+                self._starts.append(pos)
+                pos += len(t) + len(self.SEPARATOR)
+        keys, starts, joined = self.text_lcs, self._starts, self._joined
+        pos = joined.find(s)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            if pos + len(s) <= starts[i] + len(keys[i]):
+                yield keys[i]
+                if i + 1 == len(starts):
+                    return
+                pos = joined.find(s, starts[i + 1])
+            else:
+                # Match spans the separator.
+                pos = joined.find(s, pos + 1)
+
+    def find(self, s, max_results):
+        """
+        Get up to max_results (text_lc, rank, has_children) of the
+        terms containing s, sorted by rank (2 if equal to s, 1 if
+        starting with s, else 0), then parents first, then text_lc.
+        """
+        if self._sorted_parents is None:
+            self._sorted_parents = sorted(self.parents)
+        parents = self.parents
+        ret = []
+        found = set()
+
+        def _add(text_lc, rank):
+            if text_lc not in found and len(ret) < max_results:
+                found.add(text_lc)
+                ret.append((text_lc, rank, text_lc in parents))
+            return len(ret) < max_results
+
+        i = bisect_left(self.text_lcs, s)
+        if i < len(self.text_lcs) and self.text_lcs[i] == s:
+            _add(s, 2)
+
+        groups = [
+            (1, self._starting_with(self._sorted_parents, s)),
+            (1, self._starting_with(self.text_lcs, s)),
+            (0, (p for p in self._sorted_parents if s in p)),
+            (0, self._containing(s)),
+        ]
+        for rank, text_lcs in groups:
+            for text_lc in text_lcs:
+                if not _add(text_lc, rank):
+                    return ret
+        return ret
+
+
+# language id => TermSearchIndex
+__SEARCH_INDEXES__ = {}
+__LOCK__ = threading.Lock()
+
+
+def reset_search_indexes():
+    "Discard all indexes, e.g. if the database is replaced."
+    with __LOCK__:
+        __SEARCH_INDEXES__.clear()
+
+
+def _load_parents(session, language_id):
+    "Text_lcs of the language's terms that have children."
+    sql = sqltext(
+        """
+        SELECT DISTINCT WoTextLC FROM words
+        INNER JOIN wordparents ON WpParentWoID = WoID
+        WHERE WoLgID=:language_id
+        """
+    )
+    return [r[0] for r in session.execute(sql, {"language_id": language_id})]
+
+
+def get_search_index(session, language_id):
+    "Get the TermSearchIndex for the language."
+    count = get_change_counts(session.connection(), [language_id])[language_id][ALL]
+    with __LOCK__:
+        index = __SEARCH_INDEXES__.get(language_id)
+    if index is None or index.count != count:
+        statuses = get_term_statuses(session, language_id)
+        parents = _load_parents(session, language_id)
+        index = TermSearchIndex(count, list(statuses), parents)
+        with __LOCK__:
+            __SEARCH_INDEXES__[language_id] = index
+    elif index.parents_stale:
+        parents = _load_parents(session, language_id)
+        with __LOCK__:
+            index.set_parents(parents)
+    return index
+
+
+def find_matches(session, language_id, text_lc, max_results=50):
+    """
+    Get up to max_results TermMatches for the language's terms
+    containing text_lc, sorted by: equal to text_lc, then starting
+    with it, then containing it; parents first; and text_lc.
+    """
+    index = get_search_index(session, language_id)
+    with __LOCK__:
+        found = index.find(text_lc, max_results)
+    if len(found) == 0:
+        return []
+
+    params = {"language_id": language_id}
+    placeholders = []
+    for i, (t, _, _) in enumerate(found):
+        params[f"t{i}"] = t
+        placeholders.append(f":t{i}")
+    sql = f"""
+        SELECT WoTextLC, WoID, WoText, WoTranslation, WoStatus
+        FROM words
+        WHERE WoLgID=:language_id AND WoTextLC in ({", ".join(placeholders)})
+    """
+    rows = {r[0]: r for r in session.execute(sqltext(sql), params)}
+    return [
+        TermMatch(r[1], r[2], t, r[3], r[4], language_id, int(has_children), rank)
+        for t, rank, has_children in found
+        for r in [rows.get(t)]
+        if r is not None
+    ]
+
+
+def _apply_committed_changes(changes):
+    "Write committed term changes through to the indexes, or discard them."
+    with __LOCK__:
+        for lgid, rec in changes.items():
+            index = __SEARCH_INDEXES__.get(lgid)
+            if index is None:
+                continue
+            if not rec.exact[ALL] or index.count != rec.start[ALL]:
+                del __SEARCH_INDEXES__[lgid]
+                continue
+            for old, new in rec.changes:
+                if old is not None and (new is None or new.text_lc != old.text_lc):
+                    index.remove(old.text_lc)
+                if new is not None:
+                    index.add(new.text_lc)
+            index.count = rec.end[ALL]
+
+
+add_commit_listener(_apply_committed_changes)
+
+
+_PARENTS_KEY = "lute_term_parent_changes"
+
+
+def _parents_changed(t):
+    "True if the term's parents or children may have changed."
+    return any(
+        attributes.get_history(
+            t, key, passive=attributes.PASSIVE_NO_INITIALIZE
+        ).has_changes()
+        for key in ("parents", "children")
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):  # pylint: disable=unused-argument
+    "Record the languages whose parents may change."
+    changed = session.info.setdefault(_PARENTS_KEY, set())
+    for t in session.deleted:
+        if isinstance(t, Term):
+            changed.add(t.language_id)
+    for t in list(session.new) + list(session.dirty):
+        if isinstance(t, Term) and _parents_changed(t):
+            lgid = t.language.id if t.language is not None else t.language_id
+            changed.add(lgid)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    "Reload the parents of the changed languages when next used."
+    changed = session.info.pop(_PARENTS_KEY, None)
+    if not changed:
+        return
+    with __LOCK__:
+        for lgid in changed:
+            index = __SEARCH_INDEXES__.get(lgid)
+            if index is not None:
+                index.parents_stale = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    "Discard the recorded changes."
+    session.info.pop(_PARENTS_KEY, None)
@@ -11,6 +11,7 @@ Includes classes:
 
 import re
 import os
+import threading
 from typing import List
 import jieba
 from pypinyin import pinyin
@@ -26,6 +27,12 @@ class MandarinParser(AbstractParser):
     data file.
     """
 
+    # The exceptions map and jieba tokenizer for the current
+    # exceptions file, and the file's (path, mtime, size) when loaded.
+    _exceptions_lock = threading.Lock()
+    _exceptions_file_key = None
+    _exceptions = ({}, jieba.dt)
+
     @classmethod
     def name(cls):
         return "Lute Mandarin Chinese"
@@ -65,6 +72,19 @@ class MandarinParser(AbstractParser):
                 f.write("# Place each rule on a separate line. e.g.:\n")
                 f.write("# 清华,大学\n")
                 f.write("# Lines preceded with # are ignored.\n")
+        cls.warm_up()
+
+    @classmethod
+    def warm_up(cls):
+        """
+        Load jieba's dictionary and the parser exceptions.
+
+        jieba loads its dictionary on the first cut, so this is
+        called at plugin init to keep that delay off of the first
+        page render.
+        """
+        jieba.initialize()
+        cls._get_exceptions()
 
     @classmethod
     def _build_parser_exceptions_map(cls):
@@ -83,8 +103,59 @@ class MandarinParser(AbstractParser):
                 ret[orig_token] = parts
         return ret
 
+    @classmethod
+    def _build_tokenizer(cls, exceptions_map):
+        """
+        Get a jieba tokenizer that knows the words in the exceptions.
+
+        The tokenizer is a copy of jieba's default tokenizer with the
+        exception words added as a user dictionary, so that jieba
+        returns them as single words; the exceptions map then splits
+        them exactly.  If there are no exceptions, the default is used.
+        """
+        if len(exceptions_map) == 0:
+            return jieba.dt
+
+        jieba.dt.check_initialized()
+        tokenizer = jieba.Tokenizer()
+        tokenizer.FREQ = dict(jieba.dt.FREQ)
+        tokenizer.total = jieba.dt.total
+        tokenizer.initialized = True
+        for word in exceptions_map:
+            tokenizer.add_word(word)
+            tokenizer.suggest_freq(word, tune=True)
+        return tokenizer
+
+    @classmethod
+    def _get_exceptions(cls):
+        """
+        Get the exceptions map and the jieba tokenizer to use.
+
+        These are only rebuilt if the exceptions file has changed.
+        """
+        if cls.data_directory is None:
+            return ({}, jieba.dt)
+
+        fp = cls.parser_exceptions_file()
+        st = os.stat(fp)
+        file_key = (fp, st.st_mtime_ns, st.st_size)
+        with cls._exceptions_lock:
+            if file_key != cls._exceptions_file_key:
+                exceptions_map = cls._build_parser_exceptions_map()
+                tokenizer = cls._build_tokenizer(exceptions_map)
+                cls._exceptions = (exceptions_map, tokenizer)
+                cls._exceptions_file_key = file_key
+            return cls._exceptions
+
+    def get_parse_key(self, language):
+        "The tokens also depend on the exceptions file."
+        self._get_exceptions()
+        return super().get_parse_key(language) + (self._exceptions_file_key,)
+
     def _reparse_with_exceptions_map(self, original_token, exceptions_map):
         "Check the token s against the map, break down further if needed."
+        if original_token not in exceptions_map:
+            return [original_token]
 
         # pylint: disable=dangerous-default-value
         def _get_mapped(tok, accum=[]):
@@ -103,14 +174,14 @@ class MandarinParser(AbstractParser):
         Returns ParsedToken array for given language.
         """
 
-        exceptions_map = self._build_parser_exceptions_map()
+        exceptions_map, tokenizer = self._get_exceptions()
 
         # Ensure standard carriage returns so that paragraph
         # markers are used correctly.  Lute uses paragraph markers
         # for rendering.
         text = text.replace("\r\n", "\n")
 
-        words = list(jieba.cut(text))
+        words = list(tokenizer.cut(text))
         tokens = []
         pattern = f"[{language.word_characters}]"
         for word in words:
@@ -5,6 +5,7 @@ MandarinParser tests.
 import tempfile
 import os
 import pytest
+import jieba
 
 # pylint: disable=wrong-import-order
 from lute.models.term import Term
@@ -151,3 +152,36 @@ def test_term_found_in_exceptions_file_is_split(mandarin_chinese, _datadir):
 
     set_parse_exceptions(["清华, 大学", " 大 ,  学 "])
     assert ["清华", "大", "学"] == parsed_tokens(), "Spaces are ignored"
+
+
+def test_exceptions_reloaded_only_if_file_changes(_datadir):
+    "The exceptions are cached until the file is changed."
+    exceptions_file = MandarinParser.parser_exceptions_file()
+    with open(exceptions_file, "w", encoding="utf8") as ef:
+        ef.write("清华,大学")
+
+    # pylint: disable=protected-access
+    first = MandarinParser._get_exceptions()
+    assert first[0]["清华大学"] == ["清华", "大学"]
+    assert MandarinParser._get_exceptions() is first, "cached"
+
+    with open(exceptions_file, "w", encoding="utf8") as ef:
+        ef.write("清华,大,学")
+    st = os.stat(exceptions_file)
+    os.utime(exceptions_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    second = MandarinParser._get_exceptions()
+    assert second is not first, "reloaded"
+    assert second[0]["清华大学"] == ["清华", "大", "学"]
+
+
+def test_jieba_keeps_exception_words_together(_datadir):
+    "The exception words are added to jieba's dictionary."
+    exceptions_file = MandarinParser.parser_exceptions_file()
+    with open(exceptions_file, "w", encoding="utf8") as ef:
+        ef.write("我不,相信")
+
+    # pylint: disable=protected-access
+    _, tokenizer = MandarinParser._get_exceptions()
+    assert list(tokenizer.cut("我不相信")) == ["我不相信"]
+    assert list(jieba.cut("我不相信")) == ["我", "不", "相信"], "default unchanged"
@@ -306,6 +306,22 @@ def black(c):
     c.run("python -m black .")
 
 
+@task
+def build_word_chars(c):
+    """
+    Add the default word character ranges for this python's
+    unicodedata version to the prebuilt ranges file.
+    """
+    # pylint: disable=import-outside-toplevel
+    from lute.parse.space_delimited_parser import (
+        write_word_character_ranges_file,
+        WORD_CHARACTER_RANGES_FILE,
+    )
+
+    write_word_character_ranges_file()
+    print(f"{WORD_CHARACTER_RANGES_FILE} updated.")
+
+
 @task(pre=[test, accept, acceptmobile, playwright])
 def fulltest(c):  # pylint: disable=unused-argument
     """
@@ -336,6 +352,7 @@ ns.add_task(todos)
 ns.add_task(start)
 ns.add_task(search)
 ns.add_task(black)
+ns.add_task(build_word_chars)
 
 
 ##############################
@@ -10,6 +10,7 @@ from lute.config.app_config import AppConfig
 from lute.db import db
 import lute.db.management
 from lute.language.service import Service
+from lute.read.service import Service as ReadService
 from lute.app_factory import create_app
 
 from lute.models.language import Language
@@ -83,6 +84,23 @@ def fixture_app_context(app):
         yield c
 
 
+@pytest.fixture(name="rendered_pages")
+def fixture_rendered_pages(monkeypatch):
+    """
+    Ids of the texts rendered by lute.read.service.Service, e.g. to
+    check that a page was served from the page cache.
+    """
+    rendered = []
+    orig = ReadService._render_page  # pylint: disable=protected-access
+
+    def _tracking_render(self, text, *args):
+        rendered.append(text.id)
+        return orig(self, text, *args)
+
+    monkeypatch.setattr(ReadService, "_render_page", _tracking_render)
+    yield rendered
+
+
 @pytest.fixture(name="empty_db")
 def fixture_empty_db(app_context):
     """
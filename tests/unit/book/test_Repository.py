@@ -5,9 +5,13 @@ Tests lute.term.model.Book *domain* objects being saved
 and retrieved from DB.
 """
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pytest
 
 from lute.db import db
+import lute.book.model
 from lute.book.model import Book, Repository
 from tests.dbasserts import assert_sql_result
 
@@ -161,6 +165,110 @@ def test_split_by_paragraphs_scenario(
     assert "/".join(actuals) == "/".join(expected), f"scen {threshold}, {fulltext}"
 
 
+def test_new_book_pages_parsed_once(app_context, repo, english, monkeypatch):
+    "Page word counts are taken from the tokens used to split the pages."
+    b = Book()
+    b.title = "Hola"
+    b.language_id = english.id
+    b.text = "Here is a dog. And a cat.\nNew paragraph."
+    b.threshold_page_tokens = 5
+
+    parse_calls = []
+    real_get_parsed_tokens = type(english).get_parsed_tokens
+
+    def _counting_get_parsed_tokens(lang, s):
+        parse_calls.append(s)
+        return real_get_parsed_tokens(lang, s)
+
+    monkeypatch.setattr(type(english), "get_parsed_tokens", _counting_get_parsed_tokens)
+    dbbook = repo.add(b)
+    assert [(t.text, t.word_count) for t in dbbook.texts] == [
+        ("Here is a dog. And a cat.", 7),
+        ("New paragraph.", 2),
+    ]
+    assert not parse_calls, "pages not re-parsed"
+
+
+@pytest.mark.parametrize("split_by", ["sentences", "paragraphs"])
+def test_process_pool_gives_same_pages(
+    split_by, app_context, repo, english, monkeypatch
+):
+    "Large books are parsed in chunks in a process pool, with the same results."
+    paras = [f"Here is dog {i}. And a cat {i}." for i in range(40)]
+    fulltext = "\n".join(paras[:20]) + "\n---\n" + "\n\n".join(paras[20:])
+
+    def _pages():
+        b = Book()
+        b.title = "Hola"
+        b.language_id = english.id
+        b.text = fulltext
+        b.threshold_page_tokens = 30
+        b.split_by = split_by
+        dbbook = repo.add(b)
+        return [(t.text, t.word_count) for t in dbbook.texts]
+
+    expected = _pages()
+    monkeypatch.setattr(lute.book.model, "PARALLEL_PARSE_MIN_CHARS", 10)
+    monkeypatch.setattr(lute.book.model, "PARSE_CHUNK_CHARS", 100)
+    assert _pages() == expected
+
+
+def test_process_pool_chunk_boundary_at_blank_line(
+    app_context, repo, english, monkeypatch
+):
+    "Blank lines at chunk boundaries are kept, in the text and the tokens."
+    fulltext = "Here is dog.\n\nAnother."
+    page_tokens = []
+    # pylint: disable=protected-access
+    real_get_pages = lute.book.model.Repository._get_pages
+
+    def _spy(self, book, tokens):
+        for page, toks in real_get_pages(self, book, tokens):
+            page_tokens.append([t.token for t in toks])
+            yield page, toks
+
+    def _pages():
+        page_tokens.clear()
+        b = Book()
+        b.title = "Hola"
+        b.language_id = english.id
+        b.text = fulltext
+        dbbook = repo.add(b)
+        return [t.text for t in dbbook.texts], page_tokens[:]
+
+    monkeypatch.setattr(lute.book.model.Repository, "_get_pages", _spy)
+    expected = _pages()
+    assert expected[0] == [fulltext]
+    monkeypatch.setattr(lute.book.model, "PARALLEL_PARSE_MIN_CHARS", 10)
+    monkeypatch.setattr(lute.book.model, "PARSE_CHUNK_CHARS", 13)
+    assert _pages() == expected
+
+
+def _worker_mecab_path():
+    "The mecab path seen by the Japanese parser in a pool worker."
+    # pylint: disable=import-outside-toplevel
+    from lute.parse.mecab_parser import JapaneseParser
+
+    JapaneseParser.is_supported()
+    return os.environ.get("MECAB_PATH")
+
+
+def test_process_pool_workers_get_user_settings(app_context, english, monkeypatch):
+    "Spawned workers don't inherit the settings, so they're passed."
+    monkeypatch.setitem(
+        lute.book.model.current_settings, "mecab_path", "/custom/libmecab.so"
+    )
+    # pylint: disable=protected-access
+    initargs = lute.book.model._pool_initargs(english)
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=lute.book.model._init_pool_worker,
+        initargs=initargs,
+    ) as pool:
+        assert pool.submit(_worker_mecab_path).result() == "/custom/libmecab.so"
+
+
 def test_get_tags(app_context, new_book, repo):
     "Helper method test."
     assert repo.get_book_tags() == [], "no tags yet"
@@ -3,11 +3,15 @@ Book service tests.
 """
 
 import os
+from io import BytesIO
 from contextlib import ExitStack
+import pytest
 from lute.db import db
 from lute.models.repositories import BookRepository
+import lute.book.model
+import lute.book.service
 from lute.book.model import Book
-from lute.book.service import Service
+from lute.book.service import Service, FileTextExtraction, BookImportException
 
 
 def get_test_files():
@@ -78,3 +82,91 @@ def test_create_book_from_streams(app, app_context, spanish):
     assert os.path.exists(full_audio_path), "file saved"
     with open(full_audio_path, "r", encoding="utf-8") as fp:
         assert fp.read().strip() == "fake mp3 file", "correct content copied."
+
+
+def test_textfile_chunks_decoded_across_chunk_boundaries():
+    "Multibyte chars and \\r\\n can be split between chunks."
+    content = "Tengo un pingüino.\r\nY un gato.\r\n"
+    stream = BytesIO(content.encode("utf-8"))
+    fte = FileTextExtraction()
+    for size in [1, 2, 3, 100]:
+        stream.seek(0)
+        chunks = list(fte.get_textfile_chunks("x.txt", stream, chunk_size=size))
+        assert "".join(chunks) == "Tengo un pingüino.\nY un gato.\n", size
+
+
+def test_textfile_chunks_non_utf8_raises():
+    "Same error as for a non-streamed file."
+    stream = BytesIO("pingüino".encode("latin-1"))
+    fte = FileTextExtraction()
+    with pytest.raises(BookImportException, match="x.txt is not utf-8 encoding"):
+        list(fte.get_textfile_chunks("x.txt", stream))
+
+
+def _import_text_stream(content, spanish, title):
+    "Import the content as a .txt file stream."
+    b = Book()
+    b.title = title
+    b.language_id = spanish.id
+    b.threshold_page_tokens = 10
+    b.text_stream = BytesIO(content.encode("utf-8"))
+    b.text_stream_filename = "blah.txt"
+    return Service().import_book(b, db.session)
+
+
+def test_large_text_file_is_streamed(app_context, spanish, monkeypatch):
+    "Streamed import gives the same pages as the regular import."
+    paras = [f"Tengo un amigo {i}. Y un gato {i}." for i in range(30)]
+    content = "\r\n".join(paras[:10]) + "\n---\n" + "\n\n".join(paras[10:])
+
+    regular = _import_text_stream(content, spanish, "regular")
+    expected = [(t.text, t.word_count) for t in regular.texts]
+
+    added_streamed = []
+    real_add_streamed = lute.book.model.Repository.add_streamed
+
+    def _spy(self, book, text_chunks):
+        added_streamed.append(book.title)
+        return real_add_streamed(self, book, text_chunks)
+
+    monkeypatch.setattr(lute.book.model.Repository, "add_streamed", _spy)
+    monkeypatch.setattr(lute.book.service, "STREAMING_IMPORT_MIN_BYTES", 10)
+    monkeypatch.setattr(lute.book.model, "PARSE_CHUNK_CHARS", 50)
+    monkeypatch.setattr(lute.book.model, "STREAMED_PAGE_BATCH_SIZE", 2)
+    streamed = _import_text_stream(content, spanish, "streamed")
+    assert added_streamed == ["streamed"]
+    assert [(t.text, t.word_count) for t in streamed.texts] == expected
+    assert [t.order for t in streamed.texts] == list(range(1, len(expected) + 1))
+
+
+def test_streamed_chunk_boundary_at_blank_line(app_context, spanish, monkeypatch):
+    "Blank lines at chunk boundaries are kept, in the text and the tokens."
+    content = "Here is dog.\n\nAnother."
+    page_tokens = []
+    # pylint: disable=protected-access
+    real_get_pages = lute.book.model.Repository._get_pages
+
+    def _spy(self, book, tokens):
+        for page, toks in real_get_pages(self, book, tokens):
+            page_tokens.append([t.token for t in toks])
+            yield page, toks
+
+    monkeypatch.setattr(lute.book.model.Repository, "_get_pages", _spy)
+    regular = _import_text_stream(content, spanish, "regular")
+    assert [t.text for t in regular.texts] == [content]
+    expected_tokens = page_tokens[:]
+
+    page_tokens.clear()
+    monkeypatch.setattr(lute.book.service, "STREAMING_IMPORT_MIN_BYTES", 10)
+    monkeypatch.setattr(lute.book.model, "PARSE_CHUNK_CHARS", 14)
+    streamed = _import_text_stream(content, spanish, "streamed")
+    assert [t.text for t in streamed.texts] == [content]
+    assert page_tokens == expected_tokens
+
+
+def test_empty_streamed_text_file_raises(app_context, spanish, monkeypatch):
+    "Same error as for a non-streamed file, and no book is saved."
+    monkeypatch.setattr(lute.book.service, "STREAMING_IMPORT_MIN_BYTES", 1)
+    with pytest.raises(BookImportException, match="blah.txt is empty."):
+        _import_text_stream("\n---\n  \n", spanish, "empty")
+    assert BookRepository(db.session).find_by_title("empty", spanish.id) is None
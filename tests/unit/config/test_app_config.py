@@ -97,3 +97,41 @@ def test_nonexistent_config_file_throws(tmp_path):
     config_file = tmp_path / "nonexistent_config.yaml"
     with pytest.raises(FileNotFoundError, match="No such file"):
         AppConfig(config_file)
+
+
+def test_page_cache_settings(tmp_path):
+    "Page cache is in memory only by default."
+    config_file = tmp_path / "valid_config.yaml"
+    write_file(config_file, {"DBNAME": "my_db", "DATAPATH": "data_path"})
+    app_config = AppConfig(config_file)
+    assert app_config.page_cache_size == 50
+    assert app_config.page_cache_disk is False
+
+    config_data = {"DBNAME": "my_db", "PAGE_CACHE_SIZE": 5, "PAGE_CACHE_DISK": True}
+    write_file(config_file, config_data)
+    app_config = AppConfig(config_file)
+    assert app_config.page_cache_size == 5
+    assert app_config.page_cache_disk is True
+
+
+def test_prerender_settings(tmp_path):
+    "Prerender is off for test dbs, and terms aren't saved by default."
+    config_file = tmp_path / "config.yaml"
+    write_file(config_file, {"DBNAME": "my_db", "DATAPATH": "data_path"})
+    app_config = AppConfig(config_file)
+    assert app_config.prerender_workers == 1
+    assert app_config.prerender_save_terms is False
+
+    write_file(config_file, {"DBNAME": "test_my_db", "DATAPATH": "data_path"})
+    assert AppConfig(config_file).prerender_workers == 0, "off for tests"
+
+    config_data = {
+        "DBNAME": "test_my_db",
+        "DATAPATH": "data_path",
+        "PRERENDER_WORKERS": 2,
+        "PRERENDER_SAVE_TERMS": True,
+    }
+    write_file(config_file, config_data)
+    app_config = AppConfig(config_file)
+    assert app_config.prerender_workers == 2
+    assert app_config.prerender_save_terms is True
@@ -96,3 +96,25 @@ def test_lang_to_dict_from_dict_returns_same_thing(app_context):
     e_from_dict = Language.from_dict(e_dict)
     e_back_to_dict = e_from_dict.to_dict()
     assert e_dict == e_back_to_dict, "Same thing returned"
+
+
+def test_parsed_tokens_are_numbered_for_each_parse(english):
+    "Order and sentence numbers start over for each string."
+    s = "Hi there. Bye."
+
+    def _numbers(tokens):
+        return [(t.token, t.order, t.sentence_number) for t in tokens]
+
+    expected = [
+        ("Hi", 1, 0),
+        (" ", 2, 0),
+        ("there", 3, 0),
+        (". ", 4, 0),
+        ("Bye", 5, 1),
+        (".", 6, 1),
+    ]
+    assert _numbers(english.get_parsed_tokens(s)) == expected
+    assert _numbers(english.get_parsed_tokens(s)) == expected, "not cumulative"
+
+    batch = english.get_parsed_tokens_batch([s, s])
+    assert [_numbers(toks) for toks in batch] == [expected, expected]
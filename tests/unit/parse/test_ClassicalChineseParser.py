@@ -3,6 +3,7 @@ JapaneseParser tests.
 """
 
 from lute.parse.base import ParsedToken
+from lute.parse.character_parser import CharacterClassifier
 
 
 def assert_tokens_equals(text, lang, expected):
@@ -72,3 +73,22 @@ def test_sample_2(classical_chinese):
         ["？", False, True],
     ]
     assert_tokens_equals(s, classical_chinese, expected)
+
+
+def test_classifier_table_reused_until_settings_change(classical_chinese):
+    "The lookup table is cached for the language settings."
+    c = CharacterClassifier.for_language(classical_chinese)
+    assert CharacterClassifier.for_language(classical_chinese) is c
+    flags = c.get_flags("學，？¶")
+    assert [flags[char] for char in "學，？¶"] == [
+        (True, False),
+        (False, False),
+        (False, True),
+        (False, True),
+    ]
+
+    classical_chinese.regexp_split_sentences = "，"
+    c2 = CharacterClassifier.for_language(classical_chinese)
+    assert c2 is not c
+    expected = [["學", True], ["，", False, True], ["？", False]]
+    assert_tokens_equals("學，？", classical_chinese, expected)
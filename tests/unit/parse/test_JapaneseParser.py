@@ -106,3 +106,39 @@ def test_reading_setting(app_context):
     for k, v in cases.items():
         current_settings["japanese_reading"] = k
         assert p.get_reading("強い") == v, k
+
+
+def test_get_readings_for_many_terms(app_context):
+    "Readings for many terms can be fetched in one call."
+    current_settings["japanese_reading"] = "hiragana"
+    p = JapaneseParser()
+    texts = ["強い", "どちら", "二人", "強い"]
+    assert p.get_readings(texts) == ["つよい", None, "ににん", "つよい"]
+    assert p.get_readings([]) == []
+
+
+def test_taggers_are_pooled(app_context):
+    "Taggers are re-used, and a tagger is only given to one caller at a time."
+    pool = JapaneseParser.tagger_pool
+    pool.clear()
+    flags = "-O yomi"
+    with pool.tagger(flags) as a:
+        with pool.tagger(flags) as b:
+            assert a is not b, "in-use tagger not shared"
+    assert pool.idle_count(flags) == 2, "both returned"
+
+    with pool.tagger(flags) as c:
+        assert c in (a, b), "re-used"
+    assert pool.idle_count(flags) == 2
+
+    pool.clear()
+    assert pool.idle_count(flags) == 0, "cleared"
+
+
+def test_tagger_dropped_if_cleared_while_in_use(app_context):
+    "A tagger checked out before a clear() isn't returned to the pool."
+    pool = JapaneseParser.tagger_pool
+    pool.clear()
+    with pool.tagger("-O yomi"):
+        pool.clear()
+    assert pool.idle_count("-O yomi") == 0
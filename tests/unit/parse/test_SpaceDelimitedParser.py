@@ -5,6 +5,7 @@ SpaceDelimitedParser tests.
 import sys
 import re
 import unicodedata
+from lute.parse import space_delimited_parser
 from lute.parse.space_delimited_parser import SpaceDelimitedParser
 from lute.parse.base import ParsedToken
 
@@ -281,3 +282,62 @@ def test_all_chars_in_categories_match_default_word_chars():
         c = chr(i)
         if unicodedata.category(c) in categories:
             assert regex.match(c), f"Match for {c}"
+
+
+def test_prebuilt_word_character_ranges_match_unicodedata():
+    "The shipped ranges must be the same as the ranges found at runtime."
+    # pylint: disable=protected-access
+    prebuilt = space_delimited_parser._load_word_character_ranges()
+    assert prebuilt is not None, (
+        f"No prebuilt ranges for unicode {unicodedata.unidata_version}, "
+        + 'add them with "inv build-word-chars" on this python'
+    )
+    assert prebuilt == space_delimited_parser.find_word_character_ranges()
+
+
+def test_default_word_characters_found_if_no_prebuilt_ranges(monkeypatch):
+    "Falls back to checking every codepoint."
+    monkeypatch.setattr(
+        space_delimited_parser, "WORD_CHARACTER_RANGES_FILE", "/missing/file.json"
+    )
+    # pylint: disable=protected-access
+    assert space_delimited_parser._load_word_character_ranges() is None
+    get_default = SpaceDelimitedParser.get_default_word_characters
+    expected = get_default()
+    get_default.cache_clear()
+    assert get_default() == expected
+    get_default.cache_clear()
+
+
+def test_tokenizer_is_reused_until_language_settings_change(english):
+    "The compiled tokenizer is cached by the language's parse settings."
+    t1 = SpaceDelimitedParser.get_tokenizer(english)
+    assert t1 is SpaceDelimitedParser.get_tokenizer(english), "same settings"
+
+    english.exceptions_split_sentences = "Mr.|EE.UU."
+    t2 = SpaceDelimitedParser.get_tokenizer(english)
+    assert t2 is not t1, "new tokenizer after edit"
+    assert_string_equals("In EE.UU. now.", english, "[In] [EE.UU.] [now].")
+
+
+def test_character_substitutions_applied_in_order(english):
+    "Substitutions that feed into each other still give the sequential result."
+    english.character_substitutions = "´='|..=‥|...=…"
+    assert_string_equals("a´b...", english, "[a]'[b]‥.")
+
+    english.character_substitutions = "a=b|b=c"
+    assert_string_equals("ab", english, "[cc]")
+
+    english.character_substitutions = "x={"
+    assert_string_equals("x", english, "[")
+
+
+def test_batch_parse_same_as_single_parses(english):
+    "The default batch implementation parses each text."
+    texts = ["Hi there.", "", "Mrs. Jones.\nBye."]
+    p = SpaceDelimitedParser()
+    actual = [
+        [str(t) for t in toks] for toks in p.get_parsed_tokens_batch(texts, english)
+    ]
+    expected = [[str(t) for t in p.get_parsed_tokens(s, english)] for s in texts]
+    assert actual == expected
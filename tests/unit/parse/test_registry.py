@@ -7,11 +7,14 @@ import pytest
 from lute.parse.registry import (
     __LUTE_PARSERS__,
     get_parser,
+    get_language_parser,
+    reset_parser_cache,
+    parser_cache_info,
     supported_parsers,
     supported_parser_types,
     is_supported,
 )
-from lute.parse.space_delimited_parser import SpaceDelimitedParser
+from lute.parse.space_delimited_parser import SpaceDelimitedParser, TurkishParser
 
 
 def test_get_parser_by_name():
@@ -84,3 +87,34 @@ def test_get_parser_throws_if_parser_not_supported(_load_dummy):
         e = ex
     assert e is not None, "Have ValueError"
     assert str(e) == "Unsupported parser type 'dummy'", "message"
+
+
+def test_language_parser_instance_is_reused():
+    "The same instance is returned for the language until something changes."
+    reset_parser_cache()
+    p = get_language_parser(1, "spacedel")
+    assert get_language_parser(1, "spacedel") is p, "re-used"
+    assert get_language_parser(2, "spacedel") is not p, "one per language"
+
+    t = get_language_parser(1, "turkish")
+    assert t is not p, "parser type changed"
+    assert get_language_parser(1, "turkish") is t
+
+    info = parser_cache_info()
+    assert [info["hits"], info["misses"], info["size"]] == [2, 3, 2]
+    assert info["saved_seconds"] >= 0
+
+
+def test_language_parser_not_reused_if_parser_changed():
+    "Changing a parser in the registry stops the cached instance from being used."
+    reset_parser_cache()
+    p = get_language_parser(1, "spacedel")
+    saved = __LUTE_PARSERS__.pop("spacedel")
+    try:
+        with pytest.raises(ValueError):
+            get_language_parser(1, "spacedel")
+        __LUTE_PARSERS__["spacedel"] = TurkishParser
+        assert isinstance(get_language_parser(1, "spacedel"), TurkishParser)
+    finally:
+        __LUTE_PARSERS__["spacedel"] = saved
+    assert get_language_parser(1, "spacedel") is not p, "new instance"
@@ -0,0 +1,41 @@
+"""
+Token stream serialization tests.
+"""
+
+from lute.parse import token_stream
+
+
+def _token_data(tokens):
+    return [
+        (t.token, t.is_word, t.is_end_of_sentence, t.order, t.sentence_number)
+        for t in tokens
+    ]
+
+
+def test_tokens_round_trip(spanish):
+    "Decoded tokens are the same as the parsed tokens."
+    s = "Tengo un gato.  Tengo UN perro.\nÑandú, pingüino… ¿Sí?"
+    tokens = spanish.get_parsed_tokens(s)
+    decoded = token_stream.decode(token_stream.encode(tokens))
+    assert _token_data(decoded) == _token_data(tokens)
+
+
+def test_japanese_tokens_round_trip(japanese):
+    "Multi-char tokens, paragraph markers."
+    tokens = japanese.get_parsed_tokens("元気です.\n私は元気です.")
+    decoded = token_stream.decode(token_stream.encode(tokens))
+    assert _token_data(decoded) == _token_data(tokens)
+
+
+def test_empty_token_list(spanish):
+    assert not token_stream.decode(token_stream.encode([]))
+
+
+def test_stream_key_changes_with_text_and_settings(spanish):
+    "Stored tokens are stale if the text or settings change."
+    p = spanish.parser
+    k = token_stream.stream_key(p, spanish, "Tengo un gato.")
+    assert k == token_stream.stream_key(p, spanish, "Tengo un gato.")
+    assert k != token_stream.stream_key(p, spanish, "Tengo un perro.")
+    spanish.word_characters = "a-z"
+    assert k != token_stream.stream_key(p, spanish, "Tengo un gato.")
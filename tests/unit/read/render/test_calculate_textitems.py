@@ -2,9 +2,15 @@
 Tests for getting TextItems.
 """
 
+import random
 from lute.models.term import Term
 from lute.parse.base import ParsedToken
-from lute.read.render.calculate_textitems import get_textitems
+from lute.parse.registry import reset_parser_cache, parser_cache_info
+from lute.read.render.calculate_textitems import (
+    get_status_text_lcs,
+    get_textitems,
+    get_visible_spans,
+)
 
 
 def make_tokens(token_data):
@@ -166,3 +172,51 @@ def test_crazy_case(english):
     expected = "[A-1][ -1][B C-3][C D E-5][E F G H I-9]"
     expected_displayed = "[A-1][ -1][B C-3][ D E-5][ F G H I-9]"
     assert_renderable_equals(english, data, words, expected, expected_displayed)
+
+
+def test_parser_instance_reused_during_calculation(english):
+    "The language's parser is only created once, the cache stats show the reuse."
+    reset_parser_cache()
+    assert_renderable_equals(english, ["A", " ", "B"], ["A B"], "[A B-3]")
+    info = parser_cache_info()
+    assert info["misses"] == 1, "created once"
+    assert info["hits"] > 0, "then re-used"
+
+
+def _shown_by_first_covering_item(token_count, multiword_spans):
+    "Reference: the first item (sorted by index, longest first) covering each token."
+    items = [(i, 1) for i in range(token_count)] + multiword_spans
+    items.sort(key=lambda x: (x[0], -x[1]))
+    shown = [
+        next(it for it in items if it[0] <= c < it[0] + it[1])
+        for c in range(token_count)
+    ]
+    return [(it[0], it[1], shown.count(it)) for it in dict.fromkeys(shown)]
+
+
+def test_visible_spans_match_reference():
+    "Visible spans are the same as writing out every item."
+    rng = random.Random(42)
+    for _ in range(300):
+        n = rng.randint(0, 30)
+        spans = []
+        for _ in range(rng.randint(0, 8)):
+            if n < 2:
+                break
+            index = rng.randint(0, n - 2)
+            spans.append((index, rng.randint(2, n - index)))
+        expected = _shown_by_first_covering_item(n, spans)
+        assert get_visible_spans(n, spans) == expected, (n, spans)
+
+
+def test_status_text_lcs(english):
+    "Terms shown, by status, without TextItems."
+    tokens = english.get_parsed_tokens("A B C D")
+    terms = [Term(english, t) for t in ["A B", "b", "D"]]
+    terms[2].status = 3
+    zws = chr(0x200B)
+    assert get_status_text_lcs(tokens, terms, english) == {
+        1: {f"a{zws} {zws}b"},
+        3: {"d"},
+        0: {"c"},
+    }
@@ -0,0 +1,43 @@
+"""
+Page html writer tests.
+"""
+
+from flask import render_template
+from lute.db import db
+from lute.read.render.html_writer import page_content_html
+from lute.read.render.page_diff import render_page
+from lute.read.render.service import Service
+
+from tests.utils import add_terms
+
+
+def _assert_same_as_template(paragraphs):
+    "The writer output matches the template."
+    expected = render_template("read/page_content.html", paragraphs=paragraphs)
+    assert page_content_html(paragraphs) == expected
+
+
+def test_empty_page(app_context):
+    "No paragraphs."
+    _assert_same_as_template([])
+
+
+def test_same_as_template(spanish, app_context):
+    "Special chars, overlapping terms, blank lines, new and existing terms."
+    [t, _, _] = add_terms(spanish, ["gato", "un gato", "gato negro"])
+    t.status = 3
+    db.session.add(t)
+    db.session.commit()
+
+    content = "Tengo un gato negro & <b>\"otro\"</b>.\n\n¿Y tú? Tengo 'un' GATO.\nNo."
+    paragraphs = Service(db.session).get_paragraphs(content, spanish)
+    _assert_same_as_template(paragraphs)
+
+
+def test_render_page_html_same_as_template(spanish, app_context):
+    "render_page joins the items' html into the same page."
+    add_terms(spanish, ["gato", "un gato"])
+    content = "Tengo un gato.\n\n¿Y tú? Tengo 'un' GATO."
+    paragraphs = Service(db.session).get_paragraphs(content, spanish)
+    expected = render_template("read/page_content.html", paragraphs=paragraphs)
+    assert render_page(paragraphs)[0] == expected
@@ -0,0 +1,106 @@
+"""
+Long-lived language indexer tests.
+"""
+
+from sqlalchemy import text as sqltext
+from lute.db import db
+from lute.read.render.language_indexers import (
+    get_language_indexer,
+    init_language_indexers,
+)
+from lute.read.render.service import Service
+
+from tests.utils import add_terms
+
+zws = "\u200B"  # zero-width space
+
+
+def _terms(indexer):
+    "Terms in the indexer."
+    with indexer._lock:  # pylint: disable=protected-access
+        ret = [t for outputs in indexer.output for t, _ in outputs]
+        if indexer.pending is not None:
+            ret += _terms(indexer.pending)
+    return sorted(ret)
+
+
+def test_indexer_is_kept_and_updated_by_orm_changes(spanish, app_context):
+    "Creating and deleting terms updates the same indexer."
+    [t, _] = add_terms(spanish, ["un gato", "perro"])
+    mw = get_language_indexer(db.session, spanish.id)
+    assert _terms(mw) == [f"un{zws} {zws}gato"]
+    assert get_language_indexer(db.session, spanish.id) is mw, "kept"
+
+    add_terms(spanish, ["un perro"])
+    assert get_language_indexer(db.session, spanish.id) is mw, "updated"
+    assert _terms(mw) == [f"un{zws} {zws}gato", f"un{zws} {zws}perro"]
+
+    db.session.delete(t)
+    db.session.commit()
+    assert get_language_indexer(db.session, spanish.id) is mw, "updated"
+    assert _terms(mw) == [f"un{zws} {zws}perro"]
+
+
+def test_rolled_back_changes_are_not_applied(spanish, app_context):
+    "Only committed changes go to the indexer."
+    mw = get_language_indexer(db.session, spanish.id)
+    add_terms(spanish, ["un gato"])
+    [t] = add_terms(spanish, ["un perro"])
+    db.session.delete(t)
+    db.session.flush()
+    db.session.rollback()
+    assert get_language_indexer(db.session, spanish.id) is mw
+    assert _terms(mw) == [f"un{zws} {zws}gato", f"un{zws} {zws}perro"]
+
+
+def test_sql_changes_rebuild_indexer(spanish, app_context):
+    "Changes outside of the ORM are found with the change counter."
+    add_terms(spanish, ["un gato"])
+    mw = get_language_indexer(db.session, spanish.id)
+    db.session.execute(sqltext("delete from words"))
+    db.session.commit()
+    rebuilt = get_language_indexer(db.session, spanish.id)
+    assert rebuilt is not mw
+    assert _terms(rebuilt) == []
+
+
+def test_paragraphs_use_current_terms(spanish, app_context):
+    "Rendering finds new multiword terms."
+    service = Service(db.session)
+
+    def _rendered_mword_terms():
+        paras = service.get_paragraphs("Tengo un gato.", spanish)
+        return [ti.text for p in paras for s in p for ti in s if ti.token_count > 1]
+
+    assert not _rendered_mword_terms()
+    add_terms(spanish, ["un gato"])
+    assert _rendered_mword_terms() == [f"un{zws} {zws}gato"]
+
+
+def test_saved_indexer_is_loaded_with_logged_changes(spanish, app_context, tmp_path):
+    "A new process loads the saved indexer instead of building it."
+    init_language_indexers(str(tmp_path))
+    [t, _] = add_terms(spanish, ["un gato", "un perro"])
+    mw = get_language_indexer(db.session, spanish.id)
+    assert (tmp_path / f"multiword_{spanish.id}.idx").exists()
+    add_terms(spanish, ["el gato"])
+    db.session.delete(t)
+    db.session.commit()
+    expected = [f"el{zws} {zws}gato", f"un{zws} {zws}perro"]
+    assert _terms(mw) == expected
+
+    init_language_indexers(str(tmp_path))
+    loaded = get_language_indexer(db.session, spanish.id)
+    assert loaded is not mw
+    assert loaded.pending is not None, "loaded, changes from log"
+    assert sorted(t for t, _ in loaded.search_all(["el", " ", "gato"])) == [
+        f"el{zws} {zws}gato"
+    ]
+    assert not loaded.search_all(["un", " ", "gato"])
+
+    db.session.execute(sqltext("delete from words"))
+    db.session.commit()
+    init_language_indexers(str(tmp_path))
+    rebuilt = get_language_indexer(db.session, spanish.id)
+    assert rebuilt.pending is None, "stale file not used"
+    assert _terms(rebuilt) == []
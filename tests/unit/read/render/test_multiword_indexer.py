@@ -1,9 +1,11 @@
 """
-get_string_indexes tests.
+MultiwordTermIndexer tests.
 """
 
+import random
 import pytest
 from lute.read.render.multiword_indexer import MultiwordTermIndexer
+from lute.read.render.calculate_textitems import get_string_indexes
 
 zws = "\u200B"  # zero-width space
 
@@ -55,3 +57,102 @@ def test_can_search_multiple_times_with_different_tokens():
     results = list(mw.search_all(["b", "a"]))
     assert len(results) == 1, "one match"
     assert results[0] == ("a", 1)
+
+
+def test_overlapping_and_suffix_terms():
+    "Terms that are suffixes of other terms or of partial matches are found."
+    mw = MultiwordTermIndexer()
+    terms = [f"a{zws}b{zws}c", f"b{zws}c", f"b{zws}c{zws}d", f"c{zws}x"]
+    for t in terms:
+        mw.add(t)
+    results = sorted(mw.search_all(["a", "b", "c", "d", "a", "b", "c", "x"]))
+    expected = [
+        (f"a{zws}b{zws}c", 0),
+        (f"a{zws}b{zws}c", 4),
+        (f"b{zws}c", 1),
+        (f"b{zws}c", 5),
+        (f"b{zws}c{zws}d", 1),
+        (f"c{zws}x", 6),
+    ]
+    assert results == expected
+
+
+def test_terms_can_be_added_after_search():
+    "The automaton is rebuilt as needed."
+    mw = MultiwordTermIndexer()
+    mw.add(f"a{zws}b")
+    assert list(mw.search_all(["x", "a", "b"])) == [(f"a{zws}b", 1)]
+    mw.add(f"x{zws}a")
+    assert sorted(mw.search_all(["x", "a", "b"])) == [(f"a{zws}b", 1), (f"x{zws}a", 0)]
+
+
+def test_same_results_as_get_string_indexes():
+    "Check random terms and tokens against the string search."
+    rng = random.Random(42)
+    vocab = ["a", "b", "c", " "]
+
+    def _random_tokens(n):
+        return [rng.choice(vocab) for _ in range(n)]
+
+    for _ in range(50):
+        terms = list({zws.join(_random_tokens(rng.randint(2, 4))) for _ in range(8)})
+        tokens = _random_tokens(30)
+        mw = MultiwordTermIndexer()
+        for t in terms:
+            mw.add(t)
+        expected = get_string_indexes(terms, zws.join(tokens))
+        assert sorted(mw.search_all(tokens)) == sorted(expected)
+
+
+def test_remove_and_add_after_search():
+    "Removed terms aren't found, and re-added ones are."
+    mw = MultiwordTermIndexer()
+    mw.add(f"a{zws}b")
+    mw.add(f"b{zws}c")
+    assert sorted(mw.search_all(["a", "b", "c"])) == [(f"a{zws}b", 0), (f"b{zws}c", 1)]
+    mw.remove(f"a{zws}b")
+    assert f"a{zws}b" not in mw
+    assert list(mw.search_all(["a", "b", "c"])) == [(f"b{zws}c", 1)]
+    mw.add(f"a{zws}b")
+    mw.add(f"c{zws}d")
+    assert mw.term_count() == 3
+    expected = [(f"a{zws}b", 0), (f"b{zws}c", 1), (f"c{zws}d", 2)]
+    assert sorted(mw.search_all(["a", "b", "c", "d"])) == expected
+
+
+def test_pending_terms_are_merged():
+    "Terms added after search are merged into the automaton when there are many."
+    mw = MultiwordTermIndexer()
+    mw.add(f"a{zws}b")
+    mw.search_all(["a"])
+    for i in range(MultiwordTermIndexer.PENDING_MERGE_SIZE + 1):
+        mw.add(f"x{zws}{i}")
+    assert mw.pending is None, "merged"
+    assert mw.term_count() == MultiwordTermIndexer.PENDING_MERGE_SIZE + 2
+    assert list(mw.search_all(["x", "7"])) == [(f"x{zws}7", 0)]
+
+
+def test_save_and_load(tmp_path):
+    "A loaded indexer finds the same terms, and can be changed."
+    mw = MultiwordTermIndexer()
+    for t in [f"a{zws}b", f"b{zws}c", f"a{zws}b{zws}c", f"c{zws}a"]:
+        mw.add(t)
+    tokens = ["a", "b", "c", "a", "b", "x"]
+    expected = sorted(mw.search_all(tokens))
+    fname = str(tmp_path / "mw.idx")
+    assert mw.save(fname, "key_1")
+
+    assert MultiwordTermIndexer.load(fname, "key_2") is None, "different key"
+    assert MultiwordTermIndexer.load(str(tmp_path / "missing"), "key_1") is None
+
+    loaded = MultiwordTermIndexer.load(fname, "key_1")
+    assert sorted(loaded.search_all(tokens)) == expected
+    assert f"b{zws}c" in loaded
+
+    loaded.remove(f"b{zws}c")
+    loaded.add(f"b{zws}x")
+    expected = [(f"a{zws}b", 0), (f"a{zws}b", 3), (f"a{zws}b{zws}c", 0)]
+    expected += [(f"b{zws}x", 4), (f"c{zws}a", 2)]
+    assert sorted(loaded.search_all(tokens)) == expected
+    loaded._merge_pending()  # pylint: disable=protected-access
+    assert sorted(loaded.search_all(tokens)) == expected, "after merge"
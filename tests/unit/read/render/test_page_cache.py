@@ -0,0 +1,63 @@
+"""
+Page cache tests.
+"""
+
+import os
+from lute.read.render.page_cache import PageCache
+
+
+def test_get_requires_matching_key():
+    "Html is only returned for the key it was cached with."
+    c = PageCache()
+    assert c.get(1, "a") is None
+    c.put(1, "a", "<p>hi</p>")
+    assert c.get(1, "a") == "<p>hi</p>"
+    assert c.get(1, "b") is None
+    c.put(1, "b", "<p>there</p>")
+    assert c.get(1, "a") is None
+    assert c.get(1, "b") == "<p>there</p>"
+
+
+def test_least_recently_used_is_dropped():
+    "Getting an entry keeps it."
+    c = PageCache(max_entries=2)
+    c.put(1, "k", "one")
+    c.put(2, "k", "two")
+    assert c.get(1, "k") == "one"
+    c.put(3, "k", "three")
+    assert c.get(2, "k") is None, "dropped"
+    assert c.get(1, "k") == "one"
+    assert c.get(3, "k") == "three"
+
+
+def test_zero_size_caches_nothing():
+    "Size 0 turns off the cache."
+    c = PageCache(max_entries=0)
+    c.put(1, "k", "one")
+    assert c.get(1, "k") is None
+
+
+def test_dropped_entries_are_spilled_to_disk(tmp_path):
+    "Spilled html is used if its key matches."
+    c = PageCache(max_entries=1, spill_dir=str(tmp_path))
+    c.put(1, "k", "one \u200B\nline two")
+    c.put(2, "k", "two")
+    assert os.listdir(tmp_path) == ["page_1.z"]
+    assert c.get(1, "other") is None
+    assert c.get(1, "k") == "one \u200B\nline two"
+
+    c2 = PageCache(max_entries=1, spill_dir=str(tmp_path))
+    assert c2.get(1, "k") == "one \u200B\nline two", "survives new cache"
+
+    c2.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_oldest_spilled_files_are_removed(tmp_path):
+    "The spill dir is limited."
+    c = PageCache(max_entries=1, spill_dir=str(tmp_path), max_spill_entries=2)
+    for i in range(5):
+        c.put(i, "k", str(i))
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2
+    assert "page_0.z" not in files
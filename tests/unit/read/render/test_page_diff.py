@@ -0,0 +1,93 @@
+"""
+Page diff tests.
+"""
+
+from lute.db import db
+from lute.read.render.page_diff import page_diff, render_page
+from lute.read.render.service import Service
+
+from tests.utils import add_terms
+
+
+def _state(content, language):
+    "Page state of the rendered content."
+    paragraphs = Service(db.session).get_paragraphs(content, language)
+    return render_page(paragraphs)[1]
+
+
+def test_no_changes(spanish, app_context):
+    "Same render, nothing changed."
+    content = "Tengo un gato.\n\nTengo un perro."
+    assert page_diff(_state(content, spanish), _state(content, spanish)) == {
+        "spans": [],
+        "sentences": [],
+    }
+
+
+def test_status_change_updates_spans(spanish, app_context):
+    "New or changed terms only update their spans."
+    content = "Tengo un gato.\n\nTengo un perro."
+    [gato] = add_terms(spanish, ["gato"])
+    old = _state(content, spanish)
+
+    gato.status = 3
+    db.session.add(gato)
+    add_terms(spanish, ["tengo"])
+    db.session.commit()
+
+    diff = page_diff(old, _state(content, spanish))
+    assert diff["sentences"] == []
+    spans = {s["id"]: s for s in diff["spans"]}
+    assert sorted(spans.keys()) == ["ID-0-0", "ID-0-4", "ID-3-8"]
+    assert spans["ID-0-4"]["status"] == "status3"
+    assert spans["ID-0-4"]["wid"] == gato.id
+    assert spans["ID-0-0"]["status"] == "status1"
+    assert spans["ID-0-0"]["wid"] is not None
+
+
+def test_deleted_term_clears_wid(spanish, app_context):
+    "Deleted terms have no term id."
+    content = "Tengo un gato."
+    [gato] = add_terms(spanish, ["gato"])
+    old = _state(content, spanish)
+    db.session.delete(gato)
+    db.session.commit()
+    diff = page_diff(old, _state(content, spanish))
+    assert [(s["id"], s["status"], s["wid"]) for s in diff["spans"]] == [
+        ("ID-0-4", "status0", None)
+    ]
+
+
+def test_multiword_term_replaces_sentence(spanish, app_context):
+    "Adding or removing a multiword term changes the sentence's spans."
+    content = "Tengo un perro.\n\nTengo un gato."
+    old = _state(content, spanish)
+    [mw] = add_terms(spanish, ["un gato"])
+    new = _state(content, spanish)
+    diff = page_diff(old, new)
+    assert diff["spans"] == []
+    assert [s["index"] for s in diff["sentences"]] == [1]
+    assert f"word{mw.id}" in diff["sentences"][0]["html"]
+    assert diff["sentences"][0]["html"].startswith('\n  <span class="textsentence"')
+
+    db.session.delete(mw)
+    db.session.commit()
+    diff = page_diff(new, _state(content, spanish))
+    assert [s["index"] for s in diff["sentences"]] == [1]
+    assert f"word{mw.id}" not in diff["sentences"][0]["html"]
+
+
+def test_changed_text_in_same_spans_replaces_sentence(spanish, app_context):
+    "Same token positions but different text."
+    old = _state("Tengo un gato.", spanish)
+    diff = page_diff(old, _state("Tengo un pato.", spanish))
+    assert diff["spans"] == []
+    assert [s["index"] for s in diff["sentences"]] == [0]
+
+
+def test_different_sentences_needs_full_reload(spanish, app_context):
+    "Pages with different paragraphs or sentences can't be diffed."
+    old = _state("Tengo un gato.", spanish)
+    assert page_diff(old, _state("Tengo un gato. Tengo un perro.", spanish)) is None
+    assert page_diff(old, _state("Tengo un gato.\n\nTengo.", spanish)) is None
+    assert page_diff(None, old) is None
@@ -2,7 +2,6 @@
 Render service tests.
 """
 
-from lute.parse.base import ParsedToken
 from lute.read.render.service import Service
 from lute.db import db
 from lute.models.term import Term
@@ -101,7 +100,6 @@ def test_smoke_get_paragraphs(spanish, app_context):
     sql = "select WoText from words order by WoText"
     assert_sql_result(sql, ["perro", "tengo/ /un", "un/ /gato"], "initial")
 
-    ParsedToken.reset_counters()
     service = Service(db.session)
     paras = service.get_paragraphs(t.text, t.book.language)
     assert len(paras) == 2
@@ -160,3 +158,55 @@ def test_rendered_leaves_blank_lines(spanish, app_context):
         "Tengo un(1)/ /perro/.",
     ]
     assert_rendered_text_equals(text, expected)
+
+
+def test_get_textitems_batch_same_as_single_calls(spanish, app_context):
+    "Batch rendering gives the same items as rendering each string."
+    add_terms(spanish, ["perro", "un gato"])
+    strings = ["Tengo un gato.", "Hay un perro.\nNo hay nada.", ""]
+    service = Service(db.session)
+
+    def _summary(textitems):
+        return [(ti.text, ti.wo_status, ti.token_count) for ti in textitems]
+
+    expected = [_summary(service.get_textitems(s, spanish)) for s in strings]
+    actual = [_summary(tis) for tis in service.get_textitems_batch(strings, spanish)]
+    assert actual == expected
+
+
+def test_stored_tokens_used_if_current(spanish, app_context, monkeypatch):
+    "Tokens are stored per text, and only re-parsed if the text or settings change."
+    t = make_text("Hola", "Tengo un gato.", spanish)
+    db.session.add(t)
+    db.session.commit()
+
+    service = Service(db.session)
+    sql = "select TtsTxID from texttokenstreams"
+    assert_sql_result(sql, [], "nothing stored")
+
+    def _rendered(s):
+        paras = service.get_paragraphs(s, t.book.language, t.id)
+        return "/".join(ti.text for para in paras for sent in para for ti in sent)
+
+    assert _rendered(t.text) == "Tengo/ /un/ /gato/."
+    db.session.commit()
+    assert_sql_result(sql, [str(t.id)], "stored")
+
+    parsed = []
+    parser_class = type(spanish.parser)
+    real_get_parsed_tokens = parser_class.get_parsed_tokens
+
+    def _spy(self, text, language):
+        parsed.append(text)
+        return real_get_parsed_tokens(self, text, language)
+
+    monkeypatch.setattr(parser_class, "get_parsed_tokens", _spy)
+    assert _rendered(t.text) == "Tengo/ /un/ /gato/."
+    assert not parsed, "stored tokens used"
+
+    assert _rendered("Tengo un perro.") == "Tengo/ /un/ /perro/."
+    assert parsed == ["Tengo un perro."], "changed text parsed"
+
+    spanish.exceptions_split_sentences = "un."
+    assert _rendered("Tengo un perro.") == "Tengo/ /un/ /perro/."
+    assert len(parsed) == 2, "changed settings parsed"
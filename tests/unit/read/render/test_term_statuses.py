@@ -0,0 +1,101 @@
+"""
+Term status dictionary tests.
+"""
+
+from sqlalchemy import event, text as sqltext
+from lute.db import db
+from lute.models.term import Term
+from lute.read.render.term_statuses import get_term_statuses
+from lute.read.render.service import Service
+
+from tests.utils import add_terms
+
+zws = "\u200B"  # zero-width space
+
+
+def _statuses(language):
+    "text_lc => status."
+    return {k: v.status for k, v in get_term_statuses(db.session, language.id).items()}
+
+
+def test_orm_changes_are_written_through(spanish, app_context):
+    "Saves and deletes update the same dict."
+    [gato, _] = add_terms(spanish, ["gato", "perro"])
+    d = get_term_statuses(db.session, spanish.id)
+    assert _statuses(spanish) == {"gato": 1, "perro": 1}
+
+    gato.status = 3
+    db.session.add(gato)
+    add_terms(spanish, ["un gato"])
+    assert get_term_statuses(db.session, spanish.id) is d, "kept"
+    assert _statuses(spanish) == {"gato": 3, "perro": 1, f"un{zws} {zws}gato": 1}
+    assert d["gato"].id == gato.id
+
+    db.session.delete(gato)
+    db.session.commit()
+    assert get_term_statuses(db.session, spanish.id) is d, "kept"
+    assert _statuses(spanish) == {"perro": 1, f"un{zws} {zws}gato": 1}
+
+
+def test_sql_and_trigger_changes_reload(spanish, app_context):
+    "Bulk sql updates, and statuses passed on to following children, are found."
+    [parent, child] = add_terms(spanish, ["gato", "gatos"])
+    child.parents.append(parent)
+    child.sync_status = True
+    db.session.add(child)
+    db.session.commit()
+    d = get_term_statuses(db.session, spanish.id)
+
+    parent.status = 4
+    db.session.add(parent)
+    db.session.commit()
+    assert _statuses(spanish) == {"gato": 4, "gatos": 4}
+    assert get_term_statuses(db.session, spanish.id) is not d, "reloaded"
+
+    db.session.execute(sqltext("update words set WoStatus = 5"))
+    db.session.commit()
+    assert _statuses(spanish) == {"gato": 5, "gatos": 5}
+
+
+def test_rendering_does_not_query_terms(spanish, app_context):
+    "Once loaded, terms are found without querying the words table."
+    add_terms(spanish, ["gato", "un gato"])
+    service = Service(db.session)
+    service.get_paragraphs("Tengo un gato.", spanish)
+
+    sqls = []
+
+    def _record(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        sqls.append(statement)
+
+    engine = db.session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        paras = service.get_paragraphs("Tengo un gato.", spanish)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert not [s for s in sqls if "words" in s], sqls
+    tis = [ti for p in paras for s in p for ti in s if ti.wo_id is not None]
+    assert [ti.text for ti in tis] == [f"un{zws} {zws}gato"]
+
+
+def test_find_terms_in_large_content(spanish, app_context):
+    "Lookups are chunked, so big content doesn't hit sqlite's param limit."
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = [f"gato{a}{b}{c}" for a in letters[:2] for b in letters for c in letters]
+    for w in words:
+        db.session.add(Term(spanish, w))
+    db.session.commit()
+
+    service = Service(db.session)
+    found = service.find_all_Terms_in_string(" ".join(words), spanish)
+    assert sorted(t.text for t in found) == sorted(words)
+
+
+def test_new_language_first_term_is_written_through(spanish, app_context):
+    "A language's change counts are created with it, not by its first term."
+    d = get_term_statuses(db.session, spanish.id)
+    add_terms(spanish, ["gato"])
+    assert get_term_statuses(db.session, spanish.id) is d, "kept"
+    assert _statuses(spanish) == {"gato": 1}
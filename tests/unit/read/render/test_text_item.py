@@ -0,0 +1,47 @@
+"""
+TextItem tests.
+"""
+
+from lute.read.render.term_changes import TermValues
+from lute.read.render.text_item import TextItem
+
+zws = "\u200B"  # zero-width space
+
+
+def _make_item(term=None):
+    "Make a multiword item."
+    ti = TextItem(term)
+    ti.text = f"A{zws} {zws}B"
+    ti.text_lc = f"a{zws} {zws}b"
+    ti.token_count = 3
+    ti.display_count = 3
+    ti.index = 7
+    ti.is_word = 1
+    return ti
+
+
+def test_item_with_render_term():
+    "Values come from the term values."
+    ti = _make_item(TermValues(42, 1, f"a{zws} {zws}b", 3, 3))
+    assert not hasattr(ti, "__dict__"), "slots"
+    assert ti.wo_id == 42
+    assert ti.lang_id == 1
+    assert ti.status_class == "status3"
+    assert ti.html_class_string == "textitem click word word42"
+
+
+def test_display_text_and_classes_are_recalculated_on_change():
+    "Cached values are cleared when the item changes."
+    ti = _make_item(TermValues(None, 1, f"a{zws} {zws}b", 0, 3))
+    assert ti.html_display_text == "A B"
+    assert ti.html_class_string == "textitem click word wordNone"
+
+    ti.display_count = 1
+    ti.add_html_class("sentencestart")
+    assert ti.html_display_text == "B"
+    assert (
+        ti.html_class_string == "textitem click word wordNone overlapped sentencestart"
+    )
+
+    ti.term = TermValues(5, 1, f"a{zws} {zws}b", 1, 3)
+    assert ti.html_class_string == "textitem click word word5 overlapped sentencestart"
@@ -0,0 +1,133 @@
+"""
+Background page rendering tests.
+"""
+
+from concurrent.futures import wait
+from lute.db import db
+from lute.models.term import Term
+from lute.read.prerender import (
+    init_prerender,
+    schedule_prerender,
+    cancel_prerender,
+    shutdown_prerender,
+)
+from lute.read.render.page_cache import get_page_cache
+from lute.read.render.service import Service as RenderService
+from lute.read.service import Service
+
+from tests.utils import make_book
+
+
+def _make_book(language):
+    "Saved three-page book."
+    b = make_book(
+        "Hola", ["Tengo un gato.", "Tengo un perro.", "Tengo un pato."], language
+    )
+    db.session.add(b)
+    db.session.commit()
+    return b
+
+
+def _rendered(book, pagenum):
+    "True if the page's html or paragraphs are in the page cache."
+    cache = get_page_cache()
+    textid = book.text_at_page(pagenum).id
+    return cache.get_state(textid) is not None or cache.has_paragraphs(textid)
+
+
+def _perro_count():
+    return db.session.query(Term).filter(Term.text_lc == "perro").count()
+
+
+def test_page_rendered_in_background(app, spanish, app_context, monkeypatch):
+    "Page's paragraphs are cached, but its new terms aren't created."
+    init_prerender(app, 1)
+    b = _make_book(spanish)
+    schedule_prerender(b.id, 2).result(timeout=10)
+    assert _rendered(b, 2)
+    assert not _rendered(b, 3)
+    assert _perro_count() == 0, "not created in background"
+
+    calls = []
+    orig = RenderService.get_paragraphs
+
+    def _tracking_get_paragraphs(self, *args, **kwargs):
+        calls.append(args)
+        return orig(self, *args, **kwargs)
+
+    monkeypatch.setattr(RenderService, "get_paragraphs", _tracking_get_paragraphs)
+    html = Service(db.session).get_page_content(b, 2, True)
+    assert len(calls) == 0, "cached paragraphs used"
+    assert _perro_count() == 1, "created on open"
+    perro = db.session.query(Term).filter(Term.text_lc == "perro").first()
+    assert f'data-wid="{perro.id}"' in html
+    assert not get_page_cache().has_paragraphs(b.text_at_page(2).id), "popped"
+    shutdown_prerender()
+
+
+def test_stale_paragraphs_not_used(app, spanish, app_context):
+    "Paragraphs are discarded if the language's terms changed."
+    init_prerender(app, 1)
+    b = _make_book(spanish)
+    schedule_prerender(b.id, 2).result(timeout=10)
+    t = Term(spanish, "un perro")
+    db.session.add(t)
+    db.session.commit()
+    html = Service(db.session).get_page_content(b, 2, True)
+    assert f'data-wid="{t.id}"' in html, "new multiword found"
+    shutdown_prerender()
+
+
+def test_page_and_terms_saved_in_background(app, spanish, app_context, rendered_pages):
+    "Page is cached, and its new terms created, if saving terms."
+    init_prerender(app, 1, save_terms=True)
+    b = _make_book(spanish)
+    schedule_prerender(b.id, 2).result(timeout=10)
+    assert _rendered(b, 2)
+    assert not _rendered(b, 3)
+    assert _perro_count() == 1
+
+    rendered_pages.clear()
+    html = Service(db.session).get_page_content(b, 2, True)
+    assert 'data-text="perro"' in html
+    assert len(rendered_pages) == 0, "served from cache"
+    shutdown_prerender()
+
+
+def test_same_page_not_scheduled_twice(app, spanish, app_context):
+    "A page already being rendered isn't rendered again."
+    init_prerender(app, 1)
+    b = _make_book(spanish)
+    lock = get_page_cache().render_lock(spanish.id)
+    with lock:
+        f = schedule_prerender(b.id, 2)
+        assert schedule_prerender(b.id, 2) is None
+    f.result(timeout=10)
+    shutdown_prerender()
+
+
+def test_scheduling_another_page_cancels(app, spanish, app_context):
+    "Navigating elsewhere cancels the book's unfinished page."
+    init_prerender(app, 1)
+    b = _make_book(spanish)
+    lock = get_page_cache().render_lock(spanish.id)
+    with lock:
+        first = schedule_prerender(b.id, 2)
+        second = schedule_prerender(b.id, 3)
+    wait([first, second], timeout=10)
+    assert not _rendered(b, 2), "cancelled"
+    assert _rendered(b, 3)
+
+    with lock:
+        f = schedule_prerender(b.id, 2)
+        cancel_prerender(b.id)
+    wait([f], timeout=10)
+    assert not _rendered(b, 2), "cancelled"
+    shutdown_prerender()
+
+
+def test_no_workers(app, spanish, app_context):
+    "0 workers turns off background rendering."
+    init_prerender(app, 0)
+    b = _make_book(spanish)
+    assert schedule_prerender(b.id, 2) is None
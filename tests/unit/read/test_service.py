@@ -4,10 +4,12 @@ Read service tests.
 
 from lute.models.term import Term
 from lute.book.model import Book, Repository
+from lute.read.render.term_statuses import get_term_statuses
 from lute.read.service import Service
 from lute.db import db
 
 from tests.dbasserts import assert_record_count_equals, assert_sql_result
+from tests.utils import make_book
 
 
 def test_mark_page_read(english, app_context):
@@ -119,3 +121,103 @@ def test_start_reading_creates_Terms_for_unknown_words(english, app_context):
         len(textitems) == 0
     ), f"All text items should have a term, but got {textitems}"
     assert_sql_result(sql, ["cat", "dog"], "after start")
+
+
+def _saved_book(language):
+    "Saved one-page book."
+    b = make_book("blah", "Dog CAT dog cat.", language)
+    db.session.add(b)
+    db.session.commit()
+    return b
+
+
+def test_page_content_is_cached_until_terms_change(
+    english, app_context, rendered_pages
+):
+    "Cached html is used until a term in the language changes."
+    dbbook = _saved_book(english)
+    service = Service(db.session)
+    html = service.get_page_content(dbbook, 1, True)
+    assert 'data-status-class="status0"' in html
+    assert len(rendered_pages) == 1
+    assert service.get_page_content(dbbook, 1) == html
+    assert len(rendered_pages) == 1, "cached"
+
+    t = db.session.query(Term).filter(Term.text_lc == "cat").first()
+    t.status = 3
+    db.session.add(t)
+    db.session.commit()
+    changed = service.get_page_content(dbbook, 1)
+    assert len(rendered_pages) == 2, "re-rendered"
+    assert 'data-status-class="status3"' in changed
+
+
+def test_page_content_re_rendered_if_text_changes(english, app_context):
+    "The text is part of the cache key."
+    dbbook = _saved_book(english)
+    service = Service(db.session)
+    service.get_page_content(dbbook, 1)
+    service.get_page_content(dbbook, 1)
+
+    tx = dbbook.texts[0]
+    tx.text = "Dog bird."
+    db.session.add(tx)
+    db.session.commit()
+    html = service.get_page_content(dbbook, 1)
+    assert 'data-text="bird"' in html
+
+
+def test_page_changes(english, app_context):
+    "Changes since the page was last rendered."
+    dbbook = _saved_book(english)
+    service = Service(db.session)
+    assert service.get_page_changes(dbbook, 1) is None, "not rendered yet"
+
+    service.get_page_content(dbbook, 1, True)
+    assert service.get_page_changes(dbbook, 1) == {"spans": [], "sentences": []}
+
+    t = db.session.query(Term).filter(Term.text_lc == "cat").first()
+    t.status = 3
+    db.session.add(t)
+    db.session.commit()
+    changes = service.get_page_changes(dbbook, 1)
+    assert [s["id"] for s in changes["spans"]] == ["ID-0-2", "ID-0-6"]
+    assert {s["status"] for s in changes["spans"]} == {"status3"}
+    assert changes["sentences"] == []
+    assert service.get_page_changes(dbbook, 1) == {"spans": [], "sentences": []}
+
+
+def test_new_status_0_terms_written_through_to_statuses(english, app_context):
+    "Inserted terms are added to the term status dict, which isn't reloaded."
+    t = Term(english, "dog")
+    db.session.add(t)
+    db.session.commit()
+    statuses = get_term_statuses(db.session, english.id)
+
+    dbbook = _saved_book(english)
+    Service(db.session).start_reading(dbbook, 1)
+    sql = "select WoText, WoTextLC, WoStatus, WoTokenCount from words order by WoTextLC"
+    assert_sql_result(
+        sql, ["cat; cat; 0; 1", "dog; dog; 1; 1"], "case of last instance"
+    )
+    assert get_term_statuses(db.session, english.id) is statuses, "not reloaded"
+    assert statuses["cat"].status == 0
+
+
+def test_insert_status_0_terms_ignores_existing_terms(english, app_context):
+    "Existing terms (e.g. just made by another page open) are read back."
+    t = Term(english, "cat")
+    t.status = 3
+    db.session.add(t)
+    db.session.commit()
+
+    service = Service(db.session)
+    # pylint: disable=protected-access
+    saved, added = service._insert_status_0_terms(english, {"cat": "Cat", "dog": "Dog"})
+    assert added == 1
+    assert saved["cat"].id == t.id
+    assert saved["cat"].status == 3
+    assert saved["dog"].status == 0
+    sql = "select WoText, WoStatus from words order by WoTextLC"
+    assert_sql_result(sql, ["cat; 3", "Dog; 0"], "cat unchanged")
+    assert get_term_statuses(db.session, english.id)["dog"] == saved["dog"]
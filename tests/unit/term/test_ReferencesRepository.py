@@ -7,10 +7,11 @@ and retrieved from DB.
 
 from datetime import datetime
 import pytest
+from sqlalchemy import event
 
 from lute.db import db
 from lute.term.model import Term, Repository, ReferencesRepository
-from tests.dbasserts import assert_record_count_equals
+from tests.dbasserts import assert_record_count_equals, assert_sql_result
 from tests.utils import add_terms, make_text
 
 
@@ -267,3 +268,94 @@ def test_can_get_references_by_term_id_including_unread(spanish):
     sentences = [r.sentence for r in refs["term"]]
     expected = ["<b>Tengo</b> un gato."]
     assert sentences == expected, "including unread"
+
+
+@pytest.mark.sentences
+def test_sentence_tokens_are_indexed_when_sentences_loaded(spanish):
+    "References only check sentences that have all of the term's tokens."
+    text = _make_read_text("hola", "Tengo un GATO.  Ella tiene un perro.", spanish)
+    sql = f"""select StTokenLC from sentencetokens
+      inner join sentences on SeID = StSeID
+      where SeTxID = {text.id} order by StTokenLC"""
+    expected = [".", ". ", "ella", "gato", "perro", "tengo", "tiene", "un", "un"]
+    assert_sql_result(sql, expected)
+
+    text.text = "Un perro."
+    db.session.add(text)
+    db.session.commit()
+    assert_sql_result(sql, [".", "perro", "un"], "old sentences' tokens removed")
+    assert_record_count_equals("select * from sentencetokens", 3, "all removed")
+
+
+@pytest.mark.sentences
+def test_multiword_reference_requires_tokens_in_order(spanish, refsrepo):
+    "Sentences with all of the tokens are only matched if they're together."
+    _make_read_text("hola", "Un gato tengo.  Tengo un gato.", spanish)
+    t = add_terms(spanish, ["tengo un"])[0]
+    refs = refsrepo.find_references(t)
+    sentences = [r.sentence for r in refs["term"]]
+    assert sentences == ["<b>Tengo un</b> gato."]
+
+
+@pytest.mark.sentences
+def test_family_references_are_found_in_one_query(spanish, repo):
+    "The term, children, and parents' families are searched together."
+    _make_read_text("hola", "Tengo un gato.  Tienes un perro.  Tiene uno.", spanish)
+    for child in ["tengo", "tienes", "tiene"]:
+        t = Term()
+        t.language_id = spanish.id
+        t.text = child
+        t.parents = ["tener"]
+        repo.add(t)
+    repo.commit()
+
+    sqls = []
+
+    def _record(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        sqls.append(statement)
+
+    refsrepo = ReferencesRepository(db.session, limit=1)
+    tengo = repo.find(spanish.id, "tengo")
+    engine = db.session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        refs = refsrepo.find_references(tengo)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert len([s for s in sqls if "sentences" in s]) == 1, sqls
+    assert full_refs_to_string(refs) == {
+        "term": ["hola (1/1), <b>Tengo</b> un gato."],
+        "children": [],
+        "parents": [
+            {
+                "term": "tener",
+                "refs": [
+                    "hola (1/1), <b>Tiene</b> uno.",
+                    "hola (1/1), <b>Tienes</b> un perro.",
+                ],
+            }
+        ],
+    }, "limit applies to each term"
+
+
+@pytest.mark.sentences
+def test_large_family_references_are_found(spanish, repo):
+    "Families with more terms than sqlite allows in one compound select."
+    _make_read_text("hola", "Tengo un gato.  Tienes un perro.", spanish)
+    children = ["tengo", "tienes"] + [f"tener{i}" for i in range(501)]
+    for child in children:
+        t = Term()
+        t.language_id = spanish.id
+        t.text = child
+        t.parents = ["tener"]
+        repo.add(t)
+    repo.commit()
+
+    refsrepo = ReferencesRepository(db.session, limit=1)
+    tener = repo.find(spanish.id, "tener")
+    refs = refsrepo.find_references(tener)
+    assert full_refs_to_string(refs)["children"] == [
+        "hola (1/1), <b>Tengo</b> un gato.",
+        "hola (1/1), <b>Tienes</b> un perro.",
+    ]
@@ -0,0 +1,109 @@
+"""
+Term search index tests.
+"""
+
+import random
+from sqlalchemy import text as sqltext
+from lute.db import db
+from lute.models.term import Term
+from lute.term.search_index import TermSearchIndex, find_matches, get_search_index
+
+from tests.utils import add_terms
+
+
+def _texts(language, s):
+    return [m.text for m in find_matches(db.session, language.id, s)]
+
+
+def test_index_ranks_exact_then_starting_then_containing():
+    "Parents go first in each group."
+    index = TermSearchIndex(0, ["xab", "ab", "abd", "abc", "zab", "b", "yab"], ["yab"])
+    found = index.find("ab", 10)
+    assert found == [
+        ("ab", 2, False),
+        ("abc", 1, False),
+        ("abd", 1, False),
+        ("yab", 0, True),
+        ("xab", 0, False),
+        ("zab", 0, False),
+    ]
+    assert index.find("ab", 2) == found[:2]
+    assert len(index.find("q", 2)) == 0
+
+
+def test_containing_matches_do_not_span_terms():
+    "The joined text_lcs are separated."
+    index = TermSearchIndex(0, ["ab", "cd", "abcd"], [])
+    assert index.find("bc", 10) == [("abcd", 0, False)]
+    index.add("xbc")
+    index.remove("abcd")
+    assert index.find("bc", 10) == [("xbc", 0, False)]
+
+
+def test_same_results_as_sql_search():
+    "Compare to sorting all of the matches, as the old SQL query did."
+    rand = random.Random(42)
+    text_lcs = sorted(
+        {"".join(rand.choices("abc", k=rand.randint(1, 5))) for _ in range(400)}
+    )
+    parents = rand.sample(text_lcs, 20)
+    index = TermSearchIndex(0, text_lcs, parents)
+    for s in ["a", "ab", "bca", "c", "aaaa", "cab"]:
+
+        def _rank(t, s=s):
+            r = 2 if t == s else (1 if t.startswith(s) else 0)
+            return (-r, t not in parents, t)
+
+        expected = sorted([t for t in text_lcs if s in t], key=_rank)[:30]
+        assert [f[0] for f in index.find(s, 30)] == expected, s
+
+
+def test_find_matches_returns_terms(spanish, app_context):
+    "Matches have the term data."
+    # pylint: disable=unbalanced-tuple-unpacking
+    [gato, _] = add_terms(spanish, ["gato", "gatos"])
+    matches = find_matches(db.session, spanish.id, "gato")
+    assert [(m.id, m.text, m.text_starts_with_search_string) for m in matches] == [
+        (gato.id, "gato", 2),
+        (gato.id + 1, "gatos", 1),
+    ]
+
+
+def test_orm_changes_are_written_through(spanish, app_context):
+    "Saved and deleted terms update the same index."
+    # pylint: disable=unbalanced-tuple-unpacking
+    [gato] = add_terms(spanish, ["gato"])
+    index = get_search_index(db.session, spanish.id)
+    add_terms(spanish, ["gatito"])
+    db.session.delete(gato)
+    db.session.commit()
+    assert get_search_index(db.session, spanish.id) is index, "kept"
+    assert _texts(spanish, "gat") == ["gatito"]
+
+
+def test_parent_changes_are_found(spanish, app_context):
+    "Parents are reloaded if changed, and terms with children go first."
+    # pylint: disable=unbalanced-tuple-unpacking
+    [_, gato] = add_terms(spanish, ["gatito", "gato"])
+    assert _texts(spanish, "gat") == ["gatito", "gato"]
+
+    child = Term(spanish, "gatos")
+    child.parents.append(gato)
+    db.session.add(child)
+    db.session.commit()
+    assert _texts(spanish, "gat") == ["gato", "gatito", "gatos"]
+
+    child.parents.remove(gato)
+    db.session.add(child)
+    db.session.commit()
+    assert _texts(spanish, "gat") == ["gatito", "gato", "gatos"]
+
+
+def test_sql_changes_reload(spanish, app_context):
+    "Changes made outside the ORM are caught by the change count."
+    add_terms(spanish, ["gato", "gatos"])
+    index = get_search_index(db.session, spanish.id)
+    db.session.execute(sqltext("delete from words where WoTextLC = 'gatos'"))
+    db.session.commit()
+    assert _texts(spanish, "gat") == ["gato"]
+    assert get_search_index(db.session, spanish.id) is not index, "reloaded"
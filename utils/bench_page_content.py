@@ -0,0 +1,70 @@
+"""
+Compare the speed of the page_content.html template and the html writer.
+
+Renders a page of made-up TextItems both ways, checks that the
+output is the same, and prints the times.
+
+Usage:
+
+python -m utils.bench_page_content [token_count]
+"""
+
+import os
+import sys
+import timeit
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from lute.read.render.html_writer import page_content_html
+from lute.read.render.term_changes import TermValues
+from lute.read.render.text_item import TextItem
+
+
+def _make_paragraphs(token_count):
+    "Paragraphs of sentences of alternating words and spaces."
+    paragraphs = []
+    index = 0
+    sentence_number = 0
+    while index < token_count:
+        para = []
+        for _ in range(5):
+            sentence = []
+            for i in range(20):
+                word = i % 2 == 0
+                ti = TextItem(TermValues(index, 1, "w", i % 6, 1) if word else None)
+                ti.text = f"w<{index}>" if word else " "
+                ti.text_lc = ti.text
+                ti.index = index
+                ti.is_word = word
+                ti.sentence_number = sentence_number
+                ti.paragraph_number = len(paragraphs)
+                sentence.append(ti)
+                index += 1
+            sentence[0].add_html_class("sentencestart")
+            para.append(sentence)
+            sentence_number += 1
+        paragraphs.append(para)
+    return paragraphs
+
+
+def bench(token_count):
+    "Time rendering the page both ways."
+    templates = os.path.join(os.path.dirname(__file__), "..", "lute", "templates")
+    env = Environment(
+        loader=FileSystemLoader(templates), autoescape=select_autoescape()
+    )
+    template = env.get_template("read/page_content.html")
+    paragraphs = _make_paragraphs(token_count)
+
+    if template.render(paragraphs=paragraphs) != page_content_html(paragraphs):
+        raise RuntimeError("Writer output differs from the template.")
+
+    n = 20
+    t_template = timeit.timeit(lambda: template.render(paragraphs=paragraphs), number=n)
+    t_writer = timeit.timeit(lambda: page_content_html(paragraphs), number=n)
+    print(f"{token_count} tokens, average of {n} renders:")
+    print(f"  template: {t_template / n * 1000:.1f} ms")
+    print(f"  writer:   {t_writer / n * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)